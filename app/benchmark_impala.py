@@ -0,0 +1,83 @@
+import sys
+sys.path.append('./')
+import time
+import argparse
+import tensorflow as tf
+import keras
+from ecosys.environment import EcosysVectorEnv
+from ecosys.models import ActorCritic
+from ecosys.training import BatchedActorCriticTrainer, ImpalaTrainer
+
+
+N_HIDDEN = 64
+LEARNING_RATE = 0.01
+GAMMA = 0.99
+MAX_STEPS = 500
+
+
+def benchmark_sync(num_envs: int, duration: float) -> tuple[float, float]:
+    '''Return the env-steps/sec and episodes/sec of BatchedActorCriticTrainer.'''
+    env = EcosysVectorEnv(num_envs=num_envs)
+    trainer = BatchedActorCriticTrainer(env, ActorCritic(4, N_HIDDEN), keras.optimizers.Adam(LEARNING_RATE))
+    # Count the steps through the numpy_function bridge, wrapped before the first trace
+    n_calls = [0]
+    env_step = trainer.env_step
+
+    def counted_env_step(action):
+        n_calls[0] += 1
+        return env_step(action)
+    trainer.env_step = counted_env_step
+    # Trace the training step
+    state, _ = env.reset(seed=0)
+    trainer.train_step(tf.cast(state, tf.int8), GAMMA, MAX_STEPS)
+    n_calls[0], n_episodes = 0, 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        state, _ = env.reset()
+        n_episodes += len(trainer.train_step(tf.cast(state, tf.int8), GAMMA, MAX_STEPS))
+    elapsed = time.perf_counter() - start
+    return n_calls[0]*num_envs/elapsed, n_episodes/elapsed
+
+
+def benchmark_impala(
+    num_actors: int,
+    num_envs: int,
+    unroll_length: int,
+    batch_size: int,
+    duration: float
+) -> tuple[float, float, float]:
+    '''Return the learned env-steps/sec, episodes/sec and mean policy lag of ImpalaTrainer.'''
+    trainer = ImpalaTrainer(
+        lambda: EcosysVectorEnv(num_envs=num_envs), ActorCritic(4, N_HIDDEN), keras.optimizers.Adam(LEARNING_RATE),
+        num_actors=num_actors, unroll_length=unroll_length, batch_size=batch_size, gamma=GAMMA, seed=0)
+    with trainer:
+        # Trace the training step
+        trainer.train_step()
+        steps, n_episodes, lags = trainer.steps, 0, []
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            n_episodes += len(trainer.train_step())
+            lags.append(trainer.policy_lag)
+        elapsed = time.perf_counter() - start
+        return (trainer.steps - steps)/elapsed, n_episodes/elapsed, sum(lags)/len(lags)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare the throughput of the synchronous and the asynchronous actor-learner trainers.')
+    parser.add_argument('--num-envs', type=int, default=16, help='sub-environments per trainer or actor')
+    parser.add_argument('--num-actors', type=int, default=2)
+    parser.add_argument('--unroll-length', type=int, default=20)
+    parser.add_argument('--batch-size', type=int, default=2, help='unrolls per learner step')
+    parser.add_argument('--duration', type=float, default=10.)
+    args = parser.parse_args()
+    print(f'{"trainer":>10} {"steps/sec":>12} {"episodes/sec":>13} {"policy lag":>11}')
+    steps_per_sec, episodes_per_sec = benchmark_sync(args.num_envs, args.duration)
+    print(f'{"sync":>10} {steps_per_sec:>12.0f} {episodes_per_sec:>13.1f} {0.:>11.2f}')
+    steps_per_sec, episodes_per_sec, lag = benchmark_impala(
+        args.num_actors, args.num_envs, args.unroll_length, args.batch_size, args.duration)
+    print(f'{"impala":>10} {steps_per_sec:>12.0f} {episodes_per_sec:>13.1f} {lag:>11.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,61 @@
+import sys
+sys.path.append('./')
+import time
+import argparse
+import numpy
+from ecosys.environment import EcosysMultiAgentEnv
+
+
+def benchmark(
+    grid_dim: int,
+    n_agents: int,
+    carnivore_fraction: float,
+    resource_density: float,
+    view_radius: int,
+    n_steps: int
+) -> tuple[float, float]:
+    '''Return the reset time and the mean step time in seconds of a multi-agent environment with random actions.'''
+    n_carnivores = int(n_agents*carnivore_fraction)
+    env = EcosysMultiAgentEnv(
+        grid_dim=grid_dim,
+        n_herbivores=n_agents - n_carnivores,
+        n_carnivores=n_carnivores,
+        n_resources=int(grid_dim*grid_dim*resource_density),
+        view_radius=view_radius
+    )
+    start = time.perf_counter()
+    env.reset(seed=0)
+    reset_time = time.perf_counter() - start
+    rng = numpy.random.default_rng(0)
+    actions = rng.integers(0, 4, size=(n_steps, n_agents))
+    start = time.perf_counter()
+    for t in range(n_steps):
+        env.step(actions[t])
+    return reset_time, (time.perf_counter() - start)/n_steps
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Measure how EcosysMultiAgentEnv scales with the grid size and number of agents.')
+    parser.add_argument('--grid-dims', type=int, nargs='+', default=[100, 300, 1000])
+    parser.add_argument('--agents', type=int, nargs='+', default=[100, 1000, 10000])
+    parser.add_argument('--carnivore-fraction', type=float, default=0.1)
+    parser.add_argument('--resource-density', type=float, default=0.1)
+    parser.add_argument('--view-radius', type=int, default=8)
+    parser.add_argument('--steps', type=int, default=50)
+    args = parser.parse_args()
+    print(f'{"grid_dim":>8} {"agents":>8} {"reset ms":>9} {"step ms":>9} {"steps/sec":>10} {"agent-steps/sec":>16}')
+    for grid_dim in args.grid_dims:
+        for n_agents in args.agents:
+            if n_agents + grid_dim*grid_dim*args.resource_density > grid_dim*grid_dim:
+                continue
+            reset_time, step_time = benchmark(
+                grid_dim, n_agents, args.carnivore_fraction, args.resource_density, args.view_radius, args.steps)
+            print(
+                f'{grid_dim:>8} {n_agents:>8} {reset_time*1e3:>9.1f} {step_time*1e3:>9.2f}'
+                f' {1/step_time:>10.1f} {n_agents/step_time:>16.0f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+import sys
+sys.path.append('./')
+import time
+import argparse
+import numpy as np
+import tensorflow as tf
+import keras
+from ecosys.environment import EcosysVectorEnv
+from ecosys.models import ActorCritic, ConvActorCritic
+from ecosys.training import BatchedActorCriticTrainer
+
+
+N_HIDDEN = 64
+LEARNING_RATE = 0.01
+GAMMA = 0.99
+MAX_STEPS = 500
+
+
+def learning_curve(
+    patch_size: int,
+    num_envs: int,
+    grid_dim: int,
+    n_resources: int,
+    episodes: int,
+    seed: int
+) -> tuple[np.ndarray, float]:
+    '''Train on a fixed grid, returning the reward of every episode and the seconds taken.'''
+    tf.random.set_seed(seed)
+    if patch_size > 0:
+        env = EcosysVectorEnv(num_envs=num_envs, patch_size=patch_size)
+        model = ConvActorCritic(4, N_HIDDEN, patch_size)
+    else:
+        env = EcosysVectorEnv(num_envs=num_envs)
+        model = ActorCritic(4, N_HIDDEN)
+    trainer = BatchedActorCriticTrainer(env, model, keras.optimizers.Adam(LEARNING_RATE))
+    options = {'grid_dim': grid_dim, 'n_resources': n_resources}
+    env.reset(seed=seed, options=options)
+    rewards = []
+    start = time.perf_counter()
+    while len(rewards) < episodes:
+        state, _ = env.reset(options=options)
+        rewards.extend(trainer.train_step(tf.cast(state, tf.int8), GAMMA, MAX_STEPS).numpy().tolist())
+    return np.array(rewards[:episodes]), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare how fast ActorCritic and ConvActorCritic on egocentric patches learn on a larger grid.')
+    parser.add_argument('--patch-size', type=int, default=5)
+    parser.add_argument('--num-envs', type=int, default=16)
+    parser.add_argument('--grid-dim', type=int, default=20)
+    parser.add_argument('--n-resources', type=int, default=40)
+    parser.add_argument('--episodes', type=int, default=3200)
+    parser.add_argument('--window', type=int, default=400, help='episodes the reported mean rewards are taken over')
+    parser.add_argument('--seeds', type=int, nargs='+', default=[0, 1])
+    args = parser.parse_args()
+    checkpoints = list(range(args.window, args.episodes + 1, args.window))
+    print(f'{"model":>16} {"seed":>5} {"seconds":>8} ' + ' '.join(f'{f"@{n}":>8}' for n in checkpoints))
+    for name, patch_size in [('ActorCritic', 0), ('ConvActorCritic', args.patch_size)]:
+        for seed in args.seeds:
+            rewards, seconds = learning_curve(
+                patch_size, args.num_envs, args.grid_dim, args.n_resources, args.episodes, seed)
+            # Mean reward of the window of episodes ending at each checkpoint
+            means = [rewards[n - args.window:n].mean() for n in checkpoints]
+            print(f'{name:>16} {seed:>5} {seconds:>8.1f} ' + ' '.join(f'{m:>8.1f}' for m in means))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+import sys
+sys.path.append('./')
+import timeit
+import argparse
+import tensorflow as tf
+from ecosys.training.returns import discounted_returns, generalized_advantage_estimates
+
+
+@tf.function
+def loop_returns(rewards: tf.Tensor, gamma: float) -> tf.Tensor:
+    '''Discounted returns of [T] rewards accumulated one step at a time.'''
+    n = tf.shape(rewards)[0]
+    returns = tf.TensorArray(dtype=tf.float32, size=n)
+    rewards = rewards[::-1]
+    discounted_sum = tf.constant(0.0)
+    discounted_sum_shape = discounted_sum.shape
+    for i in tf.range(n):
+        discounted_sum = rewards[i] + gamma * discounted_sum
+        discounted_sum.set_shape(discounted_sum_shape)
+        returns = returns.write(i, discounted_sum)
+    return returns.stack()[::-1]
+
+
+@tf.function
+def vectorized_returns(rewards: tf.Tensor, gamma: float) -> tf.Tensor:
+    '''Discounted returns of [B, T] rewards in a single matrix product.'''
+    return discounted_returns(rewards, gamma)
+
+
+@tf.function
+def vectorized_returns_with_dones(rewards: tf.Tensor, gamma: float, dones: tf.Tensor) -> tf.Tensor:
+    '''Discounted returns of [B, T] rewards split into episodes by dones.'''
+    return discounted_returns(rewards, gamma, dones)
+
+
+@tf.function
+def batched_advantages(rewards: tf.Tensor, values: tf.Tensor, gamma: float, dones: tf.Tensor) -> tf.Tensor:
+    '''Generalized Advantage Estimates of [B, T] rewards, as computed by BatchedActorCriticTrainer.'''
+    return generalized_advantage_estimates(rewards, values, gamma, 0.95, dones)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the loop and vectorized discounted returns.')
+    parser.add_argument('--length', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=32)
+    parser.add_argument('--number', type=int, default=100)
+    args = parser.parse_args()
+    gamma = tf.constant(0.99)
+    rewards = tf.random.normal([args.batch_size, args.length])
+    values = tf.random.normal([args.batch_size, args.length])
+    # One episode per row, ending at a random step like the padded episodes of the batched trainer
+    ends = tf.random.uniform([args.batch_size], 0, args.length, dtype=tf.int32)
+    dones = tf.one_hot(ends, args.length)
+    # Trace both functions before timing them
+    loop_returns(rewards[0], gamma)
+    vectorized_returns(rewards[:1], gamma)
+    vectorized_returns(rewards, gamma)
+    vectorized_returns_with_dones(rewards, gamma, dones)
+    batched_advantages(rewards, values, gamma, dones)
+    timings = {
+        'loop (1 episode)': timeit.timeit(lambda: loop_returns(rewards[0], gamma), number=args.number),
+        'vectorized (1 episode)': timeit.timeit(lambda: vectorized_returns(rewards[:1], gamma), number=args.number),
+        f'loop ({args.batch_size} episodes)': timeit.timeit(
+            lambda: [loop_returns(r, gamma) for r in rewards], number=args.number),
+        f'vectorized ({args.batch_size} episodes)': timeit.timeit(
+            lambda: vectorized_returns(rewards, gamma), number=args.number),
+        f'with dones ({args.batch_size} episodes)': timeit.timeit(
+            lambda: vectorized_returns_with_dones(rewards, gamma, dones), number=args.number),
+        f'GAE with dones ({args.batch_size} episodes)': timeit.timeit(
+            lambda: batched_advantages(rewards, values, gamma, dones), number=args.number),
+    }
+    print(f'T={args.length}')
+    for name, seconds in timings.items():
+        print(f'{name:>28}: {seconds/args.number*1e3:8.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+import sys
+sys.path.append('./')
+import os
+import time
+import argparse
+from ecosys.rollout import RolloutPool
+
+
+def benchmark(num_workers: int, envs_per_worker: int, duration: float, packed_obs: bool = False) -> float:
+    '''Return the env-steps/sec read from a pool of num_workers workers.'''
+    with RolloutPool(num_workers, envs_per_worker=envs_per_worker, seed=0, packed_obs=packed_obs) as pool:
+        # Wait for every worker to produce its first step
+        for worker_id in range(num_workers):
+            pool.release(worker_id, len(pool.get(worker_id).rewards))
+        n_steps = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < duration:
+            for worker_id in range(num_workers):
+                transitions = pool.get(worker_id, timeout=0.)
+                if transitions is not None:
+                    n_steps += transitions.rewards.size
+                    pool.release(worker_id, len(transitions.rewards))
+        return n_steps/(time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure rollout throughput against the number of workers.')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parser.add_argument('--envs-per-worker', type=int, default=8)
+    parser.add_argument('--duration', type=float, default=5.)
+    parser.add_argument('--packed-obs', action='store_true', help='store observations as packed bytes')
+    args = parser.parse_args()
+    num_workers = 1
+    baseline = None
+    print(f'{"workers":>8} {"steps/sec":>12} {"speedup":>8}')
+    while num_workers <= args.max_workers:
+        steps_per_sec = benchmark(num_workers, args.envs_per_worker, args.duration, args.packed_obs)
+        baseline = baseline or steps_per_sec
+        print(f'{num_workers:>8} {steps_per_sec:>12.0f} {steps_per_sec/baseline:>8.2f}')
+        num_workers *= 2
+
+
+if __name__ == '__main__':
+    main()
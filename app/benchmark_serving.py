@@ -0,0 +1,85 @@
+import sys
+sys.path.append('./')
+import json
+import time
+import argparse
+import threading
+import http.client
+import numpy as np
+import tensorflow as tf
+from ecosys.models import ActorCritic
+from ecosys.serving import InferenceServer, make_http_server
+
+
+def run_clients(act, n_clients: int, n_requests: int) -> tuple[float, np.ndarray]:
+    '''Call act from n_clients threads n_requests times each, returning the requests/sec and latencies.'''
+    rng = np.random.default_rng(0)
+    states = rng.integers(0, 2, size=(n_requests, 2, 4), dtype=np.int8)
+    latencies = np.zeros((n_clients, n_requests))
+
+    def client(i: int) -> None:
+        for j in range(n_requests):
+            start = time.perf_counter()
+            act(states[j])
+            latencies[i, j] = time.perf_counter() - start
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(n_clients)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return n_clients*n_requests/(time.perf_counter() - start), latencies.ravel()
+
+
+def http_act(port: int):
+    '''Return a function posting a state to the HTTP front end, with one connection per client thread.'''
+    local = threading.local()
+
+    def act(state: np.ndarray) -> int:
+        if not hasattr(local, 'connection'):
+            local.connection = http.client.HTTPConnection('127.0.0.1', port)
+        local.connection.request('POST', '/act', json.dumps({'state': state.tolist()}))
+        return json.loads(local.connection.getresponse().read())['action']
+    return act
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure the latency and throughput of the inference server.')
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 8, 64])
+    parser.add_argument('--requests', type=int, default=200, help='requests per client')
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait', type=float, default=0.001)
+    parser.add_argument('--http', action='store_true', help='send the requests through the HTTP front end')
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    model = ActorCritic(num_actions=4, num_hidden_units=64)
+    model(tf.zeros([1, 8], dtype=tf.int8))
+    # One model call per request, without batching
+    unbatched = tf.function(lambda state: model(state)[0])
+    print(f'{"mode":>10} {"clients":>8} {"req/sec":>10} {"p50 ms":>8} {"p99 ms":>8} {"batch":>6}')
+    for n_clients in args.clients:
+        throughput, latencies = run_clients(
+            lambda state: int(np.argmax(unbatched(tf.reshape(state, [1, 8])))), n_clients, args.requests)
+        p50, p99 = np.percentile(latencies, [50, 99])*1e3
+        print(f'{"unbatched":>10} {n_clients:>8} {throughput:>10.0f} {p50:>8.2f} {p99:>8.2f} {1:>6.1f}')
+        with InferenceServer(model, args.max_batch_size, args.max_wait) as server:
+            server.predict(np.zeros((2, 4)))
+            server.n_batches = server.n_states = 0
+            if args.http:
+                http_server = make_http_server(server, port=args.port)
+                threading.Thread(target=http_server.serve_forever, daemon=True).start()
+                act = http_act(args.port)
+            else:
+                act = server.predict
+            throughput, latencies = run_clients(act, n_clients, args.requests)
+            if args.http:
+                http_server.shutdown()
+                http_server.server_close()
+            p50, p99 = np.percentile(latencies, [50, 99])*1e3
+            mode = 'http' if args.http else 'batched'
+            batch = server.stats()['mean_batch_size']
+            print(f'{mode:>10} {n_clients:>8} {throughput:>10.0f} {p50:>8.2f} {p99:>8.2f} {batch:>6.1f}')
+
+
+if __name__ == '__main__':
+    main()
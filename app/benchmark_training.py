@@ -0,0 +1,66 @@
+import sys
+sys.path.append('./')
+import time
+import argparse
+import tensorflow as tf
+import keras
+from ecosys.environment import EcosysVectorEnv
+from ecosys.models import ActorCritic
+from ecosys.training import BatchedActorCriticTrainer, CompiledActorCriticTrainer, configure_performance
+
+
+N_HIDDEN = 64
+LEARNING_RATE = 0.01
+GAMMA = 0.99
+MAX_STEPS = 500
+
+# Name, trainer keyword arguments (None for the current path) and mixed precision policy of each configuration
+CONFIGS = (
+    ('tf.function', None, None),
+    ('padded', {'jit_compile': False}, None),
+    ('padded+xla', {'jit_compile': True}, None),
+    ('bucketed+xla', {'jit_compile': True, 'bucket_lengths': True}, None),
+    ('padded+xla+bf16', {'jit_compile': True}, 'mixed_bfloat16'),
+)
+
+
+def benchmark(num_envs: int, n_steps: int, kwargs, mixed_precision) -> tuple[float, float, int]:
+    '''Return the first step time, the mean time of the following n_steps training steps and the trace count.'''
+    keras.mixed_precision.set_global_policy(mixed_precision or 'float32')
+    tf.random.set_seed(0)
+    env = EcosysVectorEnv(num_envs=num_envs)
+    model = ActorCritic(4, N_HIDDEN)
+    optimizer = keras.optimizers.Adam(LEARNING_RATE)
+    if kwargs is None:
+        trainer = BatchedActorCriticTrainer(env, model, optimizer)
+    else:
+        trainer = CompiledActorCriticTrainer(env, model, optimizer, seed=0, **kwargs)
+    state, _ = env.reset(seed=0)
+    start = time.perf_counter()
+    trainer.train_step(tf.cast(state, tf.int8), GAMMA, MAX_STEPS).numpy()
+    first = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(n_steps):
+        state, _ = env.reset()
+        trainer.train_step(tf.cast(state, tf.int8), GAMMA, MAX_STEPS).numpy()
+    steady = (time.perf_counter() - start)/n_steps
+    traces = (trainer.train_step if kwargs is None else trainer.update).experimental_get_tracing_count()
+    return first, steady, traces
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the training step with XLA, padding and mixed precision.')
+    parser.add_argument('--num-envs', type=int, default=16)
+    parser.add_argument('--steps', type=int, default=50, help='number of timed training steps')
+    parser.add_argument('--intra-op-threads', type=int, default=None)
+    parser.add_argument('--inter-op-threads', type=int, default=None)
+    args = parser.parse_args()
+    configure_performance(args.intra_op_threads, args.inter_op_threads)
+    print(f'{"config":>16} {"first step s":>13} {"step ms":>9} {"episodes/s":>11} {"traces":>7}')
+    for name, kwargs, mixed_precision in CONFIGS:
+        first, steady, traces = benchmark(args.num_envs, args.steps, kwargs, mixed_precision)
+        print(f'{name:>16} {first:>13.2f} {1000*steady:>9.1f} {args.num_envs/steady:>11.1f} {traces:>7}')
+
+
+if __name__ == '__main__':
+    main()
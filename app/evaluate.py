@@ -0,0 +1,63 @@
+import sys
+sys.path.append('./')
+import argparse
+import numpy as np
+from ecosys.evaluation import compare, evaluate, summarize
+from ecosys.models import ActorCriticPolicy
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Evaluate a trained ActorCritic model on many seeded episodes.')
+    parser.add_argument(
+        '--model', type=str, default='./data/models/ActorCritic.npz',
+        help='weights exported by app/export.py, or a checkpoint written by app/train.py'
+    )
+    parser.add_argument(
+        '--baseline', type=str, default=None,
+        help='also evaluate these weights on the same episodes, and exit with a non-zero status unless '
+             '--model is significantly better'
+    )
+    parser.add_argument('--episodes', type=int, default=10000)
+    parser.add_argument('--num-envs', type=int, default=256, help='episodes played at once')
+    parser.add_argument('--seed', type=int, default=0, help='episode i starts from the layout seeded by seed + i')
+    parser.add_argument('--grid-dim', type=int, default=10)
+    parser.add_argument('--n-resources', type=int, default=20)
+    parser.add_argument('--max-steps', type=int, default=500)
+    parser.add_argument('--sample', action='store_true', help='sample actions from the policy instead of the most likely')
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--output', type=str, default=None, help='save the per-episode results to this .npz file')
+    return parser.parse_args()
+
+
+def print_estimates(title: str, estimates: dict) -> None:
+    print(f'{title:>16} {"mean":>10} {"low":>10} {"high":>10}')
+    for name, (mean, low, high) in estimates.items():
+        print(f'{name:>16} {mean:>10.3f} {low:>10.3f} {high:>10.3f}')
+
+
+def main():
+    args = parse_args()
+
+    def run(path: str):
+        policy = ActorCriticPolicy.load(path, greedy=not args.sample, seed=args.seed)
+        return evaluate(
+            policy, args.episodes, args.seed, args.num_envs, args.grid_dim, args.n_resources, args.max_steps)
+    results = run(args.model)
+    print_estimates(args.model if args.baseline is None else 'model', summarize(results, args.confidence))
+    if args.output is not None:
+        np.savez(args.output, **results._asdict())
+    if args.baseline is None:
+        return
+    baseline = run(args.baseline)
+    print_estimates('baseline', summarize(baseline, args.confidence))
+    difference = compare(baseline, results, args.confidence)
+    print_estimates('model - baseline', difference)
+    # Promote only if the return improvement is significant
+    if not difference['return'].low > 0:
+        print(f'{args.model} is not significantly better than {args.baseline}.')
+        sys.exit(1)
+    print(f'{args.model} is significantly better than {args.baseline}.')
+
+
+if __name__ == '__main__':
+    main()
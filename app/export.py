@@ -0,0 +1,18 @@
+import sys
+sys.path.append('./')
+import argparse
+import keras
+from ecosys.models import export_npz
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the weights of a trained ActorCritic model for NumPy inference.')
+    parser.add_argument('--model', type=str, default='./data/models/ActorCritic.model')
+    parser.add_argument('--output', type=str, default='./data/models/ActorCritic.npz')
+    args = parser.parse_args()
+    export_npz(keras.models.load_model(args.model), args.output)
+    print(f'Exported {args.model} to {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+import sys
+sys.path.append('./')
+import time
+import argparse
+import numpy as np
+import gym
+import ecosys  # noqa: F401
+from ecosys.environment import TraceReplayer
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Summarize the episodes of a trace, or replay one of them.')
+    parser.add_argument('trace', type=str, help='trace written by app/run.py --trace (ecosys.environment.RecordTrace)')
+    parser.add_argument(
+        '--episode', type=int, default=None,
+        help='replay this episode (negative counts from the last one) instead of summarizing the trace'
+    )
+    parser.add_argument(
+        '--record', type=str, default=None,
+        help='write the replayed episode to this .gif (or, with ffmpeg, video) file instead of opening a window'
+    )
+    return parser.parse_args()
+
+
+def summarize(replayer: TraceReplayer) -> None:
+    '''Print the length, return and step timings of every episode.'''
+    print(f'{"episode":>8} {"start":>19} {"steps":>6} {"return":>9} {"env p50":>10} {"env max":>10} {"agent p50":>10}')
+    for i, trace in enumerate(replayer.reader):
+        start = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(trace.start_time))
+        if len(trace.actions) > 0:
+            env_p50, env_max = np.median(trace.env_seconds), trace.env_seconds.max()
+            agent_p50 = np.median(trace.agent_seconds)
+        else:
+            env_p50 = env_max = agent_p50 = float('nan')
+        print(
+            f'{i:>8} {start:>19} {len(trace.actions):>6} {trace.rewards.sum():>9.2f} '
+            f'{1e6*env_p50:>8.1f}us {1e6*env_max:>8.1f}us {1e6*agent_p50:>8.1f}us'
+        )
+
+
+def main():
+    args = parse_args()
+    if args.episode is None:
+        with TraceReplayer(args.trace) as replayer:
+            summarize(replayer)
+        return
+    # Replay to a file, or on screen at the environment frame rate
+    env = gym.make('Ecosys-v0', render_mode=None if args.record else 'human').unwrapped
+    with TraceReplayer(args.trace, env) as replayer:
+        episode = args.episode % len(replayer)
+        if args.record is not None:
+            replayer.render(episode, args.record)
+        else:
+            for _ in replayer.replay(episode):
+                if not env.isopen:
+                    break
+
+
+if __name__ == '__main__':
+    main()
@@ -1,35 +1,48 @@
 import sys
 sys.path.append('./')
-import numpy
-import keras
+import argparse
 import gym
-import tensorflow as tf
-from ecosys.environment import EcosysEnv
+import ecosys  # noqa: F401
+from ecosys.environment.tracing import RecordTrace
+from ecosys.environment.video import RecordEpisodes
+from ecosys.models import ActorCriticPolicy
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Run the trained ActorCritic model on the Ecosys environment.')
+    parser.add_argument(
+        '--model', type=str, default='./data/models/ActorCritic.npz',
+        help='weights exported by app/export.py (written by app/train.py)'
+    )
+    parser.add_argument(
+        '--record', type=str, default=None,
+        help='write the episode to this .gif (or, with ffmpeg, video) file instead of opening a window'
+    )
+    parser.add_argument(
+        '--trace', type=str, default=None,
+        help='append the episode (seed, actions and step timings) to this trace, replayed by app/replay.py'
+    )
+    return parser.parse_args()
 
 
 def main():
+    args = parse_args()
     # Create environment and reset its state
-    env = gym.make('Ecosys-v0', render_mode='human')
+    if args.record is None:
+        env = gym.make('Ecosys-v0', render_mode='human')
+    else:
+        env = RecordEpisodes(gym.make('Ecosys-v0'), args.record)
+    if args.trace is not None:
+        env = RecordTrace(env, args.trace)
     state, _ = env.reset()
-    env.render()
-    # Load ML model
-    model = keras.models.load_model('./data/models/ActorCritic.model')
+    # Load the policy, a NumPy forward pass of the ML model
+    policy = ActorCriticPolicy.load(args.model)
     terminated = False
-    while not terminated:
-        # Convert state to Tensor
-        state = tf.constant(state, dtype=tf.int8)
-        # Flatten state Tensor
-        state = tf.reshape(state, [tf.size(state)])
-        # Add batch dimension for compatibility
-        state = tf.expand_dims(state, 0)
-        # Determine action probabilities
-        action_probs, _ = model(state)
-        # Take action with highest probability
-        action = numpy.argmax(numpy.squeeze(action_probs))
+    while not terminated and env.unwrapped.isopen:
+        # Take action with highest probability, adding the batch dimension
+        action = int(policy(state[None])[0])
         # Take next environment step
         state, _, terminated, _, _ = env.step(action)
-        # Render environment
-        env.render()
     # Close the environment
     env.close()
 
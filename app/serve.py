@@ -0,0 +1,28 @@
+import sys
+sys.path.append('./')
+import argparse
+from ecosys.serving import InferenceServer, load_model, make_http_server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Serve the actions of a trained ActorCritic model over HTTP.')
+    parser.add_argument('--model', type=str, default='./data/models/ActorCritic.model')
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--max-batch-size', type=int, default=64)
+    parser.add_argument('--max-wait', type=float, default=0.001, help='seconds a request may wait for a batch to fill')
+    parser.add_argument('--sample', action='store_true', help='sample actions from the policy instead of taking the best')
+    args = parser.parse_args()
+    model = load_model(args.model)
+    with InferenceServer(model, args.max_batch_size, args.max_wait, greedy=not args.sample) as server:
+        http_server = make_http_server(server, args.host, args.port)
+        print(f'Serving {args.model} on http://{args.host}:{args.port}/act')
+        try:
+            http_server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        http_server.server_close()
+
+
+if __name__ == '__main__':
+    main()
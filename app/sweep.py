@@ -0,0 +1,80 @@
+import sys
+sys.path.append('./')
+import argparse
+from ecosys.sweep import DEFAULT_CONFIG, MedianStopping, SweepRunner, Uniform, grid_search, random_search
+
+
+# Settings that can be swept, with the type of their values
+SETTINGS = {
+    'hidden_units': int,
+    'learning_rate': float,
+    'gamma': float,
+    'max_steps': int,
+    'reward_threshold': float,
+    'grid_dim': int,
+    'n_resources': int,
+    'num_envs': int,
+    'max_episodes': int,
+}
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Train ActorCritic models over a grid or random search of settings.')
+    for name, value_type in SETTINGS.items():
+        parser.add_argument(
+            f'--{name.replace("_", "-")}', type=value_type, nargs='+', default=[DEFAULT_CONFIG[name]],
+            help=f'values of {name} to sweep (default: {DEFAULT_CONFIG[name]})'
+        )
+    parser.add_argument(
+        '--random', type=int, default=None,
+        help='draw this many random configurations instead of the full grid; learning rates are then '
+             'drawn log-uniformly between the smallest and largest value given'
+    )
+    parser.add_argument('--seed', type=int, default=0, help='seed of the random search and of the runs')
+    parser.add_argument('--workers', type=int, default=None, help='runs in parallel (default: CPUs // --cpus-per-run)')
+    parser.add_argument('--cpus-per-run', type=int, default=1, help='CPUs each run is pinned to')
+    parser.add_argument('--threads-per-run', type=int, default=1, help='threads of the numerical libraries per run')
+    parser.add_argument('--report-every', type=int, default=100, help='episodes between progress reports')
+    parser.add_argument('--grace-episodes', type=int, default=2000, help='episodes before a run can be stopped')
+    parser.add_argument(
+        '--stop-margin', type=float, default=10.,
+        help='stop runs whose running reward is this much below the median of the other runs'
+    )
+    parser.add_argument('--output', type=str, default='sweep_results.csv', help='CSV file the results are streamed to')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    space = {name: getattr(args, name) for name in SETTINGS}
+    if args.random is None:
+        configs = grid_search(space)
+    else:
+        if len(space['learning_rate']) > 1:
+            space['learning_rate'] = Uniform(min(space['learning_rate']), max(space['learning_rate']), log=True)
+        configs = random_search(space, args.random, args.seed)
+    for config in configs:
+        config['seed'] = args.seed
+    runner = SweepRunner(
+        configs,
+        max_workers=args.workers,
+        cpus_per_run=args.cpus_per_run,
+        threads_per_run=args.threads_per_run,
+        report_every=args.report_every,
+        stopper=MedianStopping(args.grace_episodes, margin=args.stop_margin),
+        results_path=args.output
+    )
+    print(f'Running {len(configs)} configurations on {runner.max_workers} workers, streaming results to {args.output}')
+    results = runner.run()
+    # Print the final results, best first
+    swept = [name for name in SETTINGS if len({str(config[name]) for config in configs}) > 1]
+    print(f'{"run":>4} {"status":>10} {"episodes":>9} {"reward":>8} ' + ' '.join(f'{name:>14}' for name in swept))
+    for row in sorted(results, key=lambda row: -row['running_reward'] if row['status'] != 'failed' else float('inf')):
+        print(
+            f'{row["run_id"]:>4} {row["status"]:>10} {row["episode"]:>9} {row["running_reward"]:>8.1f} '
+            + ' '.join(f'{row[name]:>14.4g}' for name in swept)
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,6 @@
 import sys
 sys.path.append('./')
+import argparse
 import tensorflow as tf
 import keras
 import collections
@@ -7,8 +8,13 @@ import statistics
 import tqdm
 import gym
 from ecosys.environment import EcosysEnv
-from ecosys.models import ActorCritic
-from ecosys.training import ActorCriticTrainer
+from ecosys.models import ActorCritic, ConvActorCritic, export_npz
+from ecosys.rollout import TrajectoryStore
+from ecosys.profiling import Profiler, CSVSink, JSONLSink, TensorBoardSink, format_breakdown
+from ecosys.training import (
+    ActorCriticTrainer, BatchedActorCriticTrainer, TFActorCriticTrainer, CompiledActorCriticTrainer, CheckpointManager,
+    Curriculum, ImpalaTrainer, configure_performance
+)
 
 
 # Model
@@ -20,38 +26,314 @@ MAX_EPISODES = 30000
 MAX_STEPS = 500
 GAMMA = 0.99
 REWARD_THRESHOLD = 270
+# Checkpoints
+CHECKPOINT_DIR = './data/checkpoints'
+# Grid dimension and number of resources of the first curriculum stage
+CURRICULUM_START = (10, 20)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Train an ActorCritic model on the Ecosys environment.')
+    parser.add_argument(
+        '--num-envs', type=int, default=1,
+        help='number of episodes collected per training step; values above 1 use EcosysVector-v0'
+    )
+    parser.add_argument(
+        '--impala-actors', type=int, default=0,
+        help='train asynchronously with this many actor threads, each stepping --num-envs environments, and V-trace'
+    )
+    parser.add_argument(
+        '--gae-lambda', type=float, default=None,
+        help='use Generalized Advantage Estimation with this lambda instead of Monte Carlo returns'
+    )
+    parser.add_argument(
+        '--packed-obs', action='store_true',
+        help='step environments returning packed uint8 observations, expanded inside the training graph'
+    )
+    parser.add_argument(
+        '--patch-size', type=int, default=None,
+        help='observe the (odd) k x k egocentric patch around the herbivore and train a ConvActorCritic'
+    )
+    parser.add_argument(
+        '--curriculum-stages', type=int, default=0,
+        help='grow the grid from 10x10 with 20 resources to --final-grid-dim and --final-n-resources in this many '
+             'stages, moving on when the running reward of a stage nears its maximum (0 disables the curriculum)'
+    )
+    parser.add_argument('--final-grid-dim', type=int, default=40, help='grid dimension of the last curriculum stage')
+    parser.add_argument('--final-n-resources', type=int, default=80, help='resources of the last curriculum stage')
+    parser.add_argument(
+        '--curriculum-replay', type=float, default=0.2,
+        help='fraction of the sub-environments replaying earlier curriculum stages (with --num-envs above 1)'
+    )
+    parser.add_argument(
+        '--tf-env', action='store_true',
+        help='run the episodes inside the TensorFlow graph with TFEcosysEnv'
+    )
+    parser.add_argument(
+        '--jit-compile', action='store_true',
+        help='XLA compile the training step; without --tf-env, episodes are collected with a NumPy copy of the model '
+             'and padded to a fixed length, so that the learning step is compiled once'
+    )
+    parser.add_argument(
+        '--bucket-lengths', action='store_true',
+        help='with --jit-compile and without --tf-env, pad episodes to the next power of two instead of the maximum length'
+    )
+    parser.add_argument(
+        '--bfloat16', action='store_true',
+        help='compute the model in bfloat16 with float32 weights (mixed precision)'
+    )
+    parser.add_argument(
+        '--intra-op-threads', type=int, default=None,
+        help='threads a single TensorFlow op can use (default: one per core)'
+    )
+    parser.add_argument(
+        '--inter-op-threads', type=int, default=None,
+        help='TensorFlow ops run concurrently (default: one per core)'
+    )
+    parser.add_argument(
+        '--profile-every', type=int, default=0,
+        help='print the time spent in each phase of training every this many episodes (0 disables profiling)'
+    )
+    parser.add_argument(
+        '--profile-log', type=str, default=None,
+        help='also write the phase timings to this .csv or .jsonl file'
+    )
+    parser.add_argument(
+        '--profile-tensorboard', type=str, default=None,
+        help='also write the phase timings as TensorBoard scalars to this log directory'
+    )
+    parser.add_argument(
+        '--store', type=str, default=None,
+        help='append the collected episodes to the trajectory store in this directory'
+    )
+    parser.add_argument(
+        '--checkpoint-every', type=int, default=0,
+        help='save a checkpoint every this many episodes (0, the default, disables checkpoints)'
+    )
+    parser.add_argument(
+        '--keep-checkpoints', type=int, default=5,
+        help='number of most recent checkpoints kept on disk'
+    )
+    parser.add_argument(
+        '--checkpoint-dir', type=str, default=CHECKPOINT_DIR,
+        help='directory the checkpoints are written to'
+    )
+    parser.add_argument(
+        '--resume', action='store_true',
+        help='resume training from the latest checkpoint'
+    )
+    args = parser.parse_args()
+    if args.patch_size is not None and (args.tf_env or args.packed_obs or args.store is not None):
+        parser.error('--patch-size cannot be combined with --tf-env, --packed-obs or --store')
+    if args.impala_actors > 0 and (args.tf_env or args.packed_obs or args.patch_size is not None or args.store is not None
+                                   or args.profile_every > 0 or args.curriculum_stages > 0):
+        parser.error('--impala-actors cannot be combined with --tf-env, --packed-obs, --patch-size, --store, '
+                     '--profile-every or --curriculum-stages')
+    if args.jit_compile and not args.tf_env and (args.packed_obs or args.patch_size is not None or args.store is not None
+                                                 or args.profile_every > 0):
+        parser.error('--jit-compile without --tf-env cannot be combined with --packed-obs, --patch-size, --store '
+                     'or --profile-every')
+    if args.bfloat16 and not (args.jit_compile and not args.tf_env or args.impala_actors > 0):
+        parser.error('--bfloat16 requires --jit-compile without --tf-env, or --impala-actors')
+    if args.curriculum_stages > 0 and args.tf_env:
+        parser.error('--curriculum-stages cannot be combined with --tf-env')
+    if args.tf_env and args.num_envs > 1:
+        parser.error('--tf-env runs a single environment and cannot be combined with --num-envs above 1')
+    return args
+
+
+def make_profiler(args: argparse.Namespace) -> Profiler:
+    '''Create the profiler writing to the sinks requested on the command line.'''
+    sinks = []
+    if args.profile_log is not None:
+        sinks.append(CSVSink(args.profile_log) if args.profile_log.endswith('.csv') else JSONLSink(args.profile_log))
+    if args.profile_tensorboard is not None:
+        sinks.append(TensorBoardSink(args.profile_tensorboard))
+    return Profiler(sinks)
+
+
+def train_impala(args: argparse.Namespace) -> None:
+    '''Train with actor threads collecting episodes while the learner applies V-trace gradient steps.'''
+    model = ActorCritic(num_actions=4, num_hidden_units=N_HIDDEN)
+    optimizer = keras.optimizers.Adam(learning_rate=LEARNING_RATE)
+    trainer = ImpalaTrainer(
+        lambda: gym.make('EcosysVector-v0', num_envs=args.num_envs).unwrapped,
+        model, optimizer, num_actors=args.impala_actors, gamma=GAMMA
+    )
+    checkpoints = None
+    if args.checkpoint_every > 0 or args.resume:
+        checkpoints = CheckpointManager(args.checkpoint_dir, args.keep_checkpoints)
+    episodes_reward: collections.deque = collections.deque(maxlen=MAX_EPISODES)
+    running_reward, i = 0., 0
+    if args.resume:
+        # Build the model restored from the checkpoint, the actors start from fresh environments
+        model(tf.zeros([1, 2 * 4]))
+        restored = checkpoints.restore(model, optimizer)
+        if restored is not None:
+            i, state = restored
+            episodes_reward.extend(state['episodes_reward'])
+            print(f'Resuming from episode {i}')
+    with trainer, tqdm.tqdm(initial=i, total=MAX_EPISODES) as t:
+        while i < MAX_EPISODES:
+            episode_rewards = trainer.train_step()
+            if not episode_rewards:
+                continue
+            episodes_reward.extend(episode_rewards)
+            running_reward = statistics.mean(episodes_reward)
+            t.update(len(episode_rewards))
+            t.set_postfix(
+                episode_reward=episode_rewards[-1], running_reward=running_reward, policy_lag=trainer.policy_lag)
+            if checkpoints is not None and args.checkpoint_every > 0 and (
+                    (i + len(episode_rewards)) // args.checkpoint_every > i // args.checkpoint_every):
+                checkpoints.save(i + len(episode_rewards), model, optimizer, {
+                    'episodes_reward': list(episodes_reward),
+                })
+            i += len(episode_rewards)
+            if running_reward > REWARD_THRESHOLD and i >= MIN_EPISODES:
+                break
+    if checkpoints is not None:
+        checkpoints.close()
+    print(f'\nSolved at episode {i}: average reward: {running_reward:.2f}!')
+    # Compile and save model
+    model.compile()
+    model.save('./data/models/ActorCritic.model')
+    # Export the weights for TensorFlow-free inference
+    export_npz(model, './data/models/ActorCritic.npz')
 
 
 def main():
+    args = parse_args()
+    # Thread pools and mixed precision, set before TensorFlow runs any op
+    configure_performance(args.intra_op_threads, args.inter_op_threads, 'mixed_bfloat16' if args.bfloat16 else None)
+    if args.impala_actors > 0:
+        train_impala(args)
+        return
     # Create environment
-    env = gym.make('Ecosys-v0')
+    if args.tf_env:
+        from ecosys.environment.tf_ecosys_env import TFEcosysEnv
+        env = TFEcosysEnv()
+        action_space = env.action_space
+    elif args.num_envs > 1 or args.jit_compile:
+        env = gym.make(
+            'EcosysVector-v0', num_envs=args.num_envs, packed_obs=args.packed_obs, patch_size=args.patch_size)
+        action_space = env.single_action_space
+    else:
+        env = gym.make('Ecosys-v0', packed_obs=args.packed_obs, patch_size=args.patch_size)
+        action_space = env.action_space
     # Initialize ML model
-    model = ActorCritic(
-        num_actions=env.action_space.n,
-        num_hidden_units=N_HIDDEN
-    )
+    if args.patch_size is not None:
+        model = ConvActorCritic(
+            num_actions=action_space.n,
+            num_hidden_units=N_HIDDEN,
+            patch_size=args.patch_size
+        )
+        obs_size = args.patch_size * args.patch_size * 2
+    else:
+        model = ActorCritic(
+            num_actions=action_space.n,
+            num_hidden_units=N_HIDDEN
+        )
+        obs_size = 2 * 4
+    # Instrument the environment
+    profiler = None
+    if args.profile_every > 0:
+        profiler = make_profiler(args)
+        if not args.tf_env:
+            methods = ('step', '_get_obs', '_get_rw') if args.num_envs == 1 else ('step_wait', '_get_obs')
+            profiler.instrument(env.unwrapped, *methods)
+    # Open the trajectory store
+    store = TrajectoryStore(args.store) if args.store is not None else None
     # Initialize the Trainer
     optimizer = keras.optimizers.Adam(learning_rate=LEARNING_RATE)
-    trainer = ActorCriticTrainer(env, model, optimizer)
-    # Episode loop
+    if args.tf_env:
+        trainer = TFActorCriticTrainer(env, model, optimizer, args.gae_lambda, args.jit_compile, profiler, store)
+    elif args.jit_compile:
+        trainer = CompiledActorCriticTrainer(
+            env, model, optimizer, args.gae_lambda, jit_compile=True, bucket_lengths=args.bucket_lengths)
+    elif args.num_envs > 1:
+        trainer = BatchedActorCriticTrainer(env, model, optimizer, args.gae_lambda, profiler, store)
+    else:
+        trainer = ActorCriticTrainer(env, model, optimizer, args.gae_lambda, profiler, store)
+    if profiler is not None and not args.tf_env:
+        # Time spent in the Python side of the numpy_function bridge
+        profiler.instrument(trainer, 'env_step')
+    # Environment parameters growing with the running reward
+    curriculum = None
+    if args.curriculum_stages > 0:
+        curriculum = Curriculum.linear(
+            CURRICULUM_START, (args.final_grid_dim, args.final_n_resources), args.curriculum_stages,
+            replay=args.curriculum_replay, seed=0
+        )
+    # Resume from the latest checkpoint
     episodes_reward: collections.deque = collections.deque(maxlen=MAX_EPISODES)
     running_rewards: collections.deque = collections.deque(maxlen=MAX_EPISODES)
-    t = tqdm.trange(MAX_EPISODES)
+    start = 0
+    checkpoints = None
+    if args.checkpoint_every > 0 or args.resume:
+        checkpoints = CheckpointManager(args.checkpoint_dir, args.keep_checkpoints)
+    if args.resume:
+        # Build the model and draw the environment generator, both restored from the checkpoint
+        env.reset()
+        model(tf.zeros([1, obs_size]))
+        restored = checkpoints.restore(model, optimizer)
+        if restored is not None:
+            start, state = restored
+            episodes_reward.extend(state['episodes_reward'])
+            running_rewards.extend(state['running_rewards'])
+            env.unwrapped.np_random.bit_generator.state = state['env_rng']
+            if curriculum is not None and 'curriculum' in state:
+                curriculum.load_state_dict(state['curriculum'])
+            print(f'Resuming from episode {start}')
+    # Episode loop
+    t = tqdm.trange(start, MAX_EPISODES, args.num_envs)
     for i in t:
-        initial_state, _ = env.reset()
-        initial_state = tf.constant(initial_state, dtype=tf.int8)
-        episode_reward = float(trainer.train_step(initial_state, GAMMA, MAX_STEPS))
-        episodes_reward.append(episode_reward)
+        options = None if curriculum is None else curriculum.options(args.num_envs if args.num_envs > 1 else None)
+        initial_state, _ = env.reset(options=options)
+        # Packed observations are expanded by the trainer
+        initial_state = tf.constant(initial_state) if args.packed_obs else tf.cast(initial_state, tf.int8)
+        episode_rewards = trainer.train_step(initial_state, GAMMA, MAX_STEPS).numpy().reshape(-1).tolist()
+        episodes_reward.extend(episode_rewards)
+        if profiler is not None:
+            profiler.count('episodes', len(episode_rewards))
+            if (i + len(episode_rewards)) // args.profile_every > i // args.profile_every:
+                t.write(format_breakdown(profiler.flush(i + len(episode_rewards))))
+        episode_reward = episode_rewards[-1]
         running_reward = statistics.mean(episodes_reward)
         running_rewards.append(running_reward)
-        t.set_postfix(
-            episode_reward=episode_reward, running_reward=running_reward)
-        if running_reward > REWARD_THRESHOLD and i >= MIN_EPISODES:
+        if curriculum is not None:
+            if curriculum.update(episode_rewards):
+                t.write(f'Curriculum stage {curriculum.stage}: {curriculum.current}')
+            t.set_postfix(
+                episode_reward=episode_reward, stage=curriculum.stage, stage_reward=curriculum.running_reward)
+        else:
+            t.set_postfix(
+                episode_reward=episode_reward, running_reward=running_reward)
+        if checkpoints is not None and args.checkpoint_every > 0 and (
+                (i + len(episode_rewards)) // args.checkpoint_every > i // args.checkpoint_every):
+            checkpoints.save(i + len(episode_rewards), model, optimizer, {
+                'episodes_reward': list(episodes_reward),
+                'running_rewards': list(running_rewards),
+                'env_rng': env.unwrapped.np_random.bit_generator.state,
+                **({} if curriculum is None else {'curriculum': curriculum.state_dict()}),
+            })
+        if curriculum is not None:
+            if curriculum.finished:
+                break
+        elif running_reward > REWARD_THRESHOLD and i >= MIN_EPISODES:
             break
+    if checkpoints is not None:
+        checkpoints.close()
+    if profiler is not None:
+        profiler.close()
+    if store is not None:
+        store.close()
     print(f'\nSolved at episode {i}: average reward: {running_reward:.2f}!')
     # Compile and save model
     model.compile()
-    model.save('./data/models/ActorCritic.model')
+    model.save(f'./data/models/{type(model).__name__}.model')
+    # Export the weights for TensorFlow-free inference, which only supports the dense model
+    if args.patch_size is None:
+        export_npz(model, './data/models/ActorCritic.npz')
 
 
 if __name__ == '__main__':
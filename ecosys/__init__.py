@@ -1,4 +1,5 @@
 from gym.envs.registration import register
+from ecosys._lazy import lazy_attributes
 
 
 register(
@@ -6,3 +7,21 @@ register(
     entry_point='ecosys.environment:EcosysEnv',
     max_episode_steps=500
 )
+
+register(
+    id='EcosysVector-v0',
+    entry_point='ecosys.environment:EcosysVectorEnv',
+    disable_env_checker=True
+)
+
+register(
+    id='EcosysMultiAgent-v0',
+    entry_point='ecosys.environment:EcosysMultiAgentEnv',
+    disable_env_checker=True
+)
+
+# Subpackages are imported on first access, so that using the environments does not load TensorFlow
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    name: f'{__name__}.{name}'
+    for name in ['benchmarks', 'environment', 'evaluation', 'models', 'profiling', 'rollout', 'serving', 'sweep', 'training']
+})
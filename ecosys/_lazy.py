@@ -0,0 +1,23 @@
+import sys
+import importlib
+
+
+def lazy_attributes(package: str, attributes: dict[str, str]):
+    '''
+    Return the __getattr__ and __dir__ of a package whose attributes are imported on first access.
+
+    attributes maps each attribute name to the module defining it; a name mapped to itself
+    (e.g. 'ecosys.training') is the submodule of that name. Once imported, the attribute is
+    set on the package so that later accesses are plain lookups.
+    '''
+    def __getattr__(name: str):
+        if name not in attributes:
+            raise AttributeError(f'module {package!r} has no attribute {name!r}')
+        module = importlib.import_module(attributes[name])
+        value = module if attributes[name] == f'{package}.{name}' else getattr(module, name)
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(sys.modules[package].__dict__) | set(attributes))
+    return __getattr__, __dir__
@@ -0,0 +1,2 @@
+from ecosys.benchmarks.suite import bench_env, bench_import, bench_training, run_suite
+from ecosys.benchmarks.report import METRICS, Regression, compare, load_results, save_results
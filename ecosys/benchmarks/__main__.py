@@ -0,0 +1,63 @@
+import sys
+import argparse
+from ecosys.benchmarks.suite import bench_import, run_suite
+from ecosys.benchmarks.report import METRICS, compare, load_results, save_results
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='python -m ecosys.benchmarks',
+        description='Benchmark the Ecosys environment and training throughput.'
+    )
+    parser.add_argument('--grid-dims', type=int, nargs='+', default=[10, 20, 40, 300])
+    parser.add_argument('--n-resources', type=int, nargs='+', default=[5, 20, 80])
+    parser.add_argument('--steps', type=int, default=10000, help='number of timed environment steps')
+    parser.add_argument('--resets', type=int, default=1000, help='number of timed resets and observations')
+    parser.add_argument('--episodes', type=int, default=20, help='number of timed training episodes')
+    parser.add_argument('--no-training', action='store_true', help='skip the training benchmark')
+    parser.add_argument(
+        '--imports', type=str, nargs='*', default=['ecosys', 'ecosys.environment'],
+        help='modules whose import time is measured'
+    )
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=str, default=None, help='write the results to this JSON file')
+    parser.add_argument('--baseline', type=str, default=None, help='compare against the results in this JSON file')
+    parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help='relative change beyond which a metric counts as a regression'
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    results = run_suite(
+        args.grid_dims,
+        args.n_resources,
+        n_steps=args.steps,
+        n_resets=args.resets,
+        n_episodes=None if args.no_training else args.episodes,
+        seed=args.seed
+    )
+    for module in args.imports:
+        results[f'import={module}'] = bench_import(module)
+    # Print the results table
+    metrics = [metric for metric in METRICS if any(metric in values for values in results.values())]
+    print(f'{"config":>28} ' + ' '.join(f'{metric:>16}' for metric in metrics))
+    for config, values in results.items():
+        print(f'{config:>28} ' + ' '.join(
+            f'{values[metric]:>16.1f}' if metric in values else f'{"-":>16}' for metric in metrics))
+    if args.output is not None:
+        save_results(results, args.output)
+    # Compare against the baseline
+    if args.baseline is not None:
+        regressions = compare(results, load_results(args.baseline), args.threshold)
+        for r in regressions:
+            print(f'REGRESSION {r.config} {r.metric}: {r.baseline:.1f} -> {r.value:.1f} ({r.change:+.1%})')
+        if regressions:
+            sys.exit(1)
+        print(f'No regression beyond {args.threshold:.0%} of the baseline.')
+
+
+if __name__ == '__main__':
+    main()
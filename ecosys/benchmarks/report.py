@@ -0,0 +1,70 @@
+import json
+import platform
+from typing import NamedTuple
+
+
+# Direction of improvement of each metric: +1 if higher is better, -1 if lower is better
+METRICS = {
+    'steps_per_sec': 1,
+    'step_p50_us': -1,
+    'step_p99_us': -1,
+    'resets_per_sec': 1,
+    'obs_per_sec': 1,
+    'eat_p50_us': -1,
+    'episodes_per_sec': 1,
+    'import_ms': -1,
+    'modules_loaded': -1,
+}
+
+
+class Regression(NamedTuple):
+    '''Metric of a configuration that got worse than the baseline by more than the threshold.'''
+    config: str
+    metric: str
+    baseline: float
+    value: float
+    change: float
+
+
+def save_results(results: dict, path: str) -> None:
+    '''Write the results of run_suite to a JSON file, along with the machine they ran on.'''
+    document = {
+        'machine': {
+            'python': platform.python_version(),
+            'processor': platform.processor(),
+            'platform': platform.platform(),
+        },
+        'results': results,
+    }
+    with open(path, 'w') as f:
+        json.dump(document, f, indent=2, sort_keys=True)
+
+
+def load_results(path: str) -> dict:
+    '''Read the results saved with save_results.'''
+    with open(path) as f:
+        return json.load(f)['results']
+
+
+def compare(
+    results: dict,
+    baseline: dict,
+    threshold: float = 0.1
+) -> list[Regression]:
+    '''
+    Return the metrics of results that are worse than baseline by more than threshold.
+
+    The change is relative to the baseline and signed so that negative values are
+    regressions, e.g. -0.2 for 20% fewer steps/sec or a 20% higher latency. Only the
+    configurations and metrics present in both are compared.
+    '''
+    regressions = []
+    for config, metrics in results.items():
+        for metric, value in metrics.items():
+            reference = baseline.get(config, {}).get(metric)
+            if reference is None or metric not in METRICS or reference == 0:
+                continue
+            change = METRICS[metric]*(value - reference)/reference
+            if change < -threshold:
+                regressions.append(Regression(config, metric, reference, value, change))
+    return regressions
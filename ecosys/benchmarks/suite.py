@@ -0,0 +1,142 @@
+import sys
+import json
+import time
+import subprocess
+import numpy
+from typing import Optional
+from ecosys.environment import EcosysEnv
+
+
+def _percentile_us(durations: list[int], q: float) -> float:
+    '''Return the q-th percentile of durations given in nanoseconds, in microseconds.'''
+    return float(numpy.percentile(durations, q))*1e-3
+
+
+def bench_env(
+    grid_dim: int,
+    n_resources: int,
+    n_steps: int = 10000,
+    n_resets: int = 1000,
+    seed: int = 0
+) -> dict:
+    '''
+    Measure EcosysEnv on one grid configuration.
+
+    Steps are taken with uniformly random actions and timed one by one; the resets needed
+    when an episode ends are not part of the step timings. Eating is timed separately, on
+    every resource of a fresh layout, since random steps rarely reach one on large grids.
+    '''
+    rng = numpy.random.default_rng(seed)
+    env = EcosysEnv()
+    options = {'grid_dim': grid_dim, 'n_resources': n_resources}
+    # Reset throughput, including the generation of the entities
+    env.reset(seed=seed, options=options)
+    start = time.perf_counter()
+    for _ in range(n_resets):
+        env.reset()
+    resets_per_sec = n_resets/(time.perf_counter() - start)
+    # Observation throughput
+    start = time.perf_counter()
+    for _ in range(n_resets):
+        env._get_obs()
+    obs_per_sec = n_resets/(time.perf_counter() - start)
+    # Step latency
+    actions = rng.integers(0, 4, size=n_steps).tolist()
+    durations = []
+    env.reset()
+    for action in actions:
+        start = time.perf_counter_ns()
+        _, _, terminated, truncated, _ = env.step(action)
+        durations.append(time.perf_counter_ns() - start)
+        if terminated or truncated:
+            env.reset()
+    # Eat latency
+    env.reset()
+    eat_durations = []
+    for idx in range(1, n_resources + 1):
+        start = time.perf_counter_ns()
+        env._eat(idx)
+        eat_durations.append(time.perf_counter_ns() - start)
+    return {
+        'steps_per_sec': 1e9*len(durations)/sum(durations),
+        'step_p50_us': _percentile_us(durations, 50),
+        'step_p99_us': _percentile_us(durations, 99),
+        'resets_per_sec': resets_per_sec,
+        'obs_per_sec': obs_per_sec,
+        'eat_p50_us': _percentile_us(eat_durations, 50),
+    }
+
+
+def bench_training(
+    grid_dim: int,
+    n_resources: int,
+    n_episodes: int = 20,
+    max_steps: int = 500,
+    seed: int = 0
+) -> dict:
+    '''Measure the episodes/sec of ActorCriticTrainer.train_step on one grid configuration.'''
+    # Imported here so that environment benchmarks run without TensorFlow
+    import tensorflow as tf
+    import keras
+    from ecosys.models import ActorCritic
+    from ecosys.training import ActorCriticTrainer
+    tf.random.set_seed(seed)
+    env = EcosysEnv()
+    model = ActorCritic(num_actions=env.action_space.n, num_hidden_units=64)
+    trainer = ActorCriticTrainer(env, model, keras.optimizers.Adam(learning_rate=0.01))
+    options = {'grid_dim': grid_dim, 'n_resources': n_resources}
+    state, _ = env.reset(seed=seed, options=options)
+    # Trace the training step before timing it
+    trainer.train_step(tf.constant(state, dtype=tf.int8), 0.99, max_steps)
+    start = time.perf_counter()
+    for _ in range(n_episodes):
+        state, _ = env.reset()
+        trainer.train_step(tf.constant(state, dtype=tf.int8), 0.99, max_steps)
+    elapsed = time.perf_counter() - start
+    return {
+        'episodes_per_sec': n_episodes/elapsed,
+    }
+
+
+def bench_import(module: str, repeats: int = 3) -> dict:
+    '''Measure the time to import module in a fresh interpreter (best of repeats), and the number of modules it loads.'''
+    code = (
+        'import sys, time, json; n = len(sys.modules); start = time.perf_counter(); '
+        f'import {module}; '
+        'print(json.dumps([time.perf_counter() - start, len(sys.modules) - n]))'
+    )
+    runs = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(output.splitlines()[-1]))
+    return {
+        'import_ms': 1e3*min(seconds for seconds, _ in runs),
+        'modules_loaded': runs[0][1],
+    }
+
+
+def run_suite(
+    grid_dims: list[int],
+    n_resources: list[int],
+    n_steps: int = 10000,
+    n_resets: int = 1000,
+    n_episodes: Optional[int] = 20,
+    seed: int = 0
+) -> dict:
+    '''
+    Run the benchmarks over the grid_dims x n_resources matrix.
+
+    Returns a dict mapping each configuration key (e.g. 'grid_dim=10,n_resources=20') to its
+    metrics. Configurations with more entities than cells are skipped, and training is not
+    benchmarked if n_episodes is None.
+    '''
+    results = {}
+    for grid_dim in grid_dims:
+        for n in n_resources:
+            if n + 1 > grid_dim*grid_dim:
+                continue
+            metrics = bench_env(grid_dim, n, n_steps, n_resets, seed)
+            if n_episodes is not None:
+                metrics.update(bench_training(grid_dim, n, n_episodes, seed=seed))
+            results[f'grid_dim={grid_dim},n_resources={n}'] = metrics
+    return results
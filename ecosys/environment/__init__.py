@@ -1 +1,15 @@
+from ecosys._lazy import lazy_attributes
 from ecosys.environment.ecosys_env import EcosysEnv
+from ecosys.environment.ecosys_vector_env import EcosysVectorEnv
+from ecosys.environment.layouts import LayoutCache
+from ecosys.environment.multi_agent_env import EcosysMultiAgentEnv
+
+
+# TFEcosysEnv needs TensorFlow and the recorders are only used for evaluation and debugging, import them on first access
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'TFEcosysEnv': 'ecosys.environment.tf_ecosys_env',
+    'RecordEpisodes': 'ecosys.environment.video',
+    'RecordTrace': 'ecosys.environment.tracing',
+    'TraceReader': 'ecosys.environment.tracing',
+    'TraceReplayer': 'ecosys.environment.tracing',
+})
@@ -1,10 +1,14 @@
-import sys
 import numpy
-import random
 from typing import Optional
 import gym
 from gym.error import DependencyNotInstalled
-from ecosys.environment.entities import Resource, Herbivore
+from ecosys.environment.entities import EntityStore, Resource, Herbivore
+from ecosys.environment.food_field import food_contribution, food_field, food_sums, use_food_field
+from ecosys.environment.layouts import LayoutCache, sample_layout
+from ecosys.environment.observation import (
+    food_direction, local_patches, pack_food_and_walls, patch_grids, patch_padding
+)
+from ecosys.environment.rendering import to_rgb, upscale
 
 
 class EcosysEnv(gym.Env):
@@ -64,26 +68,53 @@ class EcosysEnv(gym.Env):
     ```
     gym.make('Ecosys-v0')
     ```
+
+    Layouts are drawn from the generator seeded by `reset(seed=...)`. Passing a
+    `layout_cache` (a `LayoutCache` of pre-generated layouts) makes resets on a matching
+    grid pick one of the cached layouts instead of sampling a new one.
+
+    With `packed_obs=True` the observation is a single uint8 with bit `i` set for Food `i`
+    and bit `4 + i` for Wall `i` (see `ecosys.environment.observation.unpack_obs`). It is
+    written into the same 0-d array at every step, copy it to keep it across steps.
+
+    With `patch_size=k` (odd) the observation is instead the `(k, k, 2)` egocentric patch of
+    the grid centred on the herbivore, indexed `[dy, dx]`: channel 0 marks the resources and
+    channel 1 the cells outside of the grid.
     '''
 
     metadata = {
-        'render_modes': ['human'],
+        'render_modes': ['human', 'rgb_array'],
         'render_fps': 10,
     }
 
     def __init__(
         self,
-        render_mode: Optional[str] = None
+        render_mode: Optional[str] = None,
+        layout_cache: Optional[LayoutCache] = None,
+        packed_obs: bool = False,
+        patch_size: Optional[int] = None
     ):
         super(EcosysEnv, self).__init__()
+        assert patch_size is None or patch_size % 2 == 1, f'patch_size must be odd, got {patch_size}.'
+        assert not (packed_obs and patch_size), 'packed_obs and patch_size cannot be combined.'
         # Grid dimension
         self.grid_dim = 10
         # Number of resources to be generated inside the grid
         self.n_resources = 20
         # Action space
         self.action_space = gym.spaces.Discrete(4)
-        # Observation space
-        self.observation_space = gym.spaces.MultiBinary([2, 4])
+        # Observation space, and the buffer packed observations are written to
+        self.packed_obs = packed_obs
+        self.patch_size = patch_size
+        if patch_size:
+            self.observation_space = gym.spaces.MultiBinary([patch_size, patch_size, 2])
+        elif packed_obs:
+            self.observation_space = gym.spaces.Box(0, 255, shape=(), dtype=numpy.uint8)
+            self._packed_state = numpy.zeros((), dtype=numpy.uint8)
+        else:
+            self.observation_space = gym.spaces.MultiBinary([2, 4])
+        # Pre-generated starting layouts
+        self.layout_cache = layout_cache
         # Initialize state and info
         self.state = None
         self.info = {}
@@ -106,20 +137,21 @@ class EcosysEnv(gym.Env):
         assert self.state is not None, 'Call reset before using step method.'
         # Perform the action
         self._herb.move(action)
+        herb_x, herb_y = self._herb.x, self._herb.y
         # Determine if in wall
-        self._is_in_wall = any([i not in range(0, self.grid_dim) for i in self._herb.pos])
+        self._is_in_wall = not (0 <= herb_x < self.grid_dim and 0 <= herb_y < self.grid_dim)
         # Interact with resources
         self._has_eaten = False
-        for r in self._res:
-            if self._herb.interact(r):
-                self._res.remove(r)
-                self._has_eaten = True
+        if not self._is_in_wall:
+            idx = self._grid[herb_y, herb_x]
+            if idx >= 0:
+                self._eat(idx)
         # Make observation
         self.state = self._get_obs()
         # Calculate reward
         reward = self._get_rw()
         # Determine if done
-        terminated = (len(self._res) == 0) or self._is_in_wall
+        terminated = (self._n_remaining == 0) or self._is_in_wall
         # Update info
         self.info = self._get_info()
         # Render step
@@ -140,16 +172,60 @@ class EcosysEnv(gym.Env):
             self.grid_dim = options.get('grid_dim') if 'grid_dim' in options else self.grid_dim
             self.n_resources = options.get('n_resources') if 'n_resources' in options else self.n_resources
         # Randomly generate entities on the grid
-        self._herb, self._res = self._gen_ent()
-        if self.render_mode == "human":
-            self.render()
+        self._store = self._gen_ent()
+        self._herb = Herbivore.view(self._store, 0)
+        self._n_remaining = self.n_resources
+        # Build the occupancy grid, and without patch observations on dense grids the food sums of every herbivore position
+        self._grid = numpy.full((self.grid_dim, self.grid_dim), -1, dtype=numpy.int32)
+        self._grid[self._store.y[1:], self._store.x[1:]] = numpy.arange(1, self.n_resources+1)
+        dense = not self.patch_size and use_food_field(self.grid_dim, self.n_resources)
+        self._food = food_field(self._grid >= 0) if dense else None
+        # Build the padded resource and wall grid egocentric patches are taken from
+        if self.patch_size:
+            self._pad = patch_padding(self.patch_size)
+            self._patch_grid = patch_grids([self.grid_dim], self.grid_dim + 2*self._pad, self.patch_size)
+            self._patch_grid[0, self._store.y[1:] + self._pad, self._store.x[1:] + self._pad, 0] = 1
         # Update state and info
         self.state = self._get_obs()
         self.info = self._get_info()
+        if self.render_mode == "human":
+            self.render()
         return self.state, self.info
 
-    def render(self) -> None:
-        '''Render the environment to screen.'''
+    @property
+    def palette(self) -> numpy.ndarray:
+        '''Colors of the palette indices returned by render_indices.'''
+        return numpy.array(self._store.palette, dtype=numpy.uint8)
+
+    @property
+    def render_scale(self) -> int:
+        '''Width in pixels of a grid cell.'''
+        return max(1, self.screen_width // self.grid_dim)
+
+    def render_indices(self) -> numpy.ndarray:
+        '''Rasterize the grid into palette indices, one pixel per cell scaled up to render_scale pixels.'''
+        return upscale(self._render_cells(), self.render_scale)
+
+    def _render_cells(self, size: Optional[int] = None) -> numpy.ndarray:
+        '''
+        Rasterize the grid into (grid_dim, grid_dim) palette indices, indexed [y, x].
+
+        With size, the grid is instead shrunk to (size, size) pixels, each entity drawn on the
+        pixel its cell falls in.
+        '''
+        size = self.grid_dim if size is None else size
+        frame = numpy.zeros((size, size), dtype=numpy.uint8)
+        store = self._store
+        alive = numpy.flatnonzero(store.alive[:store.size])
+        # Resources first, so that the herbivore (row 0) is drawn on top
+        alive = alive[::-1]
+        x, y = store.x[alive], store.y[alive]
+        in_grid = (x >= 0) & (x < self.grid_dim) & (y >= 0) & (y < self.grid_dim)
+        frame[y[in_grid]*size // self.grid_dim, x[in_grid]*size // self.grid_dim] = store.color[alive[in_grid]]
+        return frame
+
+    def render(self) -> Optional[numpy.ndarray]:
+        '''Render the environment to screen, or return it as an RGB array in rgb_array mode.'''
         # Check render mode has been set
         if self.render_mode is None:
             gym.logger.warn(
@@ -158,6 +234,13 @@ class EcosysEnv(gym.Env):
                 f'e.g. gym(\'{self.spec.id}\', render_mode=\'human\')'
             )
             return
+        if self.state is None:
+            return None
+        if self.render_mode == 'rgb_array':
+            return upscale(to_rgb(self._render_cells(), self.palette), self.render_scale, channels=True)
+        # The window was closed
+        if not self.isopen:
+            return None
         # Check pygame installation
         try:
             import pygame
@@ -168,98 +251,112 @@ class EcosysEnv(gym.Env):
         # Initialize screen
         if self.screen is None:
             pygame.init()
-            if self.render_mode == 'human':
-                pygame.display.init()
-                self.screen = pygame.display.set_mode(
-                    (self.screen_width, self.screen_height)
-                )
-                pygame.display.set_caption('Ecosys-v0')
+            pygame.display.init()
+            self.screen = pygame.display.set_mode(
+                (self.screen_width, self.screen_height)
+            )
+            pygame.display.set_caption('Ecosys-v0')
         # Initialize clock
         if self.clock is None:
             self.clock = pygame.time.Clock()
-        if self.state is None:
-            return None
-        # Draw objects to screen
+        # Grids wider than the screen are shrunk to fit it
+        if self.grid_dim > self.screen_width:
+            frame = to_rgb(self._render_cells(self.screen_width), self.palette)
+        else:
+            frame = upscale(to_rgb(self._render_cells(), self.palette), self.render_scale, channels=True)
+        # Copy the frame to screen, pygame surfaces are indexed [x, y]
         self.screen.fill((0, 0, 0))
-        width = self.screen_width/self.grid_dim
-        for r in self._res:
-            pygame.draw.rect(
-                self.screen,
-                r.color,
-                pygame.Rect(r.x*width, r.y*width, width, width)
-            )
-        pygame.draw.rect(
-            self.screen,
-            self._herb.color,
-            pygame.Rect(self._herb.x*width, self._herb.y*width, width, width)
-        )
+        pygame.surfarray.blit_array(self.screen.subsurface((0, 0) + frame.shape[1::-1]), frame.transpose(1, 0, 2))
         # Update screen
-        if self.render_mode == 'human':
-            pygame.event.pump()
-            self.clock.tick(self.metadata['render_fps'])
-            pygame.display.flip()
+        pygame.event.pump()
+        self.clock.tick(self.metadata['render_fps'])
+        pygame.display.flip()
         # Handle quit button
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.close()
-                sys.exit()
 
     def close(self) -> None:
         if self.screen is not None:
             import pygame
             pygame.display.quit()
             pygame.quit()
+            self.screen = None
             self.isopen = False
 
-    def _gen_ent(self) -> tuple[Herbivore, list[Resource]]:
-        '''Randomly generate the herbivore and resources on the grid.'''
-        random_nums = random.sample(range(self.grid_dim*self.grid_dim), self.n_resources+1)
-        coords = [[num // self.grid_dim, num % self.grid_dim] for num in random_nums]
-        herb = Herbivore(coords[0])
-        res = [Resource(pos) for pos in coords[1:]]
-        return herb, res
+    @property
+    def _res(self) -> list[Resource]:
+        '''Views of the resources remaining on the grid.'''
+        return [Resource.view(self._store, idx) for idx in numpy.flatnonzero(self._store.alive[1:]) + 1]
+
+    def _gen_ent(self) -> EntityStore:
+        '''Randomly generate the herbivore (row 0) and resources (rows 1 onwards) on the grid.'''
+        if self.layout_cache is not None and self.layout_cache.matches(self.grid_dim, self.n_resources):
+            coords = self.layout_cache.sample(self.np_random)
+        else:
+            coords = sample_layout(self.np_random, self.grid_dim, self.n_resources)
+        store = EntityStore(self.n_resources+1)
+        store.add(coords[0], Herbivore.type_id, Herbivore.default_color)
+        store.x[1:], store.y[1:] = coords[1:, 0], coords[1:, 1]
+        store.type_id[1:] = Resource.type_id
+        store.alive[1:] = True
+        store.color[1:] = store.color_index(Resource.default_color)
+        store.size = store.capacity
+        return store
+
+    def _eat(self, idx: int) -> None:
+        '''Remove the resource in row idx from the grid and from the food sums.'''
+        x, y = self._store.x[idx], self._store.y[idx]
+        self._store.alive[idx] = False
+        self._grid[y, x] = -1
+        if self.patch_size:
+            self._patch_grid[0, y + self._pad, x + self._pad, 0] = 0
+        self._n_remaining -= 1
+        self._has_eaten = True
+        if self._food is None:
+            return
+        if self._n_remaining == 0:
+            self._food.fill(0.)
+        else:
+            self._food -= food_contribution(self.grid_dim, x, y)
 
     def _get_obs(self) -> numpy.ndarray:
         '''Return the current state of the environment.'''
-        state = numpy.zeros((2, 4))
-        # Compute the food array
-        food = numpy.zeros((4,), dtype=float)
-        for res in self._res:
-            inv_square_dist = 1./float(self._herb.distance(res)**2)
-            if self._herb.y > res.y:  # food up
-                food[0] += inv_square_dist
-            if self._herb.x < res.x:  # food right
-                food[1] += inv_square_dist
-            if self._herb.y < res.y:  # food down
-                food[2] += inv_square_dist
-            if self._herb.x > res.x:  # food left
-                food[3] += inv_square_dist
-        idx = numpy.argmax(food)
-        food = numpy.zeros((4,), dtype=numpy.uint8)
-        food[idx] = 1
+        herb_x, herb_y = self._herb.x, self._herb.y
+        if self.patch_size:
+            return local_patches(self._patch_grid, [herb_x], [herb_y], self.patch_size)[0]
+        # Compute the food array, from the food field if there is one
+        if self._food is not None and 0 <= herb_x < self.grid_dim and 0 <= herb_y < self.grid_dim:
+            food = self._food[:, herb_y, herb_x]
+        else:
+            alive = self._store.alive[1:]
+            food = food_sums(herb_x, herb_y, self._store.x[1:][alive], self._store.y[1:][alive])
+        if self.packed_obs:
+            # Write the packed state in place
+            self._packed_state[()] = pack_food_and_walls(
+                food, herb_y == 0, herb_x == self.grid_dim, herb_y == self.grid_dim, herb_x == 0)
+            return self._packed_state
+        # Create state array
+        state = numpy.zeros((2, 4), dtype=numpy.uint8)
+        state[0, food_direction(food)] = 1
         # Compute the wall array
-        wall = numpy.array(
-            [
-                self._herb.y == 0,              # wall up
-                self._herb.x == self.grid_dim,  # wall right
-                self._herb.y == self.grid_dim,  # wall down
-                self._herb.x == 0               # wall left
-            ],
-            dtype=numpy.uint8
+        state[1] = (
+            herb_y == 0,              # wall up
+            herb_x == self.grid_dim,  # wall right
+            herb_y == self.grid_dim,  # wall down
+            herb_x == 0               # wall left
         )
-        # Create state array
-        state = numpy.array([food, wall], dtype=numpy.uint8)
         return state
 
     def _get_info(self) -> dict:
         return {
             'herbivore_pos': self._herb.pos,
-            'resources_remaining': len(self._res)
+            'resources_remaining': self._n_remaining
         }
 
     def _get_rw(self) -> float:
         '''Calculate the reward'''
-        if len(self._res) == 0:
+        if self._n_remaining == 0:
             return 100.
         elif self._has_eaten:
             return 10.
@@ -0,0 +1,300 @@
+import numpy
+from typing import Optional, Sequence, Union
+import gym
+from gym.utils import seeding
+from ecosys.environment.layouts import LayoutCache, sample_layouts
+from ecosys.environment.observation import food_direction, local_patches, patch_grids, patch_padding
+from ecosys.environment.rendering import TYPE_PALETTE, rasterize, to_rgb, upscale
+
+
+# Herbivore displacement (dx, dy) for each action: up, right, down, left
+MOVES = numpy.array([[0, -1], [1, 0], [0, 1], [-1, 0]], dtype=numpy.int64)
+
+
+class EcosysVectorEnv(gym.vector.VectorEnv):
+    '''
+    ### Description
+
+    Vectorized version of `Ecosys-v0` stepping `num_envs` independent grids at once.
+    The herbivore and resource positions of all sub-environments are stored as contiguous
+    integer arrays, so that moving, wall checks, eating, rewards and observations are
+    computed for every sub-environment with a handful of NumPy operations.
+
+    Action space, observation space, rewards and episode end of each sub-environment are
+    the same as `Ecosys-v0`. Observations, rewards and flags are batched along the first axis.
+
+    ### Auto-reset
+
+    Sub-environments that terminate or reach `max_episode_steps` are reset automatically
+    within the same `step` call. The last observation and info of the finished episode are
+    returned in `info['final_observation']` and `info['final_info']`, masked by
+    `info['_final_observation']` and `info['_final_info']`, as in `gym.vector.SyncVectorEnv`.
+
+    ### Arguments
+
+    ```
+    gym.make('EcosysVector-v0', num_envs=256)
+    ```
+
+    `reset(options=...)` accepts `grid_dim` and `n_resources`, either as a single value
+    or as one value per sub-environment. Sub-environments whose grid matches the optional
+    `layout_cache` start from one of its pre-generated layouts.
+
+    With `render_mode='rgb_array'`, `render` returns the `(num_envs, H, W, 3)` frames of all
+    sub-environments at once, each cell drawn as a `render_scale` pixels wide square. All
+    sub-environments must then share the same grid dimension.
+
+    With `packed_obs=True` each observation is a single uint8 packed as in `Ecosys-v0`, and
+    the `(num_envs,)` observations are written into the same array at every step.
+
+    With `patch_size=k` each observation is the `(k, k, 2)` egocentric patch of `Ecosys-v0`,
+    gathered for all sub-environments at once from their stacked padded grids.
+    '''
+
+    metadata = {
+        'render_modes': ['rgb_array'],
+        'render_fps': 10,
+        'autoreset': True,
+    }
+
+    def __init__(
+        self,
+        num_envs: int = 1,
+        max_episode_steps: int = 500,
+        layout_cache: Optional[LayoutCache] = None,
+        render_mode: Optional[str] = None,
+        render_scale: int = 8,
+        packed_obs: bool = False,
+        patch_size: Optional[int] = None
+    ):
+        assert patch_size is None or patch_size % 2 == 1, f'patch_size must be odd, got {patch_size}.'
+        assert not (packed_obs and patch_size), 'packed_obs and patch_size cannot be combined.'
+        if patch_size:
+            observation_space = gym.spaces.MultiBinary([patch_size, patch_size, 2])
+        elif packed_obs:
+            observation_space = gym.spaces.Box(0, 255, shape=(), dtype=numpy.uint8)
+        else:
+            observation_space = gym.spaces.MultiBinary([2, 4])
+        super(EcosysVectorEnv, self).__init__(num_envs, observation_space, gym.spaces.Discrete(4))
+        # Packed observations, written into a buffer reused across steps
+        self.packed_obs = packed_obs
+        self._packed_state = numpy.zeros(num_envs, dtype=numpy.uint8)
+        # Egocentric patch observations
+        self.patch_size = patch_size
+        # Episode length after which sub-environments are truncated
+        self.max_episode_steps = max_episode_steps
+        # Grid dimension and number of resources of each sub-environment
+        self.grid_dim = numpy.full(num_envs, 10, dtype=numpy.int64)
+        self.n_resources = numpy.full(num_envs, 20, dtype=numpy.int64)
+        # Pre-generated starting layouts
+        self.layout_cache = layout_cache
+        # Rendering
+        self.render_mode = render_mode
+        self.render_scale = render_scale
+        # Initialize state
+        self.state = None
+        self._actions = None
+
+    def reset_wait(
+        self,
+        seed: Optional[Union[int, Sequence[int]]] = None,
+        options: Optional[dict] = None
+    ) -> tuple[numpy.ndarray, dict]:
+        '''Reset all sub-environments.'''
+        # Parse seeds, one per sub-environment
+        seeds = None
+        if seed is not None:
+            seeds = [seed + i for i in range(self.num_envs)] if isinstance(seed, int) else list(seed)
+            assert len(seeds) == self.num_envs, f'Expected {self.num_envs} seeds, got {len(seeds)}.'
+            # Auto-resets draw from a stream independent of the seeded initial layouts
+            self._np_random = numpy.random.Generator(numpy.random.PCG64(numpy.random.SeedSequence(seeds).spawn(1)[0]))
+        # Parse options
+        if options is not None:
+            if 'grid_dim' in options:
+                self.grid_dim[:] = options['grid_dim']
+            if 'n_resources' in options:
+                self.n_resources[:] = options['n_resources']
+        # Allocate the state arrays
+        capacity = int(self.n_resources.max())
+        self._herb = numpy.zeros((self.num_envs, 2), dtype=numpy.int64)
+        self._res = numpy.zeros((self.num_envs, capacity, 2), dtype=numpy.int64)
+        self._alive = numpy.zeros((self.num_envs, capacity), dtype=bool)
+        self._steps = numpy.zeros(self.num_envs, dtype=numpy.int64)
+        if self.patch_size:
+            self._pad = patch_padding(self.patch_size)
+            padded_dim = int(self.grid_dim.max()) + 2*self._pad
+            self._patch_grids = numpy.zeros((self.num_envs, padded_dim, padded_dim, 2), dtype=numpy.uint8)
+        # Randomly generate entities on the grids
+        if seeds is None:
+            self._reset_envs(numpy.arange(self.num_envs), self.np_random)
+        else:
+            for i, s in enumerate(seeds):
+                self._reset_envs(numpy.array([i]), seeding.np_random(s)[0])
+        # Update state and info
+        self.state = self._get_obs()
+        return self.state, self._get_info()
+
+    def reset_envs(self, idx: numpy.ndarray, seeds: Sequence[int]) -> numpy.ndarray:
+        '''Reset the sub-environments in idx to the layouts seeded by seeds, returning their observations.'''
+        assert self.state is not None, 'Call reset before using reset_envs method.'
+        idx = numpy.asarray(idx, dtype=numpy.int64)
+        for i, s in zip(idx, seeds):
+            self._reset_envs(numpy.array([i]), seeding.np_random(int(s))[0])
+        self.state[idx] = self._get_obs(idx)
+        return self.state[idx]
+
+    def step_async(self, actions: numpy.ndarray) -> None:
+        self._actions = numpy.asarray(actions, dtype=numpy.int64)
+
+    def step_wait(self) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, dict]:
+        '''Execute one time step within every sub-environment.'''
+        # Error handling
+        actions = self._actions
+        err_msg = f'{actions!r} invalid'
+        assert actions.shape == (self.num_envs,) and ((actions >= 0) & (actions < 4)).all(), err_msg
+        assert self.state is not None, 'Call reset before using step method.'
+        # Perform the actions
+        self._herb += MOVES[actions]
+        # Determine if in wall
+        is_in_wall = ((self._herb < 0) | (self._herb >= self.grid_dim[:, None])).any(axis=1)
+        # Interact with resources
+        eaten = self._alive & (self._res == self._herb[:, None, :]).all(axis=2)
+        self._alive &= ~eaten
+        if self.patch_size:
+            env_idx, res_idx = numpy.nonzero(eaten)
+            res = self._res[env_idx, res_idx] + self._pad
+            self._patch_grids[env_idx, res[:, 1], res[:, 0], 0] = 0
+        has_eaten = eaten.any(axis=1)
+        remaining = self._alive.sum(axis=1)
+        # Make observation
+        self.state = self._get_obs()
+        # Calculate reward
+        reward = numpy.where(
+            remaining == 0, 100.,
+            numpy.where(
+                has_eaten, 10.,
+                numpy.where(is_in_wall, -100., -1./(2*(self.grid_dim - 1)))
+            )
+        )
+        # Determine if done
+        terminated = (remaining == 0) | is_in_wall
+        self._steps += 1
+        truncated = ~terminated & (self._steps >= self.max_episode_steps)
+        # Update info and reset finished sub-environments
+        info = self._get_info()
+        done = terminated | truncated
+        if done.any():
+            info = self._autoreset(numpy.flatnonzero(done), info)
+        return self.state, reward, terminated, truncated, info
+
+    def _autoreset(self, idx: numpy.ndarray, info: dict) -> dict:
+        '''Reset the sub-environments in idx, keeping their final observation and info.'''
+        done = numpy.zeros(self.num_envs, dtype=bool)
+        done[idx] = True
+        final_obs = numpy.full(self.num_envs, None, dtype=object)
+        final_info = numpy.full(self.num_envs, None, dtype=object)
+        for i in idx:
+            final_obs[i] = self.state[i].copy()
+            final_info[i] = {key: value[i] for key, value in info.items()}
+        self._reset_envs(idx, self.np_random)
+        self.state[idx] = self._get_obs(idx)
+        info = self._get_info()
+        info['final_observation'] = final_obs
+        info['_final_observation'] = done
+        info['final_info'] = final_info
+        info['_final_info'] = done.copy()
+        return info
+
+    @property
+    def palette(self) -> numpy.ndarray:
+        '''Colors of the palette indices returned by render_indices.'''
+        return TYPE_PALETTE
+
+    def render_indices(self) -> numpy.ndarray:
+        '''Rasterize the grids of all sub-environments into (num_envs, H, W) palette indices.'''
+        return upscale(self._render_cells(), self.render_scale)
+
+    def _render_cells(self) -> numpy.ndarray:
+        '''Rasterize the grids of all sub-environments into (num_envs, grid_dim, grid_dim) palette indices.'''
+        assert (self.grid_dim == self.grid_dim[0]).all(), 'Batch rendering needs a single grid dimension.'
+        return rasterize(int(self.grid_dim[0]), self._herb, self._res, self._alive)
+
+    def render(self) -> Optional[numpy.ndarray]:
+        '''Return the (num_envs, H, W, 3) RGB frames of all sub-environments in rgb_array mode.'''
+        if self.render_mode != 'rgb_array' or self.state is None:
+            return None
+        return upscale(to_rgb(self._render_cells(), self.palette), self.render_scale, channels=True)
+
+    def _reset_envs(self, idx: numpy.ndarray, rng: numpy.random.Generator) -> None:
+        '''Randomly generate the herbivores and resources of the sub-environments in idx.'''
+        params = numpy.stack([self.grid_dim[idx], self.n_resources[idx]], axis=1)
+        for grid_dim, n_resources in numpy.unique(params, axis=0):
+            sub = idx[(params == (grid_dim, n_resources)).all(axis=1)]
+            if self.layout_cache is not None and self.layout_cache.matches(grid_dim, n_resources):
+                coords = self.layout_cache.sample(rng, len(sub))
+            else:
+                coords = sample_layouts(rng, len(sub), grid_dim, n_resources)
+            self._herb[sub] = coords[:, 0]
+            self._res[sub, :n_resources] = coords[:, 1:]
+            self._alive[sub] = False
+            self._alive[sub, :n_resources] = True
+            if self.patch_size:
+                self._reset_patch_grids(sub, grid_dim, n_resources)
+        self._steps[idx] = 0
+
+    def _reset_patch_grids(self, sub: numpy.ndarray, grid_dim: int, n_resources: int) -> None:
+        '''Fill the padded patch grids of the sub-environments in sub with their walls and resources.'''
+        self._patch_grids[sub] = patch_grids(
+            numpy.full(len(sub), grid_dim), self._patch_grids.shape[1], self.patch_size)
+        res = self._res[sub, :n_resources] + self._pad
+        self._patch_grids[sub[:, None], res[:, :, 1], res[:, :, 0], 0] = 1
+
+    def _get_obs(self, idx: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+        '''Return the current state of the sub-environments in idx (all by default).'''
+        herb, res, alive = self._herb, self._res, self._alive
+        grid_dim = self.grid_dim
+        if idx is not None:
+            herb, res, alive, grid_dim = herb[idx], res[idx], alive[idx], grid_dim[idx]
+        if self.patch_size:
+            grids = self._patch_grids if idx is None else self._patch_grids[idx]
+            return local_patches(grids, herb[:, 0], herb[:, 1], self.patch_size)
+        # Compute the food array
+        dx = res[:, :, 0] - herb[:, None, 0]
+        dy = res[:, :, 1] - herb[:, None, 1]
+        dist = numpy.abs(dx) + numpy.abs(dy)
+        inv_square_dist = numpy.where(alive, 1./numpy.maximum(dist, 1)**2, 0.)
+        food = numpy.stack(
+            [
+                (inv_square_dist * (dy < 0)).sum(axis=1),  # food up
+                (inv_square_dist * (dx > 0)).sum(axis=1),  # food right
+                (inv_square_dist * (dy > 0)).sum(axis=1),  # food down
+                (inv_square_dist * (dx < 0)).sum(axis=1)   # food left
+            ],
+            axis=1
+        )
+        direction = food_direction(food)
+        if self.packed_obs:
+            # Pack the food direction and the walls up, right, down and left into bits 0-3 and 4-7
+            state = self._packed_state if idx is None else numpy.empty(len(herb), dtype=numpy.uint8)
+            state[:] = (
+                (1 << direction)
+                | (herb[:, 1] == 0) << 4
+                | (herb[:, 0] == grid_dim) << 5
+                | (herb[:, 1] == grid_dim) << 6
+                | (herb[:, 0] == 0) << 7
+            )
+            return state
+        state = numpy.zeros((len(herb), 2, 4), dtype=numpy.uint8)
+        state[numpy.arange(len(herb)), 0, direction] = 1
+        # Compute the wall array
+        state[:, 1, 0] = herb[:, 1] == 0         # wall up
+        state[:, 1, 1] = herb[:, 0] == grid_dim  # wall right
+        state[:, 1, 2] = herb[:, 1] == grid_dim  # wall down
+        state[:, 1, 3] = herb[:, 0] == 0         # wall left
+        return state
+
+    def _get_info(self) -> dict:
+        return {
+            'herbivore_pos': self._herb.copy(),
+            'resources_remaining': self._alive.sum(axis=1)
+        }
@@ -1,3 +1,5 @@
+from ecosys.environment.entities.store import EntityStore
 from ecosys.environment.entities.entity import Entity
 from ecosys.environment.entities.resource import Resource
 from ecosys.environment.entities.herbivore import Herbivore
+from ecosys.environment.entities.carnivore import Carnivore
@@ -0,0 +1,10 @@
+from ecosys.environment.entities import Entity, Herbivore
+
+
+class Carnivore(Entity):
+    __slots__ = ()
+    type_id = 3
+    # herbivores are eaten by Carnivores
+    default_diet = frozenset({Herbivore})
+    # color
+    default_color = (255, 0, 0)
@@ -1,16 +1,40 @@
 import numpy
 from typing import TypeVar
+from ecosys.environment.entities.store import EntityStore
 Entity = TypeVar("Entity", bound='Entity')
 
 
 class Entity:
+    '''
+    Lightweight view of one row of an EntityStore.
+
+    Entities created directly own a private single-row store, while environments
+    create views into their shared store with Entity.view.
+    '''
+    __slots__ = ('_store', '_idx', '_diet')
+
+    # type id stored in EntityStore.type_id
+    type_id = 0
+    # default diet (set of types) and color of the entity type
+    default_diet = frozenset()
+    default_color = (0, 0, 0)
+
     def __init__(self, pos: tuple[int, int]):
-        # x, y cartesian coordinates
-        self._pos = numpy.array(pos, dtype=int)
-        # diet (list of types)
-        self._diet = set()
-        # color
-        self._color = (0, 0, 0)
+        store = EntityStore(1)
+        store.add(pos, self.type_id, self.default_color)
+        self._store = store
+        self._idx = 0
+        # diet (set of types), None until it differs from the default diet
+        self._diet = None
+
+    @classmethod
+    def view(cls, store: EntityStore, idx: int) -> Entity:
+        '''Return an entity viewing row idx of store.'''
+        ent = cls.__new__(cls)
+        ent._store = store
+        ent._idx = idx
+        ent._diet = None
+        return ent
 
     def distance(self, ent: Entity) -> int:
         '''
@@ -18,7 +42,7 @@ class Entity:
         '''
         if not isinstance(ent, Entity):
             raise TypeError
-        return sum(abs(self.pos - ent.pos))
+        return abs(self.x - ent.x) + abs(self.y - ent.y)
 
     def interact(self, ent: Entity) -> bool:
         '''
@@ -26,16 +50,18 @@ class Entity:
         '''
         if not isinstance(ent, Entity):
             raise TypeError
-        return all(self.pos == ent.pos)
+        return self.x == ent.x and self.y == ent.y
 
     def add_to_diet(self, obj_type: Entity) -> None:
         if not isinstance(obj_type, type(Entity)):
             raise TypeError
+        self._diet = set(self.diet)
         self._diet.add(obj_type)
 
     def remove_from_diet(self, obj_type: Entity) -> None:
         if not isinstance(obj_type, type(Entity)):
             raise TypeError
+        self._diet = set(self.diet)
         self._diet.discard(obj_type)
 
     def is_eaten_by(self, ent: Entity) -> bool:
@@ -43,46 +69,58 @@ class Entity:
 
     def move(self, action: int) -> None:
         if action == 0:  # up
-            self.y -= 1
+            self._store.y[self._idx] -= 1
         if action == 1:  # right
-            self.x += 1
+            self._store.x[self._idx] += 1
         if action == 2:  # down
-            self.y += 1
+            self._store.y[self._idx] += 1
         if action == 3:  # left
-            self.x -= 1
+            self._store.x[self._idx] -= 1
+
+    @property
+    def store(self) -> EntityStore:
+        return self._store
 
     @property
-    def pos(self) -> tuple[int, int]:
-        return self._pos
+    def pos(self) -> numpy.ndarray:
+        return numpy.array([self.x, self.y])
 
     @pos.setter
     def pos(self, value: tuple[int, int]) -> None:
-        self._pos = value
+        self._store.x[self._idx], self._store.y[self._idx] = value
 
     @property
     def x(self) -> int:
-        return self._pos[0]
+        return int(self._store.x[self._idx])
 
     @x.setter
     def x(self, value: int) -> None:
-        self._pos[0] = value
+        self._store.x[self._idx] = value
 
     @property
     def y(self) -> int:
-        return self._pos[1]
+        return int(self._store.y[self._idx])
 
     @y.setter
     def y(self, value: int) -> None:
-        self._pos[1] = value
+        self._store.y[self._idx] = value
+
+    @property
+    def alive(self) -> bool:
+        return bool(self._store.alive[self._idx])
+
+    @alive.setter
+    def alive(self, value: bool) -> None:
+        self._store.alive[self._idx] = value
 
     @property
     def diet(self) -> set:
-        return self._diet
+        return self.default_diet if self._diet is None else self._diet
 
     @property
     def color(self) -> tuple[int, int, int]:
-        return self._color
+        return self._store.palette[self._store.color[self._idx]]
 
     @color.setter
     def color(self, value: tuple[int, int, int]) -> None:
-        self._color = value
+        self._store.color[self._idx] = self._store.color_index(value)
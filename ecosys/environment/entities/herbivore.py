@@ -2,9 +2,9 @@ from ecosys.environment.entities import Entity, Resource
 
 
 class Herbivore(Entity):
-    def __init__(self, pos: tuple[int, int]):
-        super().__init__(pos)
-        # resources are eaten by Herbivors
-        self.add_to_diet(Resource)
-        # color
-        self.color = (0, 255, 0)
+    __slots__ = ()
+    type_id = 2
+    # resources are eaten by Herbivors
+    default_diet = frozenset({Resource})
+    # color
+    default_color = (0, 255, 0)
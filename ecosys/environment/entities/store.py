@@ -0,0 +1,54 @@
+import numpy
+
+
+class EntityStore:
+    '''
+    Struct-of-arrays storage for the entities living on a grid.
+
+    Each entity is a row index into the x, y, type id, alive mask and color index arrays.
+    Colors are stored as indices into the shared palette.
+    '''
+    def __init__(self, capacity: int):
+        # x, y cartesian coordinates
+        self.x = numpy.zeros(capacity, dtype=numpy.int64)
+        self.y = numpy.zeros(capacity, dtype=numpy.int64)
+        # entity type ids
+        self.type_id = numpy.zeros(capacity, dtype=numpy.int8)
+        # alive mask
+        self.alive = numpy.zeros(capacity, dtype=bool)
+        # color indices into the palette
+        self.color = numpy.zeros(capacity, dtype=numpy.uint8)
+        self.palette = [(0, 0, 0)]
+        # number of rows in use
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    @property
+    def capacity(self) -> int:
+        return len(self.x)
+
+    def add(
+        self,
+        pos: tuple[int, int],
+        type_id: int,
+        color: tuple[int, int, int]
+    ) -> int:
+        '''Add an alive entity to the store and return its row index.'''
+        if self.size == self.capacity:
+            raise IndexError('EntityStore is full.')
+        idx = self.size
+        self.x[idx], self.y[idx] = pos
+        self.type_id[idx] = type_id
+        self.alive[idx] = True
+        self.color[idx] = self.color_index(color)
+        self.size += 1
+        return idx
+
+    def color_index(self, color: tuple[int, int, int]) -> int:
+        '''Return the palette index of color, adding it to the palette if needed.'''
+        color = tuple(color)
+        if color not in self.palette:
+            self.palette.append(color)
+        return self.palette.index(color)
@@ -0,0 +1,112 @@
+import functools
+import numpy
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Above this number of kernel cells times resources the field is built with FFTs
+FFT_THRESHOLD = 1 << 16
+# Grids with more cells per resource look up the food sums of the remaining resources at every step
+DENSE_FIELD_CELLS_PER_RESOURCE = 16
+
+
+def use_food_field(grid_dim: int, n_resources: int) -> bool:
+    '''
+    Whether a grid is dense enough for the food field to pay off.
+
+    Building the field costs O(grid_dim^2 log grid_dim) per reset and every eaten resource
+    O(grid_dim^2), while food_sums costs O(n_resources) per step, so the field is only kept
+    when at least one cell in DENSE_FIELD_CELLS_PER_RESOURCE holds a resource.
+    '''
+    return grid_dim*grid_dim <= DENSE_FIELD_CELLS_PER_RESOURCE*n_resources
+
+
+@functools.lru_cache(maxsize=4)
+def food_kernels(grid_dim: int) -> numpy.ndarray:
+    '''
+    Returns the (4, 2*grid_dim-1, 2*grid_dim-1) food kernels of a grid.
+
+    Entry [d, grid_dim-1-ry+hy, grid_dim-1-rx+hx] is the 1/distance^2 contribution of a
+    resource at (rx, ry) to the food sum in direction d (up, right, down, left) of a
+    herbivore at (hx, hy).
+    '''
+    # offsets of the herbivore with respect to the resource
+    offsets = numpy.arange(-(grid_dim-1), grid_dim)
+    ox, oy = offsets[None, :], offsets[:, None]
+    dist = numpy.abs(ox) + numpy.abs(oy)
+    inv_square_dist = numpy.where(dist > 0, 1./numpy.maximum(dist, 1)**2, 0.)
+    kernels = numpy.stack(
+        [
+            inv_square_dist * (oy > 0),  # food up
+            inv_square_dist * (ox < 0),  # food right
+            inv_square_dist * (oy < 0),  # food down
+            inv_square_dist * (ox > 0)   # food left
+        ]
+    )
+    kernels.flags.writeable = False
+    return kernels
+
+
+def _fft_size(grid_dim: int) -> int:
+    '''Returns the smallest 5-smooth length holding the full convolution of the grid with the kernels.'''
+    size = 3*grid_dim - 2
+    while True:
+        n = size
+        for p in (2, 3, 5):
+            while n % p == 0:
+                n //= p
+        if n == 1:
+            return size
+        size += 1
+
+
+@functools.lru_cache(maxsize=4)
+def _food_kernels_fft(grid_dim: int) -> numpy.ndarray:
+    '''Returns the real FFT of the food kernels, padded to the full convolution size.'''
+    size = _fft_size(grid_dim)
+    return numpy.fft.rfft2(food_kernels(grid_dim), s=(size, size))
+
+
+def food_contribution(grid_dim: int, x: int, y: int) -> numpy.ndarray:
+    '''Returns the (4, grid_dim, grid_dim) food sums of a single resource at (x, y).'''
+    kernels = food_kernels(grid_dim)
+    return kernels[:, grid_dim-1-y:2*grid_dim-1-y, grid_dim-1-x:2*grid_dim-1-x]
+
+
+def food_field(occupancy: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Returns the (4, grid_dim, grid_dim) food sums for every herbivore position.
+
+    occupancy is a (grid_dim, grid_dim) boolean array indexed by [y, x]. Entry [d, y, x]
+    of the result is the food sum in direction d seen by a herbivore at (x, y).
+    '''
+    grid_dim = occupancy.shape[0]
+    ys, xs = numpy.nonzero(occupancy)
+    if len(xs)*grid_dim*grid_dim <= FFT_THRESHOLD:
+        # Few resources: add up the kernel window of each resource
+        windows = sliding_window_view(food_kernels(grid_dim), (grid_dim, grid_dim), axis=(1, 2))
+        return windows[:, grid_dim-1-ys, grid_dim-1-xs].sum(axis=1)
+    # Many resources: convolve the occupancy grid with the kernels
+    size = _fft_size(grid_dim)
+    occupancy_fft = numpy.fft.rfft2(occupancy.astype(float), s=(size, size))
+    field = numpy.fft.irfft2(_food_kernels_fft(grid_dim)*occupancy_fft, s=(size, size))
+    return numpy.ascontiguousarray(field[:, grid_dim-1:2*grid_dim-1, grid_dim-1:2*grid_dim-1])
+
+
+def food_sums(
+    x: int,
+    y: int,
+    res_x: numpy.ndarray,
+    res_y: numpy.ndarray
+) -> numpy.ndarray:
+    '''Returns the food sums (up, right, down, left) seen from (x, y), which may lie outside the grid.'''
+    dx = res_x - x
+    dy = res_y - y
+    inv_square_dist = 1./(numpy.abs(dx) + numpy.abs(dy))**2
+    return numpy.array(
+        [
+            inv_square_dist[dy < 0].sum(),  # food up
+            inv_square_dist[dx > 0].sum(),  # food right
+            inv_square_dist[dy > 0].sum(),  # food down
+            inv_square_dist[dx < 0].sum()   # food left
+        ]
+    )
@@ -0,0 +1,117 @@
+import numpy
+from typing import Optional
+
+
+# Number of layouts generated at once when filling a LayoutCache
+CHUNK_SIZE = 65536
+
+
+def sample_cells(
+    rng: numpy.random.Generator,
+    n: int,
+    grid_dim: int,
+    k: int
+) -> numpy.ndarray:
+    '''Sample k distinct cells out of a grid_dim x grid_dim grid, n times.'''
+    n_cells = grid_dim*grid_dim
+    assert k <= n_cells, f'Cannot place {k} entities on a {grid_dim}x{grid_dim} grid.'
+    if k*k > n_cells:
+        # Crowded grids, where a row of k uniform draws likely has duplicates:
+        # take the first k cells of a random permutation
+        return rng.random((n, n_cells)).argsort(axis=1)[:, :k]
+    # Sparse grids: redraw the rows containing duplicate cells
+    cells = rng.integers(0, n_cells, size=(n, k))
+    while True:
+        cells_sorted = numpy.sort(cells, axis=1)
+        dup = (cells_sorted[:, 1:] == cells_sorted[:, :-1]).any(axis=1)
+        if not dup.any():
+            return cells
+        cells[dup] = rng.integers(0, n_cells, size=(int(dup.sum()), k))
+
+
+def sample_layouts(
+    rng: numpy.random.Generator,
+    n: int,
+    grid_dim: int,
+    n_resources: int
+) -> numpy.ndarray:
+    '''
+    Randomly place the herbivore and resources on distinct cells of the grid, n times.
+
+    Returns the (n, n_resources+1, 2) x, y coordinates of the herbivore (row 0) and resources.
+    '''
+    cells = sample_cells(rng, n, grid_dim, n_resources+1)
+    return numpy.stack([cells // grid_dim, cells % grid_dim], axis=2)
+
+
+def sample_layout(
+    rng: numpy.random.Generator,
+    grid_dim: int,
+    n_resources: int
+) -> numpy.ndarray:
+    '''Randomly place the herbivore (row 0) and resources on distinct cells of the grid.'''
+    return sample_layouts(rng, 1, grid_dim, n_resources)[0]
+
+
+class LayoutCache:
+    '''
+    Pre-generated starting layouts of one grid_dim and n_resources.
+
+    The layouts are stored as a single (size, n_resources+1, 2) array of the smallest
+    unsigned integer type holding the grid coordinates, so that millions of layouts fit in
+    memory (or in a memory-mapped .npy file) and a reset only costs an index lookup. The
+    same seed always generates the same layouts.
+    '''
+    def __init__(
+        self,
+        grid_dim: int,
+        n_resources: int,
+        size: int = 0,
+        seed: Optional[int] = None,
+        layouts: Optional[numpy.ndarray] = None
+    ):
+        self.grid_dim = grid_dim
+        self.n_resources = n_resources
+        if layouts is None:
+            rng = numpy.random.default_rng(seed)
+            layouts = numpy.empty((size, n_resources+1, 2), dtype=numpy.min_scalar_type(grid_dim - 1))
+            for start in range(0, size, CHUNK_SIZE):
+                stop = min(start + CHUNK_SIZE, size)
+                layouts[start:stop] = sample_layouts(rng, stop - start, grid_dim, n_resources)
+        err_msg = f'Layouts of shape {layouts.shape} do not hold {n_resources} resources.'
+        assert layouts.shape[1:] == (n_resources+1, 2), err_msg
+        self.layouts = layouts
+
+    def __len__(self) -> int:
+        return len(self.layouts)
+
+    def __getitem__(self, idx) -> numpy.ndarray:
+        '''Return the int64 coordinates of the layouts at idx.'''
+        return self.layouts[idx].astype(numpy.int64)
+
+    def matches(self, grid_dim: int, n_resources: int) -> bool:
+        '''Return True if the cached layouts are drawn on this grid with this number of resources.'''
+        return self.grid_dim == grid_dim and self.n_resources == n_resources
+
+    def sample(
+        self,
+        rng: numpy.random.Generator,
+        n: Optional[int] = None
+    ) -> numpy.ndarray:
+        '''Return one random layout, or n of them stacked along the first axis.'''
+        return self[rng.integers(0, len(self), size=n)]
+
+    def save(self, path: str) -> None:
+        '''Save the layouts to a .npy file.'''
+        numpy.save(path, self.layouts)
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        grid_dim: int,
+        mmap: bool = True
+    ) -> 'LayoutCache':
+        '''Load layouts saved with save, memory-mapping the file by default.'''
+        layouts = numpy.load(path, mmap_mode='r' if mmap else None)
+        return cls(grid_dim, layouts.shape[1] - 1, layouts=layouts)
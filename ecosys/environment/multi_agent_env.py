@@ -0,0 +1,314 @@
+import collections
+import numpy
+from typing import Optional
+import gym
+from numpy.lib.stride_tricks import sliding_window_view
+from ecosys.environment.entities import Entity, Resource, Herbivore, Carnivore
+from ecosys.environment.food_field import food_kernels
+from ecosys.environment.layouts import sample_cells
+from ecosys.environment.observation import food_direction
+from ecosys.environment.rendering import TYPE_PALETTE, to_rgb, upscale
+
+
+# Agent displacement (dx, dy) for each action: up, right, down, left
+MOVES = numpy.array([[0, -1], [1, 0], [0, 1], [-1, 0]], dtype=numpy.int64)
+
+
+class EcosysMultiAgentEnv(gym.Env):
+    '''
+    ### Description
+
+    Multi-agent version of `Ecosys-v0` where `n_herbivores` herbivores and `n_carnivores`
+    carnivores move at once on a single grid. Agents eat the entities in their diet
+    (`Herbivore.default_diet`, `Carnivore.default_diet`) that share their cell after moving:
+    carnivores eat herbivores first, then the surviving herbivores eat resources. Eaten
+    resources grow back on their cell after `regrowth_steps` steps (never if None).
+
+    Agent positions, types and alive flags are stored as contiguous arrays, resources as a
+    grid, and every interaction is resolved for all agents with a few array operations, so
+    that the environment scales to thousands of agents on large grids.
+
+    ### Action Space
+
+    A `(n_agents,)` array of actions `{0, 1, 2, 3}` (up, right, down, left), herbivores first.
+    The actions of dead agents are ignored.
+
+    ### Observation Space
+
+    A `(n_agents, 2, 4)` array holding the `Ecosys-v0` observation of every agent. The food
+    array points to the direction with the highest 1/distance^2 sum over the entities in the
+    agent's diet within `view_radius` cells along each axis. Dead agents observe zeros.
+
+    ### Rewards
+
+    | Reward                 | Description                                       |
+    |------------------------|---------------------------------------------------|
+    | +10 per entity eaten   | The agent eats resources or herbivores            |
+    | -100                   | The agent crosses the grid boundary or is eaten   |
+    | -1./(2*(grid_dim - 1)) | Otherwise                                         |
+    | 0                      | The agent is dead                                 |
+
+    ### Episode End
+
+    `terminated[i]` is set once agent `i` is dead, and `truncated[i]` for the agents alive
+    after `max_episode_steps` steps.
+
+    ### Arguments
+
+    ```
+    gym.make('EcosysMultiAgent-v0', grid_dim=1000, n_herbivores=9000, n_carnivores=1000)
+    ```
+
+    `reset(options=...)` accepts `grid_dim`, `n_herbivores`, `n_carnivores` and `n_resources`.
+    '''
+
+    metadata = {
+        'render_modes': ['rgb_array'],
+        'render_fps': 10,
+    }
+
+    # Entity types of the agents, in the order of the agent arrays
+    agent_types = (Herbivore, Carnivore)
+
+    def __init__(
+        self,
+        grid_dim: int = 100,
+        n_herbivores: int = 100,
+        n_carnivores: int = 10,
+        n_resources: int = 2000,
+        view_radius: int = 8,
+        regrowth_steps: Optional[int] = 100,
+        max_episode_steps: int = 500,
+        render_mode: Optional[str] = None,
+        render_scale: int = 1
+    ):
+        super(EcosysMultiAgentEnv, self).__init__()
+        # Grid dimension, number of agents of each type and number of resources
+        self.grid_dim = grid_dim
+        self.n_herbivores = n_herbivores
+        self.n_carnivores = n_carnivores
+        self.n_resources = n_resources
+        # Half width of the square window agents see food in
+        self.view_radius = view_radius
+        # Steps after which an eaten resource grows back
+        self.regrowth_steps = regrowth_steps
+        # Episode length after which the agents are truncated
+        self.max_episode_steps = max_episode_steps
+        self._set_spaces()
+        # Rendering
+        self.render_mode = render_mode
+        self.render_scale = render_scale
+        # Initialize state
+        self.state = None
+
+    @property
+    def n_agents(self) -> int:
+        return self.n_herbivores + self.n_carnivores
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[dict] = None
+    ) -> tuple[numpy.ndarray, dict]:
+        '''Reset the environment state.'''
+        super().reset(seed=seed)
+        # Parse options
+        if options is not None:
+            for key in ('grid_dim', 'n_herbivores', 'n_carnivores', 'n_resources'):
+                if key in options:
+                    setattr(self, key, options[key])
+            self._set_spaces()
+        grid_dim, radius = self.grid_dim, self.view_radius
+        # Randomly place agents and resources on distinct cells
+        cells = sample_cells(self.np_random, 1, grid_dim, self.n_agents + self.n_resources)[0]
+        agent_cells, res_cells = cells[:self.n_agents], cells[self.n_agents:]
+        self._pos = numpy.stack([agent_cells // grid_dim, agent_cells % grid_dim], axis=1)
+        self._type = numpy.repeat(
+            [Herbivore.type_id, Carnivore.type_id], [self.n_herbivores, self.n_carnivores]).astype(numpy.int8)
+        self._alive = numpy.ones(self.n_agents, dtype=bool)
+        self._steps = 0
+        # Food grids, padded by the view radius so that every agent sees a full window:
+        # the resources, and the number of alive agents of each type on every cell (up to 255)
+        self._padded_dim = grid_dim + 2*radius
+        self._food_grids = {Resource.type_id: numpy.zeros((self._padded_dim, self._padded_dim), dtype=numpy.uint8)}
+        self._food_grids[Resource.type_id].reshape(-1)[self._cells(res_cells // grid_dim, res_cells % grid_dim)] = 1
+        self._n_remaining = self.n_resources
+        # Cells of the food grids holding the agent counts
+        self._food_cells = {}
+        for agent_type in self.agent_types:
+            self._food_grids[agent_type.type_id] = numpy.zeros((self._padded_dim, self._padded_dim), dtype=numpy.uint8)
+            self._food_cells[agent_type.type_id] = numpy.zeros(0, dtype=numpy.int64)
+        # Cells of the resources eaten at each of the last regrowth_steps steps
+        self._regrowth: collections.deque = collections.deque()
+        # Update state and info
+        self._update_food_grids()
+        self.state = self._get_obs()
+        return self.state, self._get_info()
+
+    def step(
+        self,
+        actions: numpy.ndarray
+    ) -> tuple[numpy.ndarray, numpy.ndarray, numpy.ndarray, numpy.ndarray, dict]:
+        '''Execute one time step for every agent.'''
+        # Error handling
+        actions = numpy.asarray(actions, dtype=numpy.int64)
+        err_msg = f'{actions!r} invalid'
+        assert actions.shape == (self.n_agents,) and ((actions >= 0) & (actions < 4)).all(), err_msg
+        assert self.state is not None, 'Call reset before using step method.'
+        # Perform the actions of the alive agents
+        alive = self._alive
+        self._pos[alive] += MOVES[actions[alive]]
+        rewards = numpy.where(alive, -1./(2*(self.grid_dim - 1)), 0.)
+        # Determine if in wall
+        in_wall = alive & ((self._pos < 0) | (self._pos >= self.grid_dim)).any(axis=1)
+        alive &= ~in_wall
+        rewards[in_wall] = -100.
+        # Agents eat the agents, then the resources, of their diet
+        n_eaten = numpy.zeros(self.n_agents, dtype=numpy.int64)
+        for eater_type in self.agent_types:
+            for food_type in eater_type.default_diet:
+                if food_type is not Resource:
+                    self._eat_agents(eater_type, food_type, n_eaten, rewards)
+        for eater_type in self.agent_types:
+            if Resource in eater_type.default_diet:
+                self._eat_resources(eater_type, n_eaten)
+        has_eaten = alive & (n_eaten > 0)
+        rewards[has_eaten] = 10.*n_eaten[has_eaten]
+        self._regrow()
+        # Make observation
+        self._steps += 1
+        self._update_food_grids()
+        self.state = self._get_obs()
+        terminated = ~alive
+        truncated = alive & (self._steps >= self.max_episode_steps)
+        return self.state, rewards, terminated, truncated, self._get_info()
+
+    @property
+    def palette(self) -> numpy.ndarray:
+        '''Colors of the palette indices returned by render_indices.'''
+        return TYPE_PALETTE
+
+    def render_indices(self) -> numpy.ndarray:
+        '''Rasterize the grid into palette indices, one pixel per cell scaled up to render_scale pixels.'''
+        return upscale(self._render_cells(), self.render_scale)
+
+    def _render_cells(self) -> numpy.ndarray:
+        '''Rasterize the grid into (grid_dim, grid_dim) palette indices, indexed [y, x].'''
+        radius, grid_dim = self.view_radius, self.grid_dim
+        resources = self._food_grids[Resource.type_id][radius:radius+grid_dim, radius:radius+grid_dim]
+        frame = numpy.where(resources > 0, Resource.type_id, 0).astype(numpy.uint8)
+        # Agents, drawn on top
+        alive = numpy.flatnonzero(self._alive)
+        frame[self._pos[alive, 1], self._pos[alive, 0]] = self._type[alive]
+        return frame
+
+    def render(self) -> Optional[numpy.ndarray]:
+        '''Return the grid as an RGB array.'''
+        if self.render_mode is None:
+            gym.logger.warn(
+                'You are calling render method without specifying any render mode. '
+                'You can specify the render_mode at initialization, '
+                'e.g. gym(\'EcosysMultiAgent-v0\', render_mode=\'rgb_array\')'
+            )
+            return None
+        if self.state is None:
+            return None
+        return upscale(to_rgb(self._render_cells(), self.palette), self.render_scale, channels=True)
+
+    def _set_spaces(self) -> None:
+        self.action_space = gym.spaces.MultiDiscrete(numpy.full(self.n_agents, 4))
+        self.observation_space = gym.spaces.MultiBinary([self.n_agents, 2, 4])
+
+    def _agents(self, agent_type: type[Entity]) -> numpy.ndarray:
+        '''Return the indices of the alive agents of a type.'''
+        return numpy.flatnonzero(self._alive & (self._type == agent_type.type_id))
+
+    def _cells(self, x: numpy.ndarray, y: numpy.ndarray) -> numpy.ndarray:
+        '''Return the flat indices of the grid positions (x, y) in the padded food grids.'''
+        return (y + self.view_radius)*self._padded_dim + x + self.view_radius
+
+    def _update_food_grids(self) -> None:
+        '''Count the alive agents of each type on every cell.'''
+        for agent_type in self.agent_types:
+            grid = self._food_grids[agent_type.type_id].reshape(-1)
+            # Clear the previous counts, then write the current ones
+            grid[self._food_cells[agent_type.type_id]] = 0
+            pos = self._pos[self._agents(agent_type)]
+            cells, counts = numpy.unique(self._cells(pos[:, 0], pos[:, 1]), return_counts=True)
+            grid[cells] = numpy.minimum(counts, 255)
+            self._food_cells[agent_type.type_id] = cells
+
+    def _eat_agents(
+        self,
+        eater_type: type[Entity],
+        food_type: type[Entity],
+        n_eaten: numpy.ndarray,
+        rewards: numpy.ndarray
+    ) -> None:
+        '''Let the eaters kill the food agents on their cells, the lowest eater index eating on each cell.'''
+        eaters, food = self._agents(eater_type), self._agents(food_type)
+        if len(eaters) == 0 or len(food) == 0:
+            return
+        # Match the cells of the food agents with the sorted cells of the eaters
+        eater_cells = self._pos[eaters, 1]*self.grid_dim + self._pos[eaters, 0]
+        order = numpy.argsort(eater_cells, kind='stable')
+        eater_cells = eater_cells[order]
+        food_cells = self._pos[food, 1]*self.grid_dim + self._pos[food, 0]
+        match = numpy.minimum(numpy.searchsorted(eater_cells, food_cells), len(eater_cells) - 1)
+        eaten = eater_cells[match] == food_cells
+        self._alive[food[eaten]] = False
+        rewards[food[eaten]] = -100.
+        numpy.add.at(n_eaten, eaters[order[match[eaten]]], 1)
+
+    def _eat_resources(self, eater_type: type[Entity], n_eaten: numpy.ndarray) -> None:
+        '''Let the eaters eat the resources on their cells, the lowest eater index eating on each cell.'''
+        eaters = self._agents(eater_type)
+        grid = self._food_grids[Resource.type_id].reshape(-1)
+        cells = self._cells(self._pos[eaters, 0], self._pos[eaters, 1])
+        on_resource = grid[cells] > 0
+        cells, first = numpy.unique(cells[on_resource], return_index=True)
+        n_eaten[eaters[on_resource][first]] += 1
+        grid[cells] = 0
+        self._n_remaining -= len(cells)
+        if self.regrowth_steps is not None:
+            self._regrowth.append(cells)
+
+    def _regrow(self) -> None:
+        '''Grow back the resources eaten regrowth_steps steps ago.'''
+        if self.regrowth_steps is not None and len(self._regrowth) > self.regrowth_steps:
+            cells = self._regrowth.popleft()
+            self._food_grids[Resource.type_id].reshape(-1)[cells] = 1
+            self._n_remaining += len(cells)
+
+    def _get_obs(self) -> numpy.ndarray:
+        '''Return the observations of every agent, computed per agent type in one batched pass.'''
+        state = numpy.zeros((self.n_agents, 2, 4), dtype=numpy.uint8)
+        width = 2*self.view_radius + 1
+        # Kernels indexed by the offset of the food within the window
+        kernels = food_kernels(self.view_radius + 1)[:, ::-1, ::-1].reshape(4, -1)
+        for agent_type in self.agent_types:
+            idx = self._agents(agent_type)
+            if len(idx) == 0:
+                continue
+            grids = [self._food_grids[food_type.type_id] for food_type in agent_type.default_diet]
+            grid = grids[0] if len(grids) == 1 else sum(grids)
+            # Window of the food grid centred on each agent
+            windows = sliding_window_view(grid, (width, width))[self._pos[idx, 1], self._pos[idx, 0]]
+            food = windows.reshape(len(idx), -1) @ kernels.T
+            state[idx, 0, food_direction(food)] = 1
+        # Compute the wall array
+        x, y = self._pos[:, 0], self._pos[:, 1]
+        state[:, 1, 0] = y == 0               # wall up
+        state[:, 1, 1] = x == self.grid_dim   # wall right
+        state[:, 1, 2] = y == self.grid_dim   # wall down
+        state[:, 1, 3] = x == 0               # wall left
+        state[~self._alive] = 0
+        return state
+
+    def _get_info(self) -> dict:
+        return {
+            'herbivores_alive': int(numpy.count_nonzero(self._alive[:self.n_herbivores])),
+            'carnivores_alive': int(numpy.count_nonzero(self._alive[self.n_herbivores:])),
+            'resources_remaining': self._n_remaining
+        }
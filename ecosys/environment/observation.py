@@ -0,0 +1,91 @@
+import numpy
+from typing import Optional, Sequence
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+# Absolute tolerance below which two food sums are considered equal
+FOOD_ATOL = 1e-12
+
+
+def food_direction(food: numpy.ndarray) -> numpy.ndarray:
+    '''
+    Returns the index of the dominant food direction along the last axis.
+
+    Sums that differ by less than FOOD_ATOL are treated as ties and resolved in
+    favour of the lowest index (up, right, down, left), so that the result does
+    not depend on the order in which the 1/distance^2 terms were accumulated.
+    '''
+    best = numpy.max(food, axis=-1, keepdims=True)
+    return numpy.argmax(food >= best - FOOD_ATOL, axis=-1)
+
+
+# Unpacked (2, 4) observation of every packed byte: bit i is Food i and bit 4+i is Wall i
+UNPACK_TABLE = numpy.unpackbits(
+    numpy.arange(256, dtype=numpy.uint8)[:, None], axis=1, bitorder='little').reshape(256, 2, 4)
+
+
+def pack_obs(state: numpy.ndarray) -> numpy.ndarray:
+    '''Pack (..., 2, 4) binary observations into (...) uint8 bytes.'''
+    state = numpy.asarray(state, dtype=numpy.uint8)
+    return numpy.packbits(state.reshape(state.shape[:-2] + (8,)), axis=-1, bitorder='little')[..., 0]
+
+
+def unpack_obs(packed: numpy.ndarray, out: Optional[numpy.ndarray] = None) -> numpy.ndarray:
+    '''Expand (...) packed uint8 observations into (..., 2, 4) binary observations, optionally into out.'''
+    return numpy.take(UNPACK_TABLE, packed, axis=0, out=out)
+
+
+def pack_food_and_walls(
+    food: Sequence[float],
+    wall_up: bool,
+    wall_right: bool,
+    wall_down: bool,
+    wall_left: bool
+) -> int:
+    '''
+    Return the packed observation of a single herbivore as an int.
+
+    Uses the same tie rule as food_direction on plain Python floats, so that no array is
+    allocated.
+    '''
+    up, right, down, left = food
+    best = max(up, right, down, left) - FOOD_ATOL
+    direction = 0 if up >= best else 1 if right >= best else 2 if down >= best else 3
+    return (1 << direction) | (wall_up << 4) | (wall_right << 5) | (wall_down << 6) | (wall_left << 7)
+
+
+def patch_padding(patch_size: int) -> int:
+    '''Return the padding of the grids patches are taken from, wide enough for a herbivore one cell outside the grid.'''
+    return patch_size // 2 + 1
+
+
+def patch_grids(
+    grid_dims: numpy.ndarray,
+    padded_dim: int,
+    patch_size: int
+) -> numpy.ndarray:
+    '''
+    Return empty (n, padded_dim, padded_dim, 2) patch grids of n grids of grid_dims cells.
+
+    Channel 0 holds the resources and channel 1 the cells outside of each grid (walls), and
+    grid cell (x, y) is at [y + patch_padding(patch_size), x + patch_padding(patch_size)].
+    '''
+    pad = patch_padding(patch_size)
+    grids = numpy.zeros((len(grid_dims), padded_dim, padded_dim, 2), dtype=numpy.uint8)
+    cells = numpy.arange(padded_dim) - pad
+    outside = (cells < 0)[None, :] | (cells[None, :] >= numpy.asarray(grid_dims)[:, None])
+    grids[..., 1] = outside[:, :, None] | outside[:, None, :]
+    return grids
+
+
+def local_patches(
+    grids: numpy.ndarray,
+    x: numpy.ndarray,
+    y: numpy.ndarray,
+    patch_size: int
+) -> numpy.ndarray:
+    '''Return the (n, patch_size, patch_size, C) patches of the (n, H, W, C) patch grids centred on (x, y).'''
+    windows = sliding_window_view(grids, (patch_size, patch_size), axis=(1, 2))
+    # Window starting at [y + 1, x + 1] is centred on [y + pad, x + pad]
+    patches = windows[numpy.arange(len(grids)), numpy.asarray(y) + 1, numpy.asarray(x) + 1]
+    return numpy.ascontiguousarray(patches.transpose(0, 2, 3, 1))
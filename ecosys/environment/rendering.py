@@ -0,0 +1,53 @@
+import numpy
+from ecosys.environment.entities import Resource, Herbivore, Carnivore
+
+
+# Palette indexed by entity type id, index 0 (the empty cell) is black
+TYPE_PALETTE = numpy.array(
+    [(0, 0, 0), Resource.default_color, Herbivore.default_color, Carnivore.default_color], dtype=numpy.uint8)
+
+
+def rasterize(
+    grid_dim: int,
+    herb: numpy.ndarray,
+    res: numpy.ndarray,
+    alive: numpy.ndarray,
+    res_color: int = Resource.type_id,
+    herb_color: int = Herbivore.type_id
+) -> numpy.ndarray:
+    '''
+    Rasterize a batch of grids into (N, grid_dim, grid_dim) palette indices, indexed [y, x].
+
+    herb holds the (N, 2) herbivore positions, res and alive the (N, R, 2) resource positions
+    and (N, R) alive masks. Herbivores outside of the grid are not drawn.
+    '''
+    n = len(herb)
+    frames = numpy.zeros((n, grid_dim, grid_dim), dtype=numpy.uint8)
+    # Resources
+    env_idx, res_idx = numpy.nonzero(alive)
+    frames[env_idx, res[env_idx, res_idx, 1], res[env_idx, res_idx, 0]] = res_color
+    # Herbivores, drawn on top
+    in_grid = ((herb >= 0) & (herb < grid_dim)).all(axis=1)
+    frames[numpy.flatnonzero(in_grid), herb[in_grid, 1], herb[in_grid, 0]] = herb_color
+    return frames
+
+
+def upscale(
+    frames: numpy.ndarray,
+    scale: int,
+    channels: bool = False
+) -> numpy.ndarray:
+    '''Turn every cell of [..., H, W] frames (or [..., H, W, C] with channels) into a scale x scale block of pixels.'''
+    if channels:
+        *batch, height, width, n_channels = frames.shape
+        blocks = numpy.broadcast_to(
+            frames[..., :, None, :, None, :], (*batch, height, scale, width, scale, n_channels))
+        return blocks.reshape(*batch, height*scale, width*scale, n_channels)
+    *batch, height, width = frames.shape
+    blocks = numpy.broadcast_to(frames[..., :, None, :, None], (*batch, height, scale, width, scale))
+    return blocks.reshape(*batch, height*scale, width*scale)
+
+
+def to_rgb(frames: numpy.ndarray, palette: numpy.ndarray) -> numpy.ndarray:
+    '''Map [..., H, W] palette indices to [..., H, W, 3] uint8 colors.'''
+    return numpy.asarray(palette, dtype=numpy.uint8)[frames]
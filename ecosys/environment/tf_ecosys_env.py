@@ -0,0 +1,143 @@
+import numpy
+from typing import Optional
+import gym
+from gym.utils import seeding
+import tensorflow as tf
+from ecosys.environment.layouts import sample_layout
+from ecosys.environment.observation import FOOD_ATOL
+
+
+# Herbivore displacement (dx, dy) for each action: up, right, down, left
+MOVES = numpy.array([[0, -1], [1, 0], [0, 1], [-1, 0]], dtype=numpy.int32)
+
+
+class TFEcosysEnv(tf.Module):
+    '''
+    ### Description
+
+    TensorFlow implementation of `Ecosys-v0`. The state of the environment lives in
+    TensorFlow variables and `step` is made of TensorFlow operations only, so that it can
+    run inside a `tf.function` (optionally XLA compiled) without leaving the graph.
+
+    Actions, observations, rewards and episode termination follow `EcosysEnv` exactly;
+    `step` returns the state, reward and terminated flag as tensors. As with the raw
+    `EcosysEnv`, truncation is left to the caller.
+
+    `reset` runs eagerly and places the entities with the same sampler as `EcosysEnv`,
+    drawing from a NumPy generator seeded by `reset(seed=...)`.
+    '''
+
+    def __init__(self):
+        super(TFEcosysEnv, self).__init__()
+        # Grid dimension
+        self.grid_dim = 10
+        # Number of resources to be generated inside the grid
+        self.n_resources = 20
+        # Action space
+        self.action_space = gym.spaces.Discrete(4)
+        # Observation space
+        self.observation_space = gym.spaces.MultiBinary([2, 4])
+        # Random number generator of the layouts
+        self.np_random = None
+        # State variables
+        self._grid_dim = tf.Variable(self.grid_dim, dtype=tf.int32, trainable=False)
+        self._herb = tf.Variable(tf.zeros([2], dtype=tf.int32), trainable=False)
+        self._res = tf.Variable(
+            tf.zeros([self.n_resources, 2], dtype=tf.int32), shape=tf.TensorShape([None, 2]), trainable=False)
+        self._alive = tf.Variable(
+            tf.zeros([self.n_resources], dtype=tf.bool), shape=tf.TensorShape([None]), trainable=False)
+
+    def reset(
+        self,
+        *,
+        seed: Optional[int] = None,
+        options: Optional[dict] = None
+    ) -> tuple[tf.Tensor, dict]:
+        '''Reset the environment state.'''
+        if seed is not None or self.np_random is None:
+            self.np_random, _ = seeding.np_random(seed)
+        # Parse options
+        if options is not None:
+            self.grid_dim = options.get('grid_dim') if 'grid_dim' in options else self.grid_dim
+            self.n_resources = options.get('n_resources') if 'n_resources' in options else self.n_resources
+        # Randomly generate entities on the grid
+        return self.set_layout(sample_layout(self.np_random, self.grid_dim, self.n_resources))
+
+    @property
+    def unwrapped(self) -> 'TFEcosysEnv':
+        '''The environment itself, as for a gym environment without wrappers.'''
+        return self
+
+    def set_layout(self, coords: numpy.ndarray) -> tuple[tf.Tensor, dict]:
+        '''Place the herbivore at coords[0] and the resources at coords[1:].'''
+        coords = numpy.asarray(coords, dtype=numpy.int32)
+        self._grid_dim.assign(self.grid_dim)
+        self._herb.assign(coords[0])
+        self._res.assign(coords[1:])
+        self._alive.assign(numpy.ones(len(coords) - 1, dtype=bool))
+        return self._get_obs(), self._get_info()
+
+    def step(
+        self,
+        action: tf.Tensor
+    ) -> tuple[tf.Tensor, tf.Tensor, tf.Tensor]:
+        '''Execute one time step within the environment.'''
+        # Perform the action
+        herb = self._herb.assign_add(tf.gather(tf.constant(MOVES), tf.cast(action, tf.int32)))
+        # Determine if in wall
+        is_in_wall = tf.reduce_any((herb < 0) | (herb >= self._grid_dim))
+        # Interact with resources
+        eaten = self._alive & tf.reduce_all(self._res == herb, axis=1)
+        alive = self._alive.assign(self._alive & ~eaten)
+        has_eaten = tf.reduce_any(eaten)
+        all_eaten = ~tf.reduce_any(alive)
+        # Make observation
+        state = self._get_obs()
+        # Calculate reward
+        default_reward = -1. / (2. * tf.cast(self._grid_dim - 1, tf.float32))
+        reward = tf.where(
+            all_eaten, 100.,
+            tf.where(has_eaten, 10., tf.where(is_in_wall, -100., default_reward))
+        )
+        # Determine if done
+        terminated = all_eaten | is_in_wall
+        return state, reward, terminated
+
+    def _get_obs(self) -> tf.Tensor:
+        '''Return the current state of the environment.'''
+        herb = tf.convert_to_tensor(self._herb)
+        herb_x, herb_y = herb[0], herb[1]
+        # Compute the food array
+        dx = self._res[:, 0] - herb_x
+        dy = self._res[:, 1] - herb_y
+        dist = tf.cast(tf.abs(dx) + tf.abs(dy), tf.float64)
+        zeros = tf.zeros_like(dist)
+        inv_square_dist = tf.where(self._alive, 1. / tf.maximum(dist, 1.)**2, zeros)
+        food = tf.stack(
+            [
+                tf.reduce_sum(tf.where(dy < 0, inv_square_dist, zeros)),  # food up
+                tf.reduce_sum(tf.where(dx > 0, inv_square_dist, zeros)),  # food right
+                tf.reduce_sum(tf.where(dy > 0, inv_square_dist, zeros)),  # food down
+                tf.reduce_sum(tf.where(dx < 0, inv_square_dist, zeros))   # food left
+            ]
+        )
+        # Sums within FOOD_ATOL of the best are ties, resolved in favour of the lowest index
+        is_best = food >= tf.reduce_max(food) - FOOD_ATOL
+        idx = tf.reduce_min(tf.where(is_best, tf.range(4), 4))
+        # Compute the wall array
+        wall = tf.stack(
+            [
+                herb_y == 0,               # wall up
+                herb_x == self._grid_dim,  # wall right
+                herb_y == self._grid_dim,  # wall down
+                herb_x == 0                # wall left
+            ]
+        )
+        # Create state array
+        return tf.stack([tf.one_hot(idx, 4, dtype=tf.uint8), tf.cast(wall, tf.uint8)])
+
+    def _get_info(self) -> dict:
+        return {
+            'herbivore_pos': tf.convert_to_tensor(self._herb),
+            'resources_remaining': tf.reduce_sum(tf.cast(self._alive, tf.int32))
+        }
@@ -0,0 +1,379 @@
+import os
+import time
+import queue
+import struct
+import threading
+import numpy
+from typing import Any, Iterator, NamedTuple, Optional
+import gym
+from gym.utils import seeding
+from ecosys.environment.ecosys_env import EcosysEnv
+from ecosys.environment.video import open_writer
+
+
+# File signature, followed by the little-endian uint16 format version
+MAGIC = b'ECOTRACE'
+VERSION = 2
+# Every record is a one byte tag and the uint32 length of its payload
+RECORD_HEADER = struct.Struct('<cI')
+RESET_TAG, STEPS_TAG = b'R', b'S'
+# Payload of a reset record: wall-clock time, reset seed (-1 if none), grid dimension, number of resources,
+# and the PCG64 state (state and increment as 16 little-endian bytes each) of the generator before the reset
+RESET_RECORD = struct.Struct('<dqII32sBI')
+# Payload of a steps record: an array of steps, with the time spent in env.step and since the previous step returned
+STEP_DTYPE = numpy.dtype([
+    ('action', 'u1'),
+    ('flags', 'u1'),
+    ('reward', '<f4'),
+    ('env_us', '<u4'),
+    ('agent_us', '<u4'),
+])
+TERMINATED, TRUNCATED = 1, 2
+# Longest time a step record holds, in microseconds
+MAX_US = 2**32 - 1
+
+
+class EpisodeTrace(NamedTuple):
+    '''Recorded episode: the reset parameters and the per-step actions, rewards, flags and timings.'''
+    start_time: float
+    seed: Optional[int]
+    grid_dim: int
+    n_resources: int
+    rng_state: dict[str, Any]
+    actions: numpy.ndarray        # [T] uint8
+    rewards: numpy.ndarray        # [T] float32
+    terminated: numpy.ndarray     # [T] bool
+    truncated: numpy.ndarray      # [T] bool
+    env_seconds: numpy.ndarray    # [T] float64, time spent in env.step
+    agent_seconds: numpy.ndarray  # [T] float64, time between the previous step (or reset) and env.step
+
+
+def _encode_rng(state: dict[str, Any]) -> tuple[bytes, int, int]:
+    assert state['bit_generator'] == 'PCG64', f'Only PCG64 generators can be traced, got {state["bit_generator"]}.'
+    rng = state['state']['state'].to_bytes(16, 'little') + state['state']['inc'].to_bytes(16, 'little')
+    return rng, state['has_uint32'], state['uinteger']
+
+
+def _decode_rng(rng: bytes, has_uint32: int, uinteger: int) -> dict[str, Any]:
+    return {
+        'bit_generator': 'PCG64',
+        'state': {'state': int.from_bytes(rng[:16], 'little'), 'inc': int.from_bytes(rng[16:], 'little')},
+        'has_uint32': has_uint32,
+        'uinteger': uinteger,
+    }
+
+
+def _scan_records(file) -> tuple[list[tuple[bytes, int, int]], int]:
+    '''Return the (tag, offset, length) of the complete records of an open trace file, and where the last one ends.'''
+    size = os.fstat(file.fileno()).st_size
+    # The header of a new trace may not have reached the disk yet
+    if size == 0:
+        return [], 0
+    file.seek(0)
+    header = file.read(len(MAGIC) + 2)
+    assert header[:len(MAGIC)] == MAGIC, f'{file.name} is not an ecosys trace.'
+    version, = struct.unpack('<H', header[len(MAGIC):])
+    assert version == VERSION, f'Unsupported trace version {version}.'
+    records = []
+    offset = file.tell()
+    while offset + RECORD_HEADER.size <= size:
+        tag, length = RECORD_HEADER.unpack(file.read(RECORD_HEADER.size))
+        if offset + RECORD_HEADER.size + length > size:
+            break
+        records.append((tag, offset + RECORD_HEADER.size, length))
+        offset += RECORD_HEADER.size + length
+        file.seek(offset)
+    return records, offset
+
+
+class TraceWriter:
+    '''
+    Append-only binary trace of episodes, written on a background thread.
+
+    begin_episode packs a reset record and step appends the step to a Python list. Every
+    buffer_steps steps and resets the records are handed to the writer thread, which packs
+    the steps into steps records and writes them, so that the caller only pays for a list
+    append per step. flush and close hand over the records buffered so far. Records are
+    length-prefixed, so a trace cut short by a crash reads up to its last complete record,
+    and opening an existing trace drops any incomplete record and appends to it. At most
+    max_pending buffers wait to be written before step blocks.
+    '''
+    def __init__(
+        self,
+        path: str,
+        buffer_steps: int = 4096,
+        max_pending: int = 16
+    ):
+        self.path = path
+        self.buffer_steps = buffer_steps
+        self._file = open(path, 'ab+')
+        if self._file.tell() == 0:
+            self._file.write(MAGIC + struct.pack('<H', VERSION))
+        else:
+            self._file.truncate(_scan_records(self._file)[1])
+        # Records buffered since the last hand over, the steps of the last one are still being appended to
+        self._steps: list[tuple] = []
+        self._records: list[tuple[bytes, Any]] = [(STEPS_TAG, self._steps)]
+        self._buffered = 0
+        self._queue: queue.Queue = queue.Queue(maxsize=max_pending)
+        self._error: Optional[BaseException] = None
+        self._thread = threading.Thread(target=self._write_loop, name='trace-writer', daemon=True)
+        self._thread.start()
+
+    def __enter__(self) -> 'TraceWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def begin_episode(
+        self,
+        seed: Optional[int],
+        grid_dim: int,
+        n_resources: int,
+        rng_state: dict[str, Any]
+    ) -> None:
+        '''Start an episode reset with seed from the generator state rng_state, on a grid_dim grid with n_resources.'''
+        self._check_error()
+        seed = -1 if seed is None else seed
+        self._records.append((RESET_TAG, RESET_RECORD.pack(time.time(), seed, grid_dim, n_resources, *_encode_rng(rng_state))))
+        self._steps = []
+        self._records.append((STEPS_TAG, self._steps))
+        self._buffered += 1
+
+    def step(
+        self,
+        action: int,
+        reward: float,
+        terminated: bool,
+        truncated: bool,
+        env_us: int,
+        agent_us: int
+    ) -> None:
+        '''Record a step of the current episode, with its env.step and agent times in microseconds.'''
+        self._steps.append((action, terminated | (truncated << 1), reward, env_us, agent_us))
+        self._buffered += 1
+        if self._buffered >= self.buffer_steps:
+            self._submit()
+
+    def flush(self) -> None:
+        '''Block until the buffered steps are written to the file.'''
+        self._submit()
+        self._queue.join()
+        self._check_error()
+
+    def close(self) -> None:
+        '''Write the buffered steps, stop the writer thread and close the file.'''
+        if self._file.closed:
+            return
+        self._submit()
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._check_error()
+
+    def _submit(self) -> None:
+        '''Hand the buffered records over to the writer thread, continuing the current episode in a new steps record.'''
+        self._check_error()
+        if self._buffered > 0:
+            self._queue.put(self._records)
+        self._steps = []
+        self._records = [(STEPS_TAG, self._steps)]
+        self._buffered = 0
+
+    def _check_error(self) -> None:
+        if self._error is not None:
+            raise RuntimeError(f'Writing the trace {self.path} failed.') from self._error
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None:
+                    for tag, payload in item:
+                        if tag == STEPS_TAG:
+                            if not payload:
+                                continue
+                            payload = numpy.array(payload, dtype=STEP_DTYPE).tobytes()
+                        self._file.write(RECORD_HEADER.pack(tag, len(payload)) + payload)
+                    # Flush once the backlog is written, so that readers see complete records
+                    if self._queue.empty():
+                        self._file.flush()
+            except BaseException as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+
+class TraceReader:
+    '''
+    Random access to the episodes of a trace written by TraceWriter.
+
+    The file is scanned once for the offsets of its records, and an episode is only read
+    when it is accessed. A record cut short at the end of the file is ignored.
+    '''
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        # (offset, length) of the reset record and of the steps records of every episode
+        self._episodes: list[tuple[tuple[int, int], list[tuple[int, int]]]] = []
+        for tag, offset, length in _scan_records(self._file)[0]:
+            if tag == RESET_TAG:
+                self._episodes.append(((offset, length), []))
+            elif tag == STEPS_TAG and self._episodes:
+                self._episodes[-1][1].append((offset, length))
+
+    def __len__(self) -> int:
+        return len(self._episodes)
+
+    def __enter__(self) -> 'TraceReader':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __getitem__(self, episode: int) -> EpisodeTrace:
+        (offset, length), step_records = self._episodes[episode]
+        start_time, seed, grid_dim, n_resources, *rng = RESET_RECORD.unpack(self._read(offset, length))
+        payload = b''.join(self._read(*record) for record in step_records)
+        steps = numpy.frombuffer(payload, dtype=STEP_DTYPE)
+        return EpisodeTrace(
+            start_time=start_time,
+            seed=None if seed < 0 else seed,
+            grid_dim=grid_dim,
+            n_resources=n_resources,
+            rng_state=_decode_rng(*rng),
+            actions=steps['action'].copy(),
+            rewards=steps['reward'].copy(),
+            terminated=(steps['flags'] & TERMINATED) > 0,
+            truncated=(steps['flags'] & TRUNCATED) > 0,
+            env_seconds=steps['env_us'] * 1e-6,
+            agent_seconds=steps['agent_us'] * 1e-6,
+        )
+
+    def __iter__(self) -> Iterator[EpisodeTrace]:
+        for episode in range(len(self)):
+            yield self[episode]
+
+    def close(self) -> None:
+        self._file.close()
+
+    def _read(self, offset: int, length: int) -> bytes:
+        self._file.seek(offset)
+        return self._file.read(length)
+
+
+class RecordTrace(gym.Wrapper):
+    '''
+    Record the episodes of an EcosysEnv to a binary trace while it runs.
+
+    Each reset records the seed, the grid and the state of the environment generator before
+    the layout is drawn, and each step the action, the reward, the done flags and the time
+    spent in env.step and by the caller since the previous step. This is enough for
+    TraceReplayer to rebuild every state of an episode, so no state is stored.
+    '''
+    def __init__(
+        self,
+        env: gym.Env,
+        path: str,
+        buffer_steps: int = 4096
+    ):
+        super(RecordTrace, self).__init__(env)
+        self.writer = TraceWriter(path, buffer_steps)
+        self._last = time.perf_counter_ns()
+
+    def reset(self, *, seed: Optional[int] = None, options: Optional[dict] = None):
+        unwrapped = self.env.unwrapped
+        # Seed here rather than in reset, so that the generator state the layout is drawn from can be recorded
+        if seed is not None:
+            unwrapped.np_random, _ = seeding.np_random(seed)
+        rng_state = unwrapped.np_random.bit_generator.state
+        result = self.env.reset(options=options)
+        self.writer.begin_episode(seed, unwrapped.grid_dim, unwrapped.n_resources, rng_state)
+        self._last = time.perf_counter_ns()
+        return result
+
+    def step(self, action):
+        start = time.perf_counter_ns()
+        result = self.env.step(action)
+        self._last, agent_ns = time.perf_counter_ns(), start - self._last
+        env_us, agent_us = min((self._last - start) // 1000, MAX_US), min(agent_ns // 1000, MAX_US)
+        self.writer.step(int(action), result[1], result[2], result[3], env_us, agent_us)
+        return result
+
+    def close(self) -> None:
+        self.writer.close()
+        super().close()
+
+
+class ReplayStep(NamedTuple):
+    '''State of a replayed episode after its reset (t = 0) or its step t.'''
+    t: int
+    obs: numpy.ndarray
+    reward: float
+    terminated: bool
+    truncated: bool
+    info: dict
+
+
+class TraceReplayer:
+    '''
+    Rebuild the episodes of a trace by replaying their actions from the recorded generator state.
+
+    env must be created like the recorded one (in particular with the same layout_cache),
+    with any observation type and render mode; it defaults to a new EcosysEnv. With verify
+    the replayed rewards and terminations are checked against the recorded ones, raising a
+    RuntimeError at the first step where they diverge.
+    '''
+    def __init__(
+        self,
+        path: str,
+        env: Optional[gym.Env] = None
+    ):
+        self.reader = TraceReader(path)
+        self.env = env if env is not None else EcosysEnv()
+
+    def __len__(self) -> int:
+        return len(self.reader)
+
+    def __enter__(self) -> 'TraceReplayer':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def replay(self, episode: int, verify: bool = True) -> Iterator[ReplayStep]:
+        '''Reset the environment to the start of the episode and step it through its actions.'''
+        trace = self.reader[episode]
+        unwrapped = self.env.unwrapped
+        unwrapped.np_random = numpy.random.Generator(numpy.random.PCG64())
+        unwrapped.np_random.bit_generator.state = trace.rng_state
+        obs, info = self.env.reset(options={'grid_dim': trace.grid_dim, 'n_resources': trace.n_resources})
+        yield ReplayStep(0, obs, 0., False, False, info)
+        for t, action in enumerate(trace.actions.tolist()):
+            obs, reward, terminated, truncated, info = self.env.step(action)
+            if verify and (numpy.float32(reward) != trace.rewards[t] or terminated != trace.terminated[t]):
+                raise RuntimeError(f'Replay of episode {episode} diverged from the trace at step {t + 1}.')
+            yield ReplayStep(t + 1, obs, reward, terminated, truncated, info)
+
+    def render(
+        self,
+        episode: int,
+        path: str,
+        fps: Optional[float] = None
+    ) -> None:
+        '''Write the replayed episode to a .gif (or, with ffmpeg, video) file.'''
+        fps = fps if fps is not None else self.env.metadata.get('render_fps', 10)
+        steps = self.replay(episode)
+        # The palette is known once the episode is reset
+        next(steps)
+        with open_writer(path, self.env.unwrapped.palette, fps) as writer:
+            writer.write(self.env.unwrapped.render_indices())
+            for _ in steps:
+                writer.write(self.env.unwrapped.render_indices())
+
+    def close(self) -> None:
+        self.reader.close()
+        self.env.close()
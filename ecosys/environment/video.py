@@ -0,0 +1,217 @@
+import shutil
+import subprocess
+import numpy
+from typing import Optional
+import gym
+from gym.error import DependencyNotInstalled
+
+
+class GifWriter:
+    '''
+    Stream palette-indexed frames to an animated GIF file.
+
+    Each frame only stores the rectangle of pixels that changed since the previous one, and
+    identical frames extend the display time of the previous frame, so that an episode where
+    a few cells change per step costs little more than its first frame. Pixel data is written
+    with fixed-width LZW codes (a clear code every few pixels), which needs no dictionary and
+    is packed with NumPy.
+    '''
+    def __init__(
+        self,
+        path: str,
+        palette: numpy.ndarray,
+        fps: float = 10
+    ):
+        self.palette = numpy.asarray(palette, dtype=numpy.uint8)
+        assert 1 <= len(self.palette) <= 256, f'GIF palettes hold at most 256 colors, got {len(self.palette)}.'
+        # Frame display time, in hundredths of a second
+        self.delay = max(1, round(100/fps))
+        self._file = open(path, 'wb')
+        self._previous = None
+        self._pending = None
+        # LZW minimum code size, at least 2 as required by the format
+        self._min_code_size = max(2, int(numpy.ceil(numpy.log2(len(self.palette)))))
+
+    def __enter__(self) -> 'GifWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, frame: numpy.ndarray) -> None:
+        '''Append a (H, W) frame of palette indices.'''
+        frame = numpy.asarray(frame, dtype=numpy.uint8)
+        if self._previous is None:
+            self._write_header(*frame.shape)
+            box = (0, 0, frame.shape[0], frame.shape[1])
+        else:
+            assert frame.shape == self._previous.shape, 'All frames must have the same shape.'
+            changed = frame != self._previous
+            if not changed.any():
+                # Show the previous frame for longer
+                self._pending[1] += self.delay
+                return
+            rows, cols = numpy.flatnonzero(changed.any(axis=1)), numpy.flatnonzero(changed.any(axis=0))
+            box = (rows[0], cols[0], rows[-1] + 1, cols[-1] + 1)
+        self._flush_pending()
+        self._pending = [(box, frame[box[0]:box[2], box[1]:box[3]]), self.delay]
+        self._previous = frame
+
+    def close(self) -> None:
+        '''Write the pending frame and the trailer, and close the file.'''
+        if self._file.closed:
+            return
+        self._flush_pending()
+        if self._previous is not None:
+            self._file.write(b'\x3b')
+        self._file.close()
+
+    def _write_header(self, height: int, width: int) -> None:
+        # Global color table of 2^(n+1) colors
+        n = max(0, int(numpy.ceil(numpy.log2(len(self.palette)))) - 1)
+        table = numpy.zeros((2**(n+1), 3), dtype=numpy.uint8)
+        table[:len(self.palette)] = self.palette
+        self._file.write(b'GIF89a')
+        self._file.write(numpy.array([width, height], dtype='<u2').tobytes() + bytes([0xf0 | n, 0, 0]))
+        self._file.write(table.tobytes())
+        # Loop forever
+        self._file.write(b'\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00')
+
+    def _flush_pending(self) -> None:
+        if self._pending is None:
+            return
+        ((top, left, bottom, right), pixels), delay = self._pending
+        # Graphic control extension: leave the frame in place, display it for delay
+        self._file.write(b'\x21\xf9\x04\x04' + numpy.array([delay], dtype='<u2').tobytes() + b'\x00\x00')
+        # Image descriptor, without local color table
+        self._file.write(b'\x2c' + numpy.array([left, top, right - left, bottom - top], dtype='<u2').tobytes() + b'\x00')
+        data = _lzw_uncompressed(pixels.ravel(), self._min_code_size)
+        self._file.write(bytes([self._min_code_size]))
+        for start in range(0, len(data), 255):
+            block = data[start:start+255]
+            self._file.write(bytes([len(block)]) + block)
+        self._file.write(b'\x00')
+        self._pending = None
+
+
+def _lzw_uncompressed(pixels: numpy.ndarray, min_code_size: int) -> bytes:
+    '''
+    Encode pixels as a GIF LZW stream of fixed-width codes.
+
+    The decoder adds a dictionary entry for every code after the first following a clear
+    code, and widens the codes once the dictionary is full, so a clear code is sent every
+    2^min_code_size - 2 pixels to keep the code width at min_code_size + 1 bits.
+    '''
+    clear = 2**min_code_size
+    width = min_code_size + 1
+    group = clear - 2
+    n_groups = -(-len(pixels) // group)
+    codes = numpy.full((n_groups, group + 1), -1, dtype=numpy.int64)
+    codes[:, 0] = clear
+    codes[:, 1:].flat[:len(pixels)] = pixels
+    codes = numpy.append(codes[codes >= 0], clear + 1)
+    # Pack the codes least significant bit first
+    bits = (codes[:, None] >> numpy.arange(width)) & 1
+    return numpy.packbits(bits.astype(numpy.uint8).ravel(), bitorder='little').tobytes()
+
+
+class FFmpegWriter:
+    '''Stream palette-indexed frames to a video file encoded by an ffmpeg subprocess.'''
+    def __init__(
+        self,
+        path: str,
+        palette: numpy.ndarray,
+        fps: float = 10
+    ):
+        if shutil.which('ffmpeg') is None:
+            raise DependencyNotInstalled('ffmpeg is not installed, it is needed to write videos other than GIF')
+        self.path = path
+        self.palette = numpy.asarray(palette, dtype=numpy.uint8)
+        self.fps = fps
+        self._process = None
+
+    def __enter__(self) -> 'FFmpegWriter':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def write(self, frame: numpy.ndarray) -> None:
+        '''Append a (H, W) frame of palette indices.'''
+        if self._process is None:
+            height, width = frame.shape
+            self._process = subprocess.Popen(
+                [
+                    'ffmpeg', '-y', '-loglevel', 'error',
+                    '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f'{width}x{height}', '-r', str(self.fps), '-i', '-',
+                    '-pix_fmt', 'yuv420p', self.path
+                ],
+                stdin=subprocess.PIPE
+            )
+        self._process.stdin.write(self.palette[frame].tobytes())
+
+    def close(self) -> None:
+        if self._process is not None:
+            self._process.stdin.close()
+            self._process.wait()
+            self._process = None
+
+
+def open_writer(
+    path: str,
+    palette: numpy.ndarray,
+    fps: float = 10
+):
+    '''Return a GifWriter for .gif paths, and an FFmpegWriter otherwise.'''
+    if str(path).endswith('.gif'):
+        return GifWriter(path, palette, fps)
+    return FFmpegWriter(path, palette, fps)
+
+
+class RecordEpisodes(gym.Wrapper):
+    '''
+    Stream the episodes of an EcosysEnv to GIF or video files while it runs.
+
+    The episodes whose index passes episode_trigger (every episode by default) are written
+    to path.format(episode=index), frame by frame, from the palette indices of the grid, so
+    recording needs no rgb_array render and no screen.
+    '''
+    def __init__(
+        self,
+        env: gym.Env,
+        path: str,
+        fps: Optional[float] = None,
+        episode_trigger=None
+    ):
+        super(RecordEpisodes, self).__init__(env)
+        self.path = path
+        self.fps = fps if fps is not None else env.metadata.get('render_fps', 10)
+        self.episode_trigger = episode_trigger
+        self.episode = -1
+        self._writer = None
+
+    def reset(self, **kwargs):
+        self._close_writer()
+        result = self.env.reset(**kwargs)
+        self.episode += 1
+        if self.episode_trigger is None or self.episode_trigger(self.episode):
+            self._writer = open_writer(self.path.format(episode=self.episode), self.env.unwrapped.palette, self.fps)
+            self._writer.write(self.env.unwrapped.render_indices())
+        return result
+
+    def step(self, action):
+        result = self.env.step(action)
+        if self._writer is not None:
+            self._writer.write(self.env.unwrapped.render_indices())
+            if result[2] or result[3]:
+                self._close_writer()
+        return result
+
+    def close(self) -> None:
+        self._close_writer()
+        super().close()
+
+    def _close_writer(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -0,0 +1,2 @@
+from ecosys.evaluation.harness import EpisodeResults, evaluate
+from ecosys.evaluation.stats import Estimate, compare, confidence_interval, summarize
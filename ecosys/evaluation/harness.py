@@ -0,0 +1,65 @@
+import numpy
+from typing import Callable, NamedTuple
+from ecosys.environment import EcosysVectorEnv
+
+
+class EpisodeResults(NamedTuple):
+    '''Per-episode outcomes of an evaluation, indexed by episode.'''
+    seeds: numpy.ndarray        # Seed of the layout of each episode
+    returns: numpy.ndarray      # Sum of the rewards
+    lengths: numpy.ndarray      # Number of steps
+    eaten: numpy.ndarray        # Number of resources eaten
+    wall_deaths: numpy.ndarray  # Whether the herbivore crossed the grid boundary
+    solved: numpy.ndarray       # Whether the herbivore ate all resources
+
+
+def evaluate(
+    policy: Callable[[numpy.ndarray], numpy.ndarray],
+    n_episodes: int = 1000,
+    seed: int = 0,
+    num_envs: int = 256,
+    grid_dim: int = 10,
+    n_resources: int = 20,
+    max_episode_steps: int = 500
+) -> EpisodeResults:
+    '''
+    Run n_episodes episodes of policy on EcosysVector-v0, num_envs at a time.
+
+    Episode i starts from the layout seeded by seed + i whatever the policy, so that two
+    policies evaluated with the same seed play the same episodes. A sub-environment whose
+    episode ends starts the next episode not yet started.
+    '''
+    num_envs = min(num_envs, n_episodes)
+    env = EcosysVectorEnv(num_envs=num_envs, max_episode_steps=max_episode_steps)
+    seeds = seed + numpy.arange(n_episodes)
+    returns = numpy.zeros(n_episodes, dtype=numpy.float64)
+    lengths = numpy.zeros(n_episodes, dtype=numpy.int64)
+    eaten = numpy.zeros(n_episodes, dtype=numpy.int64)
+    wall_deaths = numpy.zeros(n_episodes, dtype=bool)
+    solved = numpy.zeros(n_episodes, dtype=bool)
+    # Episode played by each sub-environment, -1 once there are none left
+    episodes = numpy.arange(num_envs)
+    next_episode = num_envs
+    state, _ = env.reset(seed=seeds[:num_envs].tolist(), options={'grid_dim': grid_dim, 'n_resources': n_resources})
+    while (episodes >= 0).any():
+        state, reward, terminated, truncated, _ = env.step(policy(state))
+        active = episodes >= 0
+        idx = episodes[active]
+        reward, terminated, done = reward[active], terminated[active], (terminated | truncated)[active]
+        returns[idx] += reward
+        lengths[idx] += 1
+        # Eating is rewarded with +10, or +100 for the last resource
+        eaten[idx] += reward >= 10.
+        wall_deaths[idx] = terminated & (reward == -100.)
+        solved[idx] = terminated & (reward == 100.)
+        # Start the next episodes on the finished sub-environments
+        finished = numpy.flatnonzero(active)[done]
+        if len(finished) > 0:
+            new = numpy.arange(next_episode, min(next_episode + len(finished), n_episodes))
+            next_episode += len(new)
+            episodes[finished] = -1
+            episodes[finished[:len(new)]] = new
+            if len(new) > 0:
+                state[finished[:len(new)]] = env.reset_envs(finished[:len(new)], seeds[new])
+    env.close()
+    return EpisodeResults(seeds, returns, lengths, eaten, wall_deaths, solved)
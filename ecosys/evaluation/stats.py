@@ -0,0 +1,55 @@
+import numpy
+from typing import NamedTuple
+from statistics import NormalDist
+from ecosys.evaluation.harness import EpisodeResults
+
+
+class Estimate(NamedTuple):
+    '''Sample mean with the bounds of its confidence interval.'''
+    mean: float
+    low: float
+    high: float
+
+
+def confidence_interval(x: numpy.ndarray, confidence: float = 0.95) -> Estimate:
+    '''Return the mean of x with its normal-approximation confidence interval.'''
+    x = numpy.asarray(x, dtype=numpy.float64)
+    mean = float(x.mean())
+    if len(x) < 2:
+        return Estimate(mean, float('nan'), float('nan'))
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2) * float(x.std(ddof=1)) / len(x)**0.5
+    return Estimate(mean, mean - half_width, mean + half_width)
+
+
+def _metrics(results: EpisodeResults) -> dict[str, numpy.ndarray]:
+    return {
+        'return': results.returns,
+        'length': results.lengths,
+        'eaten': results.eaten,
+        'wall_death_rate': results.wall_deaths,
+        'solved_rate': results.solved,
+    }
+
+
+def summarize(results: EpisodeResults, confidence: float = 0.95) -> dict[str, Estimate]:
+    '''Return the mean and confidence interval of every per-episode metric.'''
+    return {name: confidence_interval(x, confidence) for name, x in _metrics(results).items()}
+
+
+def compare(
+    baseline: EpisodeResults,
+    candidate: EpisodeResults,
+    confidence: float = 0.95
+) -> dict[str, Estimate]:
+    '''
+    Return the mean and confidence interval of the per-episode difference candidate - baseline.
+
+    Both must be evaluated on the same seeds. Pairing the episodes removes the variance due to
+    the layouts, so much smaller differences are significant than with independent episodes.
+    '''
+    assert (baseline.seeds == candidate.seeds).all(), 'Paired comparison needs the same episode seeds.'
+    candidate_metrics = _metrics(candidate)
+    return {
+        name: confidence_interval(candidate_metrics[name].astype(numpy.float64) - x, confidence)
+        for name, x in _metrics(baseline).items()
+    }
@@ -1 +1,9 @@
-from ecosys.models.actor_critic import ActorCritic
+from ecosys._lazy import lazy_attributes
+from ecosys.models.numpy_policy import ActorCriticPolicy, export_npz
+
+
+# ActorCritic and ConvActorCritic need TensorFlow, import it on first access
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'ActorCritic': 'ecosys.models.actor_critic',
+    'ConvActorCritic': 'ecosys.models.actor_critic',
+})
@@ -17,3 +17,30 @@ class ActorCritic(tf.keras.Model):
     def call(self, inputs: tf.Tensor) -> tuple[tf.Tensor, tf.Tensor]:
         x = self.common(inputs)
         return self.actor(x), self.critic(x)
+
+
+class ConvActorCritic(tf.keras.Model):
+    '''Convolutional actor-critic network on flattened (patch_size, patch_size, channels) egocentric patches.'''
+    def __init__(
+            self,
+            num_actions: int,
+            num_hidden_units: int,
+            patch_size: int,
+            channels: int = 2,
+            filters: tuple[int, ...] = (16, 32)):
+        '''Initialize model.'''
+        super().__init__()
+        self.patch_shape = (patch_size, patch_size, channels)
+        self.convs = [keras.layers.Conv2D(f, 3, padding='same', activation='relu') for f in filters]
+        self.flatten = keras.layers.Flatten()
+        self.common = keras.layers.Dense(num_hidden_units, activation='relu')
+        self.actor = keras.layers.Dense(num_actions)
+        self.critic = keras.layers.Dense(1)
+
+    def call(self, inputs: tf.Tensor) -> tuple[tf.Tensor, tf.Tensor]:
+        # The trainers flatten the states, restore the patches
+        x = tf.reshape(tf.cast(inputs, tf.float32), (-1,) + self.patch_shape)
+        for conv in self.convs:
+            x = conv(x)
+        x = self.common(self.flatten(x))
+        return self.actor(x), self.critic(x)
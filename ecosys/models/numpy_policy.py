@@ -0,0 +1,87 @@
+import numpy
+from typing import Optional
+
+
+# Dense layers of ActorCritic, in the order they are applied
+LAYERS = ('common', 'actor', 'critic')
+
+
+def export_npz(model, path: str) -> None:
+    '''Save the kernels and biases of the Dense layers of an ActorCritic model to a .npz file.'''
+    weights = {}
+    for name in LAYERS:
+        kernel, bias = getattr(model, name).get_weights()
+        weights[f'{name}/kernel'] = kernel
+        weights[f'{name}/bias'] = bias
+    numpy.savez(path, **weights)
+
+
+class ActorCriticPolicy:
+    '''
+    NumPy implementation of the ActorCritic forward pass, for inference without TensorFlow.
+
+    Calling the policy on a batch of observations returns one action per observation, the
+    most likely one if greedy, otherwise sampled from the policy. It can be used as the
+    policy of the rollout workers.
+    '''
+    def __init__(
+        self,
+        weights: dict[str, numpy.ndarray],
+        greedy: bool = True,
+        seed: Optional[int] = None
+    ):
+        self.common_kernel = numpy.ascontiguousarray(weights['common/kernel'], dtype=numpy.float32)
+        self.common_bias = numpy.ascontiguousarray(weights['common/bias'], dtype=numpy.float32)
+        # Actor and critic heads share the hidden layer, apply them in a single product
+        self.head_kernel = numpy.ascontiguousarray(
+            numpy.concatenate([weights['actor/kernel'], weights['critic/kernel']], axis=1), dtype=numpy.float32)
+        self.head_bias = numpy.concatenate([weights['actor/bias'], weights['critic/bias']]).astype(numpy.float32)
+        self.num_actions = weights['actor/bias'].shape[0]
+        self.greedy = greedy
+        self.rng = numpy.random.default_rng(seed)
+
+    @classmethod
+    def load(
+        cls,
+        path: str,
+        greedy: bool = True,
+        seed: Optional[int] = None
+    ) -> 'ActorCriticPolicy':
+        '''Load the weights saved by export_npz, or the model weights of a CheckpointManager checkpoint.'''
+        with numpy.load(path) as f:
+            weights = dict(f)
+        if 'model/0' in weights:
+            # Checkpoints hold model.get_weights(), the kernel and bias of each layer in order
+            weights = {
+                f'{name}/{kind}': weights[f'model/{2*i + j}']
+                for i, name in enumerate(LAYERS) for j, kind in enumerate(('kernel', 'bias'))
+            }
+        return cls(weights, greedy, seed)
+
+    @classmethod
+    def from_model(
+        cls,
+        model,
+        greedy: bool = True,
+        seed: Optional[int] = None
+    ) -> 'ActorCriticPolicy':
+        '''Copy the weights of an ActorCritic model.'''
+        weights = {}
+        for name in LAYERS:
+            weights[f'{name}/kernel'], weights[f'{name}/bias'] = getattr(model, name).get_weights()
+        return cls(weights, greedy, seed)
+
+    def forward(self, obs: numpy.ndarray) -> tuple[numpy.ndarray, numpy.ndarray]:
+        '''Return the [N, num_actions] action logits and [N, 1] critic values of a batch of observations.'''
+        x = numpy.asarray(obs, dtype=numpy.float32).reshape(len(obs), -1)
+        hidden = numpy.maximum(x @ self.common_kernel + self.common_bias, 0.)
+        out = hidden @ self.head_kernel + self.head_bias
+        return out[:, :self.num_actions], out[:, self.num_actions:]
+
+    def __call__(self, obs: numpy.ndarray) -> numpy.ndarray:
+        '''Return the actions of a batch of observations.'''
+        logits, _ = self.forward(obs)
+        if not self.greedy:
+            # Gumbel-max sampling from the policy
+            logits = logits + self.rng.gumbel(size=logits.shape)
+        return numpy.argmax(logits, axis=1)
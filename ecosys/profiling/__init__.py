@@ -0,0 +1,2 @@
+from ecosys.profiling.profiler import Profiler, format_breakdown
+from ecosys.profiling.sinks import MetricsSink, MemorySink, CSVSink, JSONLSink, TensorBoardSink
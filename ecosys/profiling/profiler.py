@@ -0,0 +1,100 @@
+import time
+import functools
+import threading
+import contextlib
+import collections
+from typing import Callable, Iterator, Sequence
+from ecosys.profiling.sinks import MetricsSink
+
+
+class Profiler:
+    '''
+    Accumulate the time spent in named phases, and named counters, between flushes.
+
+    Python methods are timed by wrapping them with instrument, which replaces the method on
+    the instance only, so that objects that are not instrumented pay nothing. Every flush
+    turns the accumulated values into metrics named '<phase>/seconds', '<phase>/calls' and
+    '<counter>', together with 'wall/seconds' since the previous flush, writes them to the
+    sinks and starts over.
+    '''
+    def __init__(self, sinks: Sequence[MetricsSink] = ()):
+        self.sinks = list(sinks)
+        # Phases may be recorded from TensorFlow threads
+        self._lock = threading.Lock()
+        self._seconds: dict[str, float] = collections.defaultdict(float)
+        self._calls: dict[str, int] = collections.defaultdict(int)
+        self._counters: dict[str, int] = collections.defaultdict(int)
+        self._start = time.perf_counter()
+
+    def add(self, name: str, seconds: float, calls: int = 1) -> None:
+        '''Add seconds spent in calls to the phase name.'''
+        with self._lock:
+            self._seconds[name] += seconds
+            self._calls[name] += calls
+
+    def count(self, name: str, n: int = 1) -> None:
+        '''Increment the counter name by n.'''
+        with self._lock:
+            self._counters[name] += n
+
+    @contextlib.contextmanager
+    def timer(self, name: str) -> Iterator[None]:
+        '''Time the body of the with statement as one call of the phase name.'''
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def wrap(self, fn: Callable, name: str) -> Callable:
+        '''Return fn timing each of its calls as the phase name.'''
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.add(name, time.perf_counter() - start)
+        return wrapper
+
+    def instrument(self, obj: object, *names: str) -> None:
+        '''Time the calls of the methods names of obj, each as the phase of the same name.'''
+        for name in names:
+            setattr(obj, name, self.wrap(getattr(obj, name), name))
+
+    def flush(self, step: int) -> dict[str, float]:
+        '''Write the metrics accumulated since the last flush to the sinks, and return them.'''
+        now = time.perf_counter()
+        with self._lock:
+            metrics = {'wall/seconds': now - self._start}
+            for name, seconds in self._seconds.items():
+                metrics[f'{name}/seconds'] = seconds
+                metrics[f'{name}/calls'] = self._calls[name]
+            metrics.update(self._counters)
+            self._seconds.clear()
+            self._calls.clear()
+            self._counters.clear()
+            self._start = now
+        for sink in self.sinks:
+            sink.write(step, metrics)
+        return metrics
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+def format_breakdown(metrics: dict[str, float]) -> str:
+    '''
+    Format the phases of flushed metrics as a table of calls, time, share of wall time and mean time per call.
+
+    Nested phases (e.g. _get_obs within step) are counted in both, so shares may add up to more than 100%.
+    '''
+    wall = metrics['wall/seconds']
+    lines = [f'{"phase":>24} {"calls":>10} {"seconds":>10} {"wall %":>8} {"us/call":>10}']
+    phases = [name[:-len('/seconds')] for name in metrics if name.endswith('/seconds') and name != 'wall/seconds']
+    for phase in sorted(phases, key=lambda phase: -metrics[f'{phase}/seconds']):
+        seconds, calls = metrics[f'{phase}/seconds'], metrics[f'{phase}/calls']
+        lines.append(f'{phase:>24} {calls:>10} {seconds:>10.3f} {100*seconds/wall:>8.1f} {1e6*seconds/calls:>10.1f}')
+    lines.append(f'{"wall":>24} {"":>10} {wall:>10.3f} {100.:>8.1f}')
+    return '\n'.join(lines)
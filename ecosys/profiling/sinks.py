@@ -0,0 +1,69 @@
+import csv
+import json
+from typing import Optional
+
+
+class MetricsSink:
+    '''Destination of the metrics flushed by a Profiler.'''
+    def write(self, step: int, metrics: dict[str, float]) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class MemorySink(MetricsSink):
+    '''Keep the flushed metrics in memory, as a list of (step, metrics) records.'''
+    def __init__(self):
+        self.records: list[tuple[int, dict[str, float]]] = []
+
+    def write(self, step: int, metrics: dict[str, float]) -> None:
+        self.records.append((step, dict(metrics)))
+
+
+class CSVSink(MetricsSink):
+    '''Append the flushed metrics to a CSV file, one (step, name, value) row per metric.'''
+    def __init__(self, path: str):
+        self._file = open(path, 'w', newline='')
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['step', 'name', 'value'])
+
+    def write(self, step: int, metrics: dict[str, float]) -> None:
+        self._writer.writerows([step, name, value] for name, value in metrics.items())
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class JSONLSink(MetricsSink):
+    '''Append the flushed metrics to a JSON Lines file, one object per flush.'''
+    def __init__(self, path: str):
+        self._file = open(path, 'w')
+
+    def write(self, step: int, metrics: dict[str, float]) -> None:
+        self._file.write(json.dumps({'step': step, **metrics}) + '\n')
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+class TensorBoardSink(MetricsSink):
+    '''Write the flushed metrics as TensorBoard scalars.'''
+    def __init__(self, logdir: str, prefix: Optional[str] = 'profile'):
+        # Imported here so that the other sinks work without TensorFlow
+        import tensorflow as tf
+        self._tf = tf
+        self._writer = tf.summary.create_file_writer(logdir)
+        self.prefix = prefix
+
+    def write(self, step: int, metrics: dict[str, float]) -> None:
+        with self._writer.as_default():
+            for name, value in metrics.items():
+                name = name if self.prefix is None else f'{self.prefix}/{name}'
+                self._tf.summary.scalar(name, value, step=step)
+        self._writer.flush()
+
+    def close(self) -> None:
+        self._writer.close()
@@ -0,0 +1,4 @@
+from ecosys.rollout.buffers import SharedRingBuffer, Transitions
+from ecosys.rollout.storage import TrajectoryStore, Trajectories
+from ecosys.rollout.worker import RandomPolicy
+from ecosys.rollout.pool import RolloutPool, RolloutWorkerError
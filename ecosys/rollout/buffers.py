@@ -0,0 +1,146 @@
+import numpy
+from typing import NamedTuple, Optional
+from multiprocessing import shared_memory
+
+
+class Transitions(NamedTuple):
+    '''Batch of transitions with shape [steps, num_envs, ...].'''
+    obs: numpy.ndarray
+    actions: numpy.ndarray
+    rewards: numpy.ndarray
+    terminated: numpy.ndarray
+    truncated: numpy.ndarray
+
+
+# Name, dtype and per-transition shape of the buffer fields
+FIELDS = (
+    ('obs', numpy.uint8, (2, 4)),
+    ('actions', numpy.int64, ()),
+    ('rewards', numpy.float32, ()),
+    ('terminated', numpy.bool_, ()),
+    ('truncated', numpy.bool_, ()),
+)
+
+# Per-transition shape of packed observations, one uint8 per step and environment
+PACKED_OBS_SHAPE = ()
+
+# Byte alignment of every field inside the shared memory block
+ALIGNMENT = 64
+
+
+class SharedRingBuffer:
+    '''
+    Single-producer single-consumer ring of transitions stored in shared memory.
+
+    Each slot holds one step of num_envs environments. The writer fills the slot at
+    head and commits it, the reader gets views of the committed slots and releases
+    them once consumed. Slot accounting goes through the free and filled semaphores,
+    which the owner of the buffer shares with the other process. With packed_obs the
+    observations are stored as single packed bytes (see EcosysEnv), 8 times smaller.
+    '''
+    def __init__(
+        self,
+        capacity: int,
+        num_envs: int,
+        packed_obs: bool = False,
+        name: Optional[str] = None,
+        semaphores: Optional[tuple] = None,
+        ctx=None
+    ):
+        self.capacity = capacity
+        self.num_envs = num_envs
+        self.packed_obs = packed_obs
+        fields = [
+            (field, dtype, PACKED_OBS_SHAPE if packed_obs and field == 'obs' else shape)
+            for field, dtype, shape in FIELDS
+        ]
+        # Compute the layout of the fields
+        offsets, offset = {}, 0
+        for field, dtype, shape in fields:
+            offsets[field] = offset
+            nbytes = capacity*num_envs*int(numpy.prod(shape, dtype=int))*numpy.dtype(dtype).itemsize
+            offset += -(-nbytes // ALIGNMENT)*ALIGNMENT
+        # Create or attach to the shared memory block
+        self._owner = name is None
+        if self._owner:
+            self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+            self.free, self.filled = ctx.Semaphore(capacity), ctx.Semaphore(0)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.free, self.filled = semaphores
+        self._arrays = {
+            field: numpy.ndarray((capacity, num_envs) + shape, dtype=dtype, buffer=self.shm.buf, offset=offsets[field])
+            for field, dtype, shape in fields
+        }
+        # Total number of slots committed by the writer and released by the reader
+        self.head = 0
+        self.tail = 0
+        self._available = 0
+
+    def __getstate__(self) -> dict:
+        return {
+            'capacity': self.capacity,
+            'num_envs': self.num_envs,
+            'packed_obs': self.packed_obs,
+            'name': self.shm.name,
+            'semaphores': (self.free, self.filled)
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        self.__init__(**state)
+
+    def reserve(self, timeout: Optional[float] = None) -> Optional[Transitions]:
+        '''Wait for a free slot and return writable views of it, or None on timeout.'''
+        if not self.free.acquire(timeout=timeout):
+            return None
+        slot = self.head % self.capacity
+        return Transitions(**{field: array[slot] for field, array in self._arrays.items()})
+
+    def commit(self) -> None:
+        '''Publish the slot returned by the last reserve call.'''
+        self.head += 1
+        self.filled.release()
+
+    def get(
+        self,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[Transitions]:
+        '''
+        Return views of the committed slots following tail, waiting for at least one.
+
+        The views are not copied and remain valid until the slots are released. At most
+        max_steps slots are returned, and never more than the contiguous run before the
+        end of the ring. Returns None if nothing was committed before timeout.
+        '''
+        if self._available == 0:
+            if not self.filled.acquire(timeout=timeout):
+                return None
+            self._available = 1
+        limit = self.capacity - self.tail % self.capacity
+        if max_steps is not None:
+            limit = min(limit, max_steps)
+        while self._available < limit and self.filled.acquire(block=False):
+            self._available += 1
+        n = min(self._available, limit)
+        start = self.tail % self.capacity
+        return Transitions(**{field: array[start:start+n] for field, array in self._arrays.items()})
+
+    def release(self, n: int) -> None:
+        '''Hand n slots back to the writer.'''
+        assert n <= self._available, 'Cannot release slots that were not read.'
+        self._available -= n
+        self.tail += n
+        for _ in range(n):
+            self.free.release()
+
+    def close(self) -> None:
+        '''Detach from the shared memory block, destroying it if owned.'''
+        self._arrays = {}
+        try:
+            self.shm.close()
+        except BufferError:
+            # Views handed out by get are still alive, the mapping goes away with them
+            pass
+        if self._owner:
+            self.shm.unlink()
@@ -0,0 +1,147 @@
+import time
+import multiprocessing
+import numpy
+from typing import Callable, Optional
+import gym
+from ecosys.rollout.buffers import SharedRingBuffer, Transitions
+from ecosys.rollout.worker import RandomPolicy, run_worker
+
+
+class RolloutWorkerError(RuntimeError):
+    '''Raised when a rollout worker exits unexpectedly.'''
+
+
+class RolloutPool:
+    '''
+    Pool of worker processes stepping EcosysEnv instances.
+
+    Each worker owns envs_per_worker environments and writes every step into its own
+    SharedRingBuffer. The learner reads the transitions of a worker with get, which
+    returns views into shared memory, and hands the slots back with release.
+    Crashed workers are restarted with a fresh buffer if restart_crashed is set,
+    otherwise RolloutWorkerError is raised. With packed_obs the observations are
+    stored as packed bytes, expanded with ecosys.environment.observation.unpack_obs.
+    '''
+    def __init__(
+        self,
+        num_workers: int,
+        envs_per_worker: int = 1,
+        capacity: int = 256,
+        policy: Optional[Callable[[numpy.ndarray], numpy.ndarray]] = None,
+        env_options: Optional[dict] = None,
+        seed: Optional[int] = None,
+        restart_crashed: bool = True,
+        start_method: str = 'spawn',
+        packed_obs: bool = False
+    ):
+        self.num_workers = num_workers
+        self.envs_per_worker = envs_per_worker
+        self.capacity = capacity
+        self.policy = policy
+        self.env_options = env_options
+        self.seed = seed
+        self.restart_crashed = restart_crashed
+        self.packed_obs = packed_obs
+        self._ctx = multiprocessing.get_context(start_method)
+        self._stop_event = None
+        self._buffers = []
+        self._processes = []
+        self._restarts = [0]*num_workers
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._stop_event is not None
+
+    def start(self) -> None:
+        '''Start the worker processes.'''
+        assert not self.running, 'RolloutPool already started.'
+        self._stop_event = self._ctx.Event()
+        self._buffers = [None]*self.num_workers
+        self._processes = [None]*self.num_workers
+        for worker_id in range(self.num_workers):
+            self._start_worker(worker_id)
+
+    def stop(self, timeout: float = 5.) -> None:
+        '''Stop the worker processes and release the shared memory.'''
+        if not self.running:
+            return
+        self._stop_event.set()
+        deadline = time.monotonic() + timeout
+        for process in self._processes:
+            process.join(max(deadline - time.monotonic(), 0.))
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        for buffer in self._buffers:
+            buffer.close()
+        self._buffers, self._processes = [], []
+        self._stop_event = None
+
+    def get(
+        self,
+        worker_id: int,
+        max_steps: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> Optional[Transitions]:
+        '''
+        Return views of the unread steps of a worker, with shape [steps, envs_per_worker, ...].
+
+        Waits until at least one step is available or timeout expires, in which case None
+        is returned. The views stay valid until the steps are released.
+        '''
+        assert self.running, 'Call start before using get method.'
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            wait = 0.1 if deadline is None else min(0.1, max(deadline - time.monotonic(), 0.))
+            transitions = self._buffers[worker_id].get(max_steps, timeout=wait)
+            if transitions is not None:
+                return transitions
+            if not self._processes[worker_id].is_alive():
+                self._handle_crash(worker_id)
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+    def release(self, worker_id: int, n: int) -> None:
+        '''Hand n steps read from a worker back to it.'''
+        self._buffers[worker_id].release(n)
+
+    def check_workers(self) -> None:
+        '''Restart, or report, workers that exited unexpectedly.'''
+        for worker_id, process in enumerate(self._processes):
+            if not process.is_alive():
+                self._handle_crash(worker_id)
+
+    def _start_worker(self, worker_id: int) -> None:
+        '''Create the buffer of a worker and start its process.'''
+        # Derive a distinct seed per worker and restart
+        seed = None
+        if self.seed is not None:
+            seed = self.seed + (self._restarts[worker_id]*self.num_workers + worker_id)*self.envs_per_worker
+        policy = self.policy if self.policy is not None else RandomPolicy(seed=seed)
+        buffer = SharedRingBuffer(self.capacity, self.envs_per_worker, self.packed_obs, ctx=self._ctx)
+        process = self._ctx.Process(
+            target=run_worker,
+            args=(buffer, policy, self.env_options, seed, self._stop_event),
+            name=f'ecosys-rollout-{worker_id}',
+            daemon=True
+        )
+        process.start()
+        self._buffers[worker_id] = buffer
+        self._processes[worker_id] = process
+
+    def _handle_crash(self, worker_id: int) -> None:
+        '''Restart a worker that exited unexpectedly, discarding its unread steps.'''
+        exitcode = self._processes[worker_id].exitcode
+        if not self.restart_crashed:
+            raise RolloutWorkerError(f'Rollout worker {worker_id} exited with code {exitcode}.')
+        gym.logger.warn(f'Rollout worker {worker_id} exited with code {exitcode}, restarting it.')
+        self._buffers[worker_id].close()
+        self._restarts[worker_id] += 1
+        self._start_worker(worker_id)
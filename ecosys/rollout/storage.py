@@ -0,0 +1,197 @@
+import os
+import json
+import collections
+import numpy
+from typing import Iterator, NamedTuple, Optional
+from numpy.lib.format import open_memmap
+
+
+class Trajectories(NamedTuple):
+    '''Batch of stored transitions with shape [steps, ...].'''
+    obs: numpy.ndarray
+    actions: numpy.ndarray
+    rewards: numpy.ndarray
+    values: numpy.ndarray
+    dones: numpy.ndarray
+
+
+# Name, dtype and per-transition shape of the stored fields
+FIELDS = (
+    ('obs', numpy.uint8, (2, 4)),
+    ('actions', numpy.uint8, ()),
+    ('rewards', numpy.float32, ()),
+    ('values', numpy.float32, ()),
+    ('dones', numpy.bool_, ()),
+)
+
+
+class TrajectoryStore:
+    '''
+    Append-only store of transitions in memory-mapped files on disk.
+
+    Each field is split into chunks of chunk_size transitions, stored as one .npy file per
+    field and chunk in directory, so that the store can grow far beyond the memory and only
+    the pages that are read or written are loaded. dones[t] marks the last step of an
+    episode. The number of transitions is saved in meta.json by flush and close, and an
+    existing store is reopened (and appended to) by creating a TrajectoryStore on the same
+    directory. At most max_open_chunks chunks are mapped at once.
+    '''
+    def __init__(
+        self,
+        directory: str,
+        chunk_size: int = 2**20,
+        max_open_chunks: int = 64
+    ):
+        self.directory = directory
+        self.max_open_chunks = max_open_chunks
+        meta_path = os.path.join(directory, 'meta.json')
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                meta = json.load(f)
+            chunk_size, self.size = meta['chunk_size'], meta['size']
+        else:
+            os.makedirs(directory, exist_ok=True)
+            self.size = 0
+        self.chunk_size = chunk_size
+        # Memory maps of the chunks in use, least recently used first
+        self._chunks: collections.OrderedDict = collections.OrderedDict()
+        self.flush()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __enter__(self) -> 'TrajectoryStore':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def append(
+        self,
+        obs: numpy.ndarray,
+        actions: numpy.ndarray,
+        rewards: numpy.ndarray,
+        values: numpy.ndarray,
+        dones: numpy.ndarray
+    ) -> None:
+        '''Append a batch of consecutive transitions with a leading steps dimension.'''
+        batch = Trajectories(obs, actions, rewards, values, dones)
+        n = len(obs)
+        assert all(len(x) == n for x in batch), 'All fields must have the same number of steps.'
+        written = 0
+        while written < n:
+            chunk, offset = divmod(self.size, self.chunk_size)
+            count = min(n - written, self.chunk_size - offset)
+            arrays = self._chunk(chunk, create=True)
+            for (field, dtype, shape), array, values_ in zip(FIELDS, arrays, batch):
+                array[offset:offset+count] = numpy.reshape(values_[written:written+count], (count,) + shape)
+            written += count
+            self.size += count
+
+    def __getitem__(self, idx) -> Trajectories:
+        '''Return a copy of the transitions at the integer indices idx, in order.'''
+        idx = numpy.asarray(idx, dtype=numpy.int64)
+        assert ((idx >= 0) & (idx < self.size)).all(), 'Index out of range.'
+        flat = idx.ravel()
+        out = [numpy.empty(flat.shape + shape, dtype=dtype) for _, dtype, shape in FIELDS]
+        # Group the indices by chunk and gather from each chunk touched
+        order = numpy.argsort(flat, kind='stable')
+        chunks, offsets = numpy.divmod(flat[order], self.chunk_size)
+        bounds = numpy.flatnonzero(numpy.diff(chunks)) + 1
+        for start, stop in zip(numpy.r_[0, bounds], numpy.r_[bounds, len(flat)]):
+            positions = order[start:stop]
+            for array, stored in zip(out, self._chunk(int(chunks[start]))):
+                array[positions] = stored[offsets[start:stop]]
+        return Trajectories(*(array.reshape(idx.shape + array.shape[1:]) for array in out))
+
+    def sample(
+        self,
+        batch_size: int,
+        rng: Optional[numpy.random.Generator] = None
+    ) -> Trajectories:
+        '''Return batch_size transitions drawn uniformly at random, at a cost independent of the store size.'''
+        rng = rng if rng is not None else numpy.random.default_rng()
+        return self[rng.integers(0, self.size, size=batch_size)]
+
+    def iterate(
+        self,
+        batch_size: int,
+        shuffle: bool = False,
+        rng: Optional[numpy.random.Generator] = None,
+        drop_remainder: bool = False
+    ) -> Iterator[Trajectories]:
+        '''
+        Iterate over the stored transitions in batches of batch_size.
+
+        Batches are read in order, a chunk at a time, unless shuffle is set, in which case
+        every transition is visited once in a random order.
+        '''
+        size = self.size
+        stop = size - size % batch_size if drop_remainder else size
+        if shuffle:
+            rng = rng if rng is not None else numpy.random.default_rng()
+            order = rng.permutation(size)
+            for start in range(0, stop, batch_size):
+                yield self[order[start:start+batch_size]]
+            return
+        for start in range(0, stop, batch_size):
+            yield self._read(start, min(start + batch_size, stop))
+
+    def as_dataset(
+        self,
+        batch_size: int,
+        shuffle: bool = False,
+        seed: Optional[int] = None
+    ):
+        '''Return a tf.data.Dataset streaming the batches of iterate.'''
+        # Imported here so that the store works without TensorFlow
+        import tensorflow as tf
+        signature = Trajectories(*(
+            tf.TensorSpec((None,) + shape, tf.as_dtype(dtype)) for _, dtype, shape in FIELDS))
+        return tf.data.Dataset.from_generator(
+            lambda: self.iterate(batch_size, shuffle, numpy.random.default_rng(seed)),
+            output_signature=signature
+        )
+
+    def flush(self) -> None:
+        '''Write the mapped chunks and the number of transitions to disk.'''
+        for arrays in self._chunks.values():
+            for array in arrays:
+                array.base.flush()
+        with open(os.path.join(self.directory, 'meta.json'), 'w') as f:
+            json.dump({'chunk_size': self.chunk_size, 'size': self.size}, f)
+
+    def close(self) -> None:
+        self.flush()
+        self._chunks.clear()
+
+    def _read(self, start: int, stop: int) -> Trajectories:
+        '''Return a copy of the consecutive transitions from start to stop.'''
+        parts = []
+        while start < stop:
+            chunk, offset = divmod(start, self.chunk_size)
+            count = min(stop - start, self.chunk_size - offset)
+            parts.append([array[offset:offset+count] for array in self._chunk(chunk)])
+            start += count
+        return Trajectories(*(numpy.concatenate(arrays) for arrays in zip(*parts)))
+
+    def _chunk(self, chunk: int, create: bool = False) -> list[numpy.ndarray]:
+        '''Return the memory maps of the fields of a chunk, creating its files if needed.'''
+        if chunk in self._chunks:
+            self._chunks.move_to_end(chunk)
+            return self._chunks[chunk]
+        arrays = []
+        for field, dtype, shape in FIELDS:
+            path = os.path.join(self.directory, f'{field}-{chunk:06d}.npy')
+            if create and not os.path.exists(path):
+                memmap = open_memmap(path, mode='w+', dtype=dtype, shape=(self.chunk_size,) + shape)
+            else:
+                memmap = numpy.load(path, mmap_mode='r+')
+            # Plain ndarray views of the memory maps (flushed through their base) index several times faster
+            arrays.append(memmap.view(numpy.ndarray))
+        self._chunks[chunk] = arrays
+        # Unmap the least recently used chunk
+        if len(self._chunks) > self.max_open_chunks:
+            for array in self._chunks.popitem(last=False)[1]:
+                array.base.flush()
+        return arrays
@@ -0,0 +1,52 @@
+import numpy
+from typing import Callable, Optional
+import gym
+import ecosys  # noqa: F401
+from ecosys.environment.observation import unpack_obs
+from ecosys.rollout.buffers import SharedRingBuffer
+
+
+class RandomPolicy:
+    '''Policy sampling uniformly random actions.'''
+    def __init__(self, num_actions: int = 4, seed: Optional[int] = None):
+        self.num_actions = num_actions
+        self.rng = numpy.random.default_rng(seed)
+
+    def __call__(self, obs: numpy.ndarray) -> numpy.ndarray:
+        return self.rng.integers(0, self.num_actions, size=len(obs))
+
+
+def run_worker(
+    buffer: SharedRingBuffer,
+    policy: Callable[[numpy.ndarray], numpy.ndarray],
+    env_options: Optional[dict],
+    seed: Optional[int],
+    stop_event
+) -> None:
+    '''
+    Step buffer.num_envs environments with policy, writing every step to buffer until stop_event is set.
+
+    The policy always receives (num_envs, 2, 4) observations, expanded from the packed ones
+    of a buffer with packed_obs.
+    '''
+    # Create environments and reset their state
+    envs = [gym.make('Ecosys-v0', packed_obs=buffer.packed_obs) for _ in range(buffer.num_envs)]
+    obs = numpy.stack([
+        env.reset(seed=None if seed is None else seed + i, options=env_options)[0]
+        for i, env in enumerate(envs)
+    ])
+    while not stop_event.is_set():
+        # Wait for a free slot, checking regularly whether to stop
+        slot = buffer.reserve(timeout=0.1)
+        if slot is None:
+            continue
+        actions = policy(unpack_obs(obs) if buffer.packed_obs else obs)
+        slot.obs[:] = obs
+        slot.actions[:] = actions
+        for i, env in enumerate(envs):
+            obs[i], slot.rewards[i], slot.terminated[i], slot.truncated[i], _ = env.step(int(actions[i]))
+            if slot.terminated[i] or slot.truncated[i]:
+                obs[i], _ = env.reset(options=env_options)
+        buffer.commit()
+    for env in envs:
+        env.close()
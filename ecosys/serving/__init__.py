@@ -0,0 +1,9 @@
+from ecosys._lazy import lazy_attributes
+
+
+# The inference server needs TensorFlow, import it on first access
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'InferenceServer': 'ecosys.serving.server',
+    'load_model': 'ecosys.serving.server',
+    'make_http_server': 'ecosys.serving.http',
+})
@@ -0,0 +1,60 @@
+import json
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from ecosys.serving.server import InferenceServer
+
+
+def make_http_server(
+    server: InferenceServer,
+    host: str = '127.0.0.1',
+    port: int = 8000
+) -> ThreadingHTTPServer:
+    '''
+    Create an HTTP front end of a started InferenceServer, handling each connection in a thread.
+
+    POST /act with a JSON body {"state": [[...], [...]]} answers {"action": a}, and with
+    {"states": [...]} answers {"actions": [...]}. An optional "greedy" boolean overrides the
+    default of the server. GET /stats returns the batching statistics. Call serve_forever on
+    the returned server to start answering.
+    '''
+    class Handler(BaseHTTPRequestHandler):
+        # Keep connections open between requests of the same client
+        protocol_version = 'HTTP/1.1'
+        # Send small replies right away instead of waiting for the client acknowledgment
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            if self.path != '/stats':
+                return self._reply(404, {'error': f'Unknown path {self.path}'})
+            self._reply(200, server.stats())
+
+        def do_POST(self):
+            if self.path != '/act':
+                return self._reply(404, {'error': f'Unknown path {self.path}'})
+            try:
+                request = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+                greedy = request.get('greedy')
+                if 'states' in request:
+                    actions = server.predict(request['states'], greedy)
+                    return self._reply(200, {'actions': actions.tolist()})
+                self._reply(200, {'action': server.predict(request['state'], greedy)})
+            except (ValueError, KeyError, TypeError) as e:
+                self._reply(400, {'error': str(e)})
+
+        def _reply(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            # Do not log every request
+            pass
+
+    class Server(ThreadingHTTPServer):
+        # Accept many clients connecting at once
+        request_queue_size = 1024
+        daemon_threads = True
+
+    return Server((host, port), Handler)
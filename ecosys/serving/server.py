@@ -0,0 +1,152 @@
+import time
+import queue
+import threading
+import numpy as np
+import tensorflow as tf
+import keras
+from concurrent.futures import Future
+from typing import Optional, Union
+
+
+def load_model(path: str) -> tf.keras.Model:
+    '''Load a trained ActorCritic model saved by app/train.py.'''
+    return keras.models.load_model(path)
+
+
+class InferenceServer:
+    '''
+    Serve the actions of an ActorCritic model to many concurrent callers.
+
+    Callers submit states to a queue. A single thread takes the first waiting request, keeps
+    collecting requests until max_batch_size states are gathered or max_wait seconds have
+    passed, and answers all of them with one call of the model. Actions are the most likely
+    ones (greedy) or sampled from the policy, per request.
+    '''
+    def __init__(
+        self,
+        model: tf.keras.Model,
+        max_batch_size: int = 64,
+        max_wait: float = 0.001,
+        greedy: bool = True,
+        obs_shape: tuple[int, ...] = (2, 4),
+        seed: Optional[int] = None
+    ):
+        self.model = model
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.greedy = greedy
+        self.obs_shape = tuple(obs_shape)
+        self.obs_size = int(np.prod(obs_shape))
+        self._rng = np.random.default_rng(seed)
+        # Action logits of a batch of flattened states, traced once for any batch size
+        self._logits = tf.function(
+            lambda states: self.model(states)[0],
+            input_signature=[tf.TensorSpec([None, self.obs_size], tf.int8)]
+        )
+        self._queue: queue.Queue = queue.Queue()
+        self._thread = None
+        # Number of model calls and of states answered
+        self.n_batches = 0
+        self.n_states = 0
+
+    def __enter__(self) -> 'InferenceServer':
+        self.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self) -> None:
+        '''Start the batching thread.'''
+        assert not self.running, 'InferenceServer already started.'
+        self._thread = threading.Thread(target=self._run, name='InferenceServer', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        '''Answer the requests already queued and stop the batching thread.'''
+        if not self.running:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._thread = None
+
+    def submit(
+        self,
+        states: np.ndarray,
+        greedy: Optional[bool] = None
+    ) -> Future:
+        '''
+        Queue a (2, 4) state, or a batch of states with a leading dimension.
+
+        Returns a future of the action of the state, or of the array of actions of the batch.
+        greedy overrides the default of the server for this request.
+        '''
+        assert self.running, 'Call start before submitting states.'
+        states = np.asarray(states, dtype=np.int8)
+        single = states.shape in (self.obs_shape, (self.obs_size,))
+        states = states.reshape(-1, self.obs_size)
+        future = Future()
+        self._queue.put((states, self.greedy if greedy is None else greedy, single, future))
+        return future
+
+    def predict(
+        self,
+        states: np.ndarray,
+        greedy: Optional[bool] = None,
+        timeout: Optional[float] = None
+    ) -> Union[int, np.ndarray]:
+        '''Submit states and wait for their actions.'''
+        return self.submit(states, greedy).result(timeout)
+
+    def stats(self) -> dict:
+        return {
+            'batches': self.n_batches,
+            'states': self.n_states,
+            'mean_batch_size': self.n_states / max(self.n_batches, 1),
+        }
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            request = self._queue.get()
+            if request is None:
+                break
+            batch, size = [request], len(request[0])
+            # Gather more requests until the batch is full or the first request waited long enough
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch_size:
+                try:
+                    request = self._queue.get(timeout=max(deadline - time.perf_counter(), 0.))
+                except queue.Empty:
+                    break
+                if request is None:
+                    stopping = True
+                    break
+                batch.append(request)
+                size += len(request[0])
+            self._answer(batch)
+
+    def _answer(self, batch: list) -> None:
+        '''Run the model on the states of a batch of requests and resolve their futures.'''
+        try:
+            states = np.concatenate([states for states, _, _, _ in batch])
+            logits = self._logits(tf.constant(states)).numpy()
+            greedy = np.concatenate([np.full(len(states), greedy) for states, greedy, _, _ in batch])
+            # Gumbel-max sampling from the policy
+            sampled = np.argmax(logits + self._rng.gumbel(size=logits.shape), axis=1)
+            actions = np.where(greedy, np.argmax(logits, axis=1), sampled)
+        except Exception as e:
+            for _, _, _, future in batch:
+                future.set_exception(e)
+            return
+        self.n_batches += 1
+        self.n_states += len(states)
+        start = 0
+        for states, _, single, future in batch:
+            result = actions[start:start+len(states)]
+            future.set_result(int(result[0]) if single else result)
+            start += len(states)
@@ -0,0 +1,4 @@
+from ecosys.sweep.space import Uniform, grid_search, random_search
+from ecosys.sweep.stopping import MedianStopping
+from ecosys.sweep.trial import DEFAULT_CONFIG, train_trial
+from ecosys.sweep.runner import SweepRunner, available_cpus
@@ -0,0 +1,193 @@
+import os
+import csv
+import time
+import queue
+import contextlib
+import traceback
+import multiprocessing
+from typing import Any, Callable, Iterator, Optional
+import gym
+from ecosys.sweep.stopping import MedianStopping
+from ecosys.sweep.trial import train_trial
+
+
+# Environment variables limiting the threads of the numerical libraries, read when they are imported
+THREAD_VARIABLES = ('OMP_NUM_THREADS', 'OPENBLAS_NUM_THREADS', 'MKL_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS',
+                    'TF_NUM_INTEROP_THREADS')
+
+
+def available_cpus() -> list[int]:
+    '''Return the CPUs this process may run on.'''
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+@contextlib.contextmanager
+def thread_limits(threads: int) -> Iterator[None]:
+    '''Set THREAD_VARIABLES to threads in os.environ, inherited by the processes started meanwhile, then restore them.'''
+    saved = {variable: os.environ.get(variable) for variable in THREAD_VARIABLES}
+    os.environ.update({variable: str(threads) for variable in THREAD_VARIABLES})
+    try:
+        yield
+    finally:
+        for variable, value in saved.items():
+            if value is None:
+                del os.environ[variable]
+            else:
+                os.environ[variable] = value
+
+
+def run_trial(
+    trial_fn: Callable[[dict, Callable[[int, float], bool]], dict],
+    run_id: int,
+    config: dict[str, Any],
+    cpus: list[int],
+    report_every: int,
+    results: multiprocessing.Queue,
+    stop_event
+) -> None:
+    '''Pin the process to cpus and run trial_fn, sending its progress and result to results.'''
+    if hasattr(os, 'sched_setaffinity'):
+        os.sched_setaffinity(0, cpus)
+    last_report = [0]
+
+    def report(episode: int, running_reward: float) -> bool:
+        if episode // report_every > last_report[0] // report_every:
+            last_report[0] = episode
+            results.put(('progress', run_id, episode, running_reward))
+        return stop_event.is_set()
+    try:
+        results.put(('done', run_id, trial_fn(config, report)))
+    except BaseException:
+        results.put(('failed', run_id, traceback.format_exc()))
+
+
+class SweepRunner:
+    '''
+    Run trial_fn on every configuration across a pool of worker processes.
+
+    Up to max_workers runs are in flight, each pinned to its own cpus_per_run CPUs and limited
+    to threads_per_run threads. Every report_every episodes a run reports its running reward,
+    which is appended to the CSV results table at results_path together with the run settings,
+    and runs that the stopper (MedianStopping by default) flags are asked to stop. A final row
+    with the status (solved, completed, stopped or failed) of each run ends its progress rows.
+    '''
+    def __init__(
+        self,
+        configs: list[dict[str, Any]],
+        max_workers: Optional[int] = None,
+        cpus_per_run: int = 1,
+        threads_per_run: int = 1,
+        report_every: int = 100,
+        stopper: Optional[MedianStopping] = None,
+        results_path: Optional[str] = None,
+        trial_fn: Callable[[dict, Callable[[int, float], bool]], dict] = train_trial,
+        start_method: str = 'spawn'
+    ):
+        self.configs = configs
+        self.cpus = available_cpus()
+        self.cpus_per_run = cpus_per_run
+        self.max_workers = max_workers or max(1, len(self.cpus) // cpus_per_run)
+        self.threads_per_run = threads_per_run
+        self.report_every = report_every
+        self.stopper = stopper if stopper is not None else MedianStopping()
+        self.results_path = results_path
+        self.trial_fn = trial_fn
+        self._ctx = multiprocessing.get_context(start_method)
+        # Final row of every finished run
+        self.results: list[dict[str, Any]] = []
+
+    def run(self) -> list[dict[str, Any]]:
+        '''Run every configuration, returning the final rows ordered by run id.'''
+        settings = sorted({name for config in self.configs for name in config})
+        columns = ['run_id', 'status', 'episode', 'running_reward', 'seconds'] + settings
+        self._file = open(self.results_path, 'w', newline='') if self.results_path is not None else None
+        self._writer = csv.DictWriter(self._file, columns, restval='') if self._file is not None else None
+        if self._writer is not None:
+            self._writer.writeheader()
+        self._results = self._ctx.Queue()
+        pending = list(enumerate(self.configs))[::-1]
+        self._free_slots = list(range(self.max_workers))[::-1]
+        # Process, slot, stop event, start time and last progress of the runs in flight
+        self._running: dict[int, dict[str, Any]] = {}
+        try:
+            while pending or self._running:
+                # Start runs on the free slots
+                while pending and self._free_slots:
+                    self._start(*pending.pop(), self._free_slots.pop())
+                try:
+                    message = self._results.get(timeout=0.5)
+                except queue.Empty:
+                    self._reap_dead_runs()
+                    continue
+                self._handle(message)
+        finally:
+            for run in self._running.values():
+                run['process'].terminate()
+                run['process'].join()
+            if self._file is not None:
+                self._file.close()
+        self.results.sort(key=lambda row: row['run_id'])
+        return self.results
+
+    def _handle(self, message: tuple) -> None:
+        '''Record the progress or the result of a run, stopping or finishing it.'''
+        kind, run_id = message[:2]
+        run = self._running[run_id]
+        if kind == 'progress':
+            run['episode'], run['running_reward'] = message[2:]
+            self._write(run_id, 'running', run['episode'], run['running_reward'])
+            if self.stopper.report(run_id, run['episode'], run['running_reward']):
+                run['stop_event'].set()
+        elif kind == 'done':
+            result = message[2]
+            run['episode'], run['running_reward'] = result['episodes'], result['running_reward']
+            status = 'solved' if result.get('solved') else 'stopped' if run['stop_event'].is_set() else 'completed'
+            self._finish(run_id, status)
+        else:
+            gym.logger.warn(f'Sweep run {run_id} failed:\n{message[2]}')
+            self._finish(run_id, 'failed')
+
+    def _reap_dead_runs(self) -> None:
+        '''Finish the runs whose process died without reporting a result.'''
+        for run_id in [r for r, run in self._running.items() if not run['process'].is_alive()]:
+            if self._results.empty():
+                self._finish(run_id, 'failed')
+
+    def _write(self, run_id: int, status: str, episode: int, running_reward: float) -> dict[str, Any]:
+        '''Append a row of a run to the results table, returning it.'''
+        row = {
+            'run_id': run_id, 'status': status, 'episode': episode, 'running_reward': running_reward,
+            'seconds': time.monotonic() - self._running[run_id]['start'], **self.configs[run_id]
+        }
+        if self._writer is not None:
+            self._writer.writerow(row)
+            self._file.flush()
+        return row
+
+    def _finish(self, run_id: int, status: str) -> None:
+        '''Write the final row of a run and free its slot.'''
+        run = self._running[run_id]
+        self.results.append(self._write(run_id, status, run['episode'], run['running_reward']))
+        run['process'].join()
+        self._free_slots.append(run['slot'])
+        del self._running[run_id]
+
+    def _start(self, run_id: int, config: dict[str, Any], slot: int) -> None:
+        '''Start the process of a run on the CPUs of slot.'''
+        cpus = [self.cpus[(slot*self.cpus_per_run + i) % len(self.cpus)] for i in range(self.cpus_per_run)]
+        stop_event = self._ctx.Event()
+        process = self._ctx.Process(
+            target=run_trial,
+            args=(self.trial_fn, run_id, config, cpus, self.report_every, self._results, stop_event),
+            name=f'ecosys-sweep-{run_id}',
+            daemon=True
+        )
+        # The numerical libraries read their thread limits when the child imports them, before run_trial runs
+        with thread_limits(self.threads_per_run):
+            process.start()
+        self._running[run_id] = {
+            'process': process, 'slot': slot, 'stop_event': stop_event, 'start': time.monotonic(),
+            'episode': 0, 'running_reward': float('nan')
+        }
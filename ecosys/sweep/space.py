@@ -0,0 +1,48 @@
+import itertools
+import math
+import numpy
+from typing import Any, NamedTuple, Optional
+
+
+class Uniform(NamedTuple):
+    '''Values drawn uniformly from [low, high), on a log scale if log.'''
+    low: float
+    high: float
+    log: bool = False
+
+    def sample(self, rng: numpy.random.Generator) -> float:
+        if self.log:
+            return float(math.exp(rng.uniform(math.log(self.low), math.log(self.high))))
+        return float(rng.uniform(self.low, self.high))
+
+
+def grid_search(space: dict[str, list]) -> list[dict[str, Any]]:
+    '''Return every combination of the values listed in space, in row-major order.'''
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search(
+    space: dict[str, Any],
+    n: int,
+    seed: Optional[int] = None
+) -> list[dict[str, Any]]:
+    '''
+    Return n configurations drawn at random from space.
+
+    Each setting is either a list of values, one of which is picked uniformly, a Uniform
+    distribution, or a single value used in every configuration.
+    '''
+    rng = numpy.random.default_rng(seed)
+    configs = []
+    for _ in range(n):
+        config = {}
+        for name, values in space.items():
+            if isinstance(values, Uniform):
+                config[name] = values.sample(rng)
+            elif isinstance(values, list):
+                config[name] = values[rng.integers(len(values))]
+            else:
+                config[name] = values
+        configs.append(config)
+    return configs
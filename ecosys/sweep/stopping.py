@@ -0,0 +1,39 @@
+import statistics
+from typing import Optional
+
+
+class MedianStopping:
+    '''
+    Stop runs whose running reward lags the median of the other runs at the same episode.
+
+    A run is only judged after grace_episodes episodes, and only once min_runs other runs have
+    reported at least as many episodes. It is stopped if its running reward is more than margin
+    below the median of their running rewards at that episode.
+    '''
+    def __init__(self, grace_episodes: int = 1000, min_runs: int = 3, margin: float = 10.):
+        self.grace_episodes = grace_episodes
+        self.min_runs = min_runs
+        self.margin = margin
+        # Reported (episode, running reward) of every run, in reporting order
+        self._history: dict[int, list[tuple[int, float]]] = {}
+
+    def report(self, run_id: int, episode: int, running_reward: float) -> bool:
+        '''Record the progress of a run, returning whether it should be stopped.'''
+        self._history.setdefault(run_id, []).append((episode, running_reward))
+        if episode < self.grace_episodes:
+            return False
+        others = [
+            reward for other, history in self._history.items()
+            if other != run_id and (reward := self._reward_at(history, episode)) is not None
+        ]
+        if len(others) < self.min_runs:
+            return False
+        return running_reward < statistics.median(others) - self.margin
+
+    @staticmethod
+    def _reward_at(history: list[tuple[int, float]], episode: int) -> Optional[float]:
+        '''Running reward of the first report at or after episode, None if the run is not there yet.'''
+        for reported, reward in history:
+            if reported >= episode:
+                return reward
+        return None
@@ -0,0 +1,66 @@
+import collections
+import statistics
+from typing import Any, Callable
+
+
+# Settings of a run, as in app/train.py
+DEFAULT_CONFIG = {
+    'hidden_units': 64,
+    'learning_rate': 0.01,
+    'gamma': 0.99,
+    'max_steps': 500,
+    'reward_threshold': 270,
+    'min_episodes': 1000,
+    'max_episodes': 30000,
+    'num_envs': 1,
+    'grid_dim': 10,
+    'n_resources': 20,
+    'seed': None,
+}
+
+
+def train_trial(config: dict[str, Any], report: Callable[[int, float], bool]) -> dict[str, Any]:
+    '''
+    Train an ActorCritic model with the settings of config, merged over DEFAULT_CONFIG.
+
+    report(episode, running_reward) is called after every training step and returns whether
+    to stop the run. Returns the number of episodes, the final running reward and whether
+    the reward threshold was reached.
+    '''
+    # Imported here so that the sweep scheduler does not load TensorFlow
+    import gym
+    import keras
+    import tensorflow as tf
+    import ecosys  # noqa: F401
+    from ecosys.models import ActorCritic
+    from ecosys.training import ActorCriticTrainer, BatchedActorCriticTrainer
+    config = {**DEFAULT_CONFIG, **config}
+    if config['seed'] is not None:
+        tf.random.set_seed(config['seed'])
+    options = {'grid_dim': config['grid_dim'], 'n_resources': config['n_resources']}
+    num_envs = config['num_envs']
+    model = ActorCritic(num_actions=4, num_hidden_units=config['hidden_units'])
+    optimizer = keras.optimizers.Adam(learning_rate=config['learning_rate'])
+    if num_envs > 1:
+        env = gym.make('EcosysVector-v0', num_envs=num_envs)
+        trainer = BatchedActorCriticTrainer(env, model, optimizer)
+    else:
+        env = gym.make('Ecosys-v0')
+        trainer = ActorCriticTrainer(env, model, optimizer)
+    env.reset(seed=config['seed'], options=options)
+    episodes_reward: collections.deque = collections.deque(maxlen=config['max_episodes'])
+    running_reward, episode, solved = 0., 0, False
+    while episode < config['max_episodes']:
+        initial_state, _ = env.reset(options=options)
+        episode_rewards = trainer.train_step(
+            tf.cast(initial_state, tf.int8), config['gamma'], config['max_steps']).numpy().reshape(-1).tolist()
+        episodes_reward.extend(episode_rewards)
+        episode += len(episode_rewards)
+        running_reward = statistics.mean(episodes_reward)
+        if running_reward > config['reward_threshold'] and episode >= config['min_episodes']:
+            solved = True
+            break
+        if report(episode, running_reward):
+            break
+    env.close()
+    return {'episodes': episode, 'running_reward': running_reward, 'solved': solved}
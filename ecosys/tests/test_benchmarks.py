@@ -0,0 +1,19 @@
+from ecosys.benchmarks import compare, load_results, run_suite, save_results
+
+
+def test_run_suite(tmp_path):
+    results = run_suite([3, 10], [5, 20], n_steps=100, n_resets=10, n_episodes=None)
+    # 21 entities do not fit on a 3x3 grid
+    assert set(results) == {'grid_dim=3,n_resources=5', 'grid_dim=10,n_resources=5', 'grid_dim=10,n_resources=20'}
+    assert all(metrics['steps_per_sec'] > 0 for metrics in results.values())
+    save_results(results, tmp_path / 'results.json')
+    assert load_results(tmp_path / 'results.json') == results
+
+
+def test_compare():
+    baseline = {'a': {'steps_per_sec': 100., 'step_p99_us': 10.}, 'b': {'steps_per_sec': 100.}}
+    results = {'a': {'steps_per_sec': 95., 'step_p99_us': 12.}, 'b': {'steps_per_sec': 50.}, 'c': {'steps_per_sec': 1.}}
+    regressions = compare(results, baseline, threshold=0.1)
+    assert [(r.config, r.metric) for r in regressions] == [('a', 'step_p99_us'), ('b', 'steps_per_sec')]
+    assert regressions[1].change == -0.5
+    assert compare(results, baseline, threshold=0.6) == []
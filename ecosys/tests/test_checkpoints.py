@@ -0,0 +1,40 @@
+import os
+import numpy as np
+import tensorflow as tf
+import keras
+from ecosys.models import ActorCritic
+from ecosys.training import CheckpointManager
+
+
+def _model_and_optimizer(seed: int) -> tuple[tf.keras.Model, keras.optimizers.Optimizer]:
+    tf.random.set_seed(seed)
+    model = ActorCritic(num_actions=4, num_hidden_units=8)
+    model(tf.zeros([1, 8]))
+    optimizer = keras.optimizers.Adam(learning_rate=0.01)
+    return model, optimizer
+
+
+def test_checkpoint_save_restore(tmp_path):
+    model, optimizer = _model_and_optimizer(0)
+    with CheckpointManager(str(tmp_path), keep=2) as checkpoints:
+        assert checkpoints.restore(model, optimizer) is None
+        for step in range(1, 5):
+            with tf.GradientTape() as tape:
+                logits, value = model(tf.ones([2, 8]))
+                loss = tf.reduce_sum(logits) + tf.reduce_sum(value)
+            grads = tape.gradient(loss, model.trainable_variables)
+            optimizer.apply_gradients(zip(grads, model.trainable_variables))
+            checkpoints.save(step * 10, model, optimizer, {'rewards': [float(step)]})
+        checkpoints.wait()
+        # Only the last two checkpoints are kept, and no temporary file is left behind
+        assert [step for step, _ in checkpoints.checkpoints()] == [30, 40]
+        assert sorted(os.listdir(tmp_path)) == ['ckpt-00000030.npz', 'ckpt-00000040.npz']
+    # Restore into a fresh model and optimizer
+    restored_model, restored_optimizer = _model_and_optimizer(1)
+    step, state = CheckpointManager(str(tmp_path)).restore(restored_model, restored_optimizer)
+    assert step == 40 and state == {'rewards': [4.]}
+    for expected, restored in zip(model.get_weights(), restored_model.get_weights()):
+        np.testing.assert_array_equal(expected, restored)
+    for expected, restored in zip(optimizer.variables, restored_optimizer.variables):
+        np.testing.assert_array_equal(expected.numpy(), restored.numpy())
+    assert int(restored_optimizer.iterations) == 4
@@ -0,0 +1,41 @@
+import numpy
+from ecosys.environment import EcosysVectorEnv
+from ecosys.training.curriculum import Curriculum, Stage, max_return
+
+
+def test_curriculum_stages():
+    curriculum = Curriculum.linear((10, 20), (40, 80), 4, solved_fraction=0.5, window=10, min_episodes=20)
+    assert [stage[:2] for stage in curriculum.stages] == [(10, 20), (20, 40), (30, 60), (40, 80)]
+    assert curriculum.stages[-1].reward_threshold == 0.5 * max_return(80)
+    assert curriculum.options() == {'grid_dim': 10, 'n_resources': 20}
+    # The stage only advances after min_episodes episodes above the threshold
+    assert not curriculum.update([200.] * 10)
+    assert not curriculum.update([0.] * 10)
+    assert not curriculum.update([200.] * 5)
+    assert curriculum.update([200.] * 5) and curriculum.stage == 1
+    assert numpy.isnan(curriculum.running_reward)
+    for stage in range(2, 4):
+        curriculum.update([max_return(80)] * 20)
+        assert curriculum.stage == stage
+    assert not curriculum.finished
+    curriculum.update([max_return(80)] * 20)
+    assert curriculum.finished and curriculum.stage == 3
+
+
+def test_curriculum_vector_env():
+    curriculum = Curriculum(
+        [Stage(10, 20, 100.), Stage(20, 40, 100.), Stage(30, 60, 100.)], window=10, min_episodes=1, replay=0.5, seed=0)
+    curriculum.stage = 2
+    env = EcosysVectorEnv(num_envs=64)
+    options = curriculum.options(64)
+    env.reset(seed=0, options=options)
+    assert (env.grid_dim == options['grid_dim']).all() and (env.n_resources == options['n_resources']).all()
+    current = options['grid_dim'] == 30
+    assert 10 < current.sum() < 54 and set(options['grid_dim']) == {10, 20, 30}
+    # Only the episodes of the current stage count towards its running reward
+    rewards = numpy.where(current, 0., 1000.)
+    assert not curriculum.update(rewards) and curriculum.running_reward == 0.
+    state = curriculum.state_dict()
+    restored = Curriculum(curriculum.stages, window=10, min_episodes=1, replay=0.5)
+    restored.load_state_dict(state)
+    assert (restored.options(64)['grid_dim'] == curriculum.options(64)['grid_dim']).all()
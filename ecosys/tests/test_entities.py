@@ -1,4 +1,4 @@
-from ecosys.environment.entities import Entity
+from ecosys.environment.entities import Entity, EntityStore, Herbivore, Resource
 
 
 def test_distance():
@@ -17,3 +17,17 @@ def test_interact():
     ent3 = Entity((0, 0))
     assert ent1.interact(ent2) is False
     assert ent1.interact(ent3) is True
+
+
+def test_entity_view():
+    store = EntityStore(2)
+    store.add((1, 2), Herbivore.type_id, Herbivore.default_color)
+    store.add((3, 4), Resource.type_id, Resource.default_color)
+    herb = Herbivore.view(store, 0)
+    res = Resource.view(store, 1)
+    herb.move(1)
+    assert (store.x[0], store.y[0]) == (2, 2)
+    assert herb.distance(res) == 3
+    assert res.is_eaten_by(herb)
+    assert herb.color == (0, 255, 0)
+    assert not hasattr(herb, '__dict__')
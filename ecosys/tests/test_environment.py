@@ -0,0 +1,179 @@
+import numpy
+import gym
+import ecosys  # noqa: F401
+from ecosys.environment import EcosysEnv, EcosysVectorEnv, LayoutCache
+from ecosys.environment.food_field import food_sums
+from ecosys.environment.observation import food_direction, pack_obs, unpack_obs
+
+
+def _copy_layout(envs: list[EcosysEnv], vec_env: EcosysVectorEnv) -> None:
+    '''Copy the entity positions of the single environments into the vector environment.'''
+    for i, env in enumerate(envs):
+        vec_env._herb[i] = env._herb.pos
+        vec_env._res[i, :len(env._res)] = [r.pos for r in env._res]
+        vec_env._alive[i] = False
+        vec_env._alive[i, :len(env._res)] = True
+    vec_env.state = vec_env._get_obs()
+
+
+def test_vector_env_make():
+    env = gym.make('EcosysVector-v0', num_envs=3)
+    state, info = env.reset(seed=0)
+    assert state.shape == (3, 2, 4)
+    assert (info['resources_remaining'] == 20).all()
+
+
+def test_vector_env_matches_single_env():
+    rng = numpy.random.default_rng(0)
+    envs = [EcosysEnv() for _ in range(8)]
+    vec_env = EcosysVectorEnv(num_envs=8)
+    vec_env.reset(seed=0)
+    for env in envs:
+        env.reset()
+    _copy_layout(envs, vec_env)
+    for _ in range(50):
+        actions = rng.integers(0, 4, size=8)
+        vec_state, vec_reward, vec_terminated, _, info = vec_env.step(actions)
+        for i, env in enumerate(envs):
+            state, reward, terminated, _, _ = env.step(int(actions[i]))
+            final_state = info['final_observation'][i] if terminated else vec_state[i]
+            assert (final_state == state).all()
+            assert vec_reward[i] == reward
+            assert vec_terminated[i] == terminated
+            if terminated:
+                env.reset()
+        _copy_layout(envs, vec_env)
+
+
+def test_vector_env_reset_options():
+    env = EcosysVectorEnv(num_envs=4)
+    _, info = env.reset(seed=1, options={'grid_dim': [5, 10, 20, 40], 'n_resources': [1, 5, 20, 100]})
+    assert list(info['resources_remaining']) == [1, 5, 20, 100]
+    assert (info['herbivore_pos'] < env.grid_dim[:, None]).all()
+
+
+def test_food_field_matches_direct_sums():
+    rng = numpy.random.default_rng(0)
+    env = EcosysEnv()
+    # Dense grids keep a food field, sparse ones sum over the remaining resources
+    for options, dense in [
+        ({'grid_dim': 10, 'n_resources': 20}, True),
+        ({'grid_dim': 60, 'n_resources': 1000}, True),
+        ({'grid_dim': 30, 'n_resources': 20}, False),
+    ]:
+        env.reset(options=options)
+        assert (env._food is not None) == dense
+        for _ in range(100):
+            state, _, terminated, _, info = env.step(int(rng.integers(0, 4)))
+            alive = env._store.alive[1:]
+            food = food_sums(env._herb.x, env._herb.y, env._store.x[1:][alive], env._store.y[1:][alive])
+            assert (env._grid >= 0).sum() == info['resources_remaining']
+            assert state[0, food_direction(food)] == 1
+            if terminated:
+                env.reset()
+
+
+def test_seeded_reset_is_reproducible():
+    env = EcosysEnv()
+    env.reset(seed=3)
+    layout = (env._store.x.copy(), env._store.y.copy())
+    env.reset()
+    env.reset(seed=3)
+    assert (env._store.x == layout[0]).all() and (env._store.y == layout[1]).all()
+    vec_env = EcosysVectorEnv(num_envs=4)
+    vec_env.reset(seed=3)
+    herb, res = vec_env._herb.copy(), vec_env._res.copy()
+    vec_env.reset(seed=3)
+    assert (vec_env._herb == herb).all() and (vec_env._res == res).all()
+    # The first sub-environment draws its layout exactly like a single environment
+    assert (vec_env._herb[0] == (layout[0][0], layout[1][0])).all()
+    assert (vec_env._res[0] == numpy.stack([layout[0][1:], layout[1][1:]], axis=1)).all()
+
+
+def test_autoreset_layouts_are_new():
+    for seed in range(5):
+        vec_env = EcosysVectorEnv(num_envs=4)
+        vec_env.reset(seed=seed)
+        initial = [(vec_env._herb[i].copy(), vec_env._res[i].copy()) for i in range(4)]
+        # Walk every herbivore into the wall
+        vec_env.step(numpy.zeros(4, dtype=numpy.int64))
+        while vec_env._steps[0] > 0:
+            vec_env.step(numpy.zeros(4, dtype=numpy.int64))
+        # The layout sub-environment 0 was auto-reset to is none of the seeded initial ones
+        for herb, res in initial:
+            assert not ((vec_env._herb[0] == herb).all() and (vec_env._res[0] == res).all())
+
+
+def test_layout_cache(tmp_path):
+    cache = LayoutCache(10, 20, size=1000, seed=0)
+    assert cache.layouts.dtype == numpy.uint8
+    assert (cache.layouts == LayoutCache(10, 20, size=1000, seed=0).layouts).all()
+    # Every layout places the entities on distinct cells of the grid
+    cells = cache[:][:, :, 0]*10 + cache[:][:, :, 1]
+    assert (numpy.diff(numpy.sort(cells, axis=1), axis=1) > 0).all()
+    cache.save(tmp_path / 'layouts.npy')
+    cache = LayoutCache.load(tmp_path / 'layouts.npy', grid_dim=10)
+    env = EcosysEnv(layout_cache=cache)
+    env.reset(seed=0)
+    layout = numpy.stack([env._store.x, env._store.y], axis=1)
+    assert (cache.layouts == layout).all(axis=(1, 2)).any()
+    vec_env = EcosysVectorEnv(num_envs=4, layout_cache=cache)
+    vec_env.reset(seed=0)
+    layouts = numpy.concatenate([vec_env._herb[:, None], vec_env._res], axis=1)
+    assert all((cache.layouts == layout).all(axis=(1, 2)).any() for layout in layouts)
+
+
+def test_packed_obs_matches_unpacked():
+    rng = numpy.random.default_rng(0)
+    env, packed_env = EcosysEnv(), EcosysEnv(packed_obs=True)
+    vec_env, packed_vec_env = EcosysVectorEnv(num_envs=8), EcosysVectorEnv(num_envs=8, packed_obs=True)
+    state, _ = env.reset(seed=0)
+    packed_state, _ = packed_env.reset(seed=0)
+    vec_state, _ = vec_env.reset(seed=0)
+    packed_vec_state, _ = packed_vec_env.reset(seed=0)
+    buffer = packed_vec_state
+    for _ in range(100):
+        assert packed_state.dtype == numpy.uint8 and pack_obs(state) == packed_state
+        assert (unpack_obs(packed_vec_state) == vec_state).all()
+        # The packed observations are written into the same array
+        assert packed_vec_state is buffer
+        action = int(rng.integers(0, 4))
+        state, _, terminated, _, _ = env.step(action)
+        packed_state, _, _, _, _ = packed_env.step(action)
+        if terminated:
+            state, _ = env.reset(seed=action)
+            packed_state, _ = packed_env.reset(seed=action)
+        actions = rng.integers(0, 4, size=8)
+        vec_state, _, _, _, _ = vec_env.step(actions)
+        packed_vec_state, _, _, _, _ = packed_vec_env.step(actions)
+
+
+def _reference_patch(herb: numpy.ndarray, res: numpy.ndarray, grid_dim: int, patch_size: int) -> numpy.ndarray:
+    '''Egocentric patch computed cell by cell.'''
+    patch = numpy.zeros((patch_size, patch_size, 2), dtype=numpy.uint8)
+    for i in range(patch_size):
+        for j in range(patch_size):
+            x, y = herb[0] + j - patch_size // 2, herb[1] + i - patch_size // 2
+            patch[i, j, 0] = any((r == (x, y)).all() for r in res)
+            patch[i, j, 1] = not (0 <= x < grid_dim and 0 <= y < grid_dim)
+    return patch
+
+
+def test_patch_obs():
+    rng = numpy.random.default_rng(0)
+    env = EcosysEnv(patch_size=5)
+    vec_env = EcosysVectorEnv(num_envs=4, patch_size=5)
+    state, _ = env.reset(seed=0)
+    vec_state, _ = vec_env.reset(seed=0, options={'grid_dim': [6, 10, 10, 12]})
+    assert env.observation_space.contains(state) and vec_state.shape == (4, 5, 5, 2)
+    assert env._food is None
+    for _ in range(200):
+        res = numpy.array([r.pos for r in env._res]).reshape(-1, 2)
+        assert (state == _reference_patch(env._herb.pos, res, env.grid_dim, 5)).all()
+        for i in range(4):
+            res = vec_env._res[i][vec_env._alive[i]]
+            assert (vec_state[i] == _reference_patch(vec_env._herb[i], res, vec_env.grid_dim[i], 5)).all()
+        state, _, terminated, _, _ = env.step(int(rng.integers(0, 4)))
+        if terminated:
+            state, _ = env.reset()
+        vec_state, _, _, _, _ = vec_env.step(rng.integers(0, 4, size=4))
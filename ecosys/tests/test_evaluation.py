@@ -0,0 +1,39 @@
+import numpy
+from ecosys.evaluation import compare, confidence_interval, evaluate, summarize
+from ecosys.models import ActorCriticPolicy
+from ecosys.rollout import RandomPolicy
+
+
+def _policy(seed: int) -> ActorCriticPolicy:
+    rng = numpy.random.default_rng(seed)
+    return ActorCriticPolicy({
+        'common/kernel': rng.normal(size=(8, 16)), 'common/bias': numpy.zeros(16),
+        'actor/kernel': rng.normal(size=(16, 4)), 'actor/bias': numpy.zeros(4),
+        'critic/kernel': numpy.zeros((16, 1)), 'critic/bias': numpy.zeros(1),
+    })
+
+
+def test_evaluate():
+    results = evaluate(RandomPolicy(seed=0), n_episodes=100, seed=0, num_envs=16, max_episode_steps=50)
+    assert len(results.returns) == 100 and (results.seeds == numpy.arange(100)).all()
+    assert ((results.lengths >= 1) & (results.lengths <= 50)).all()
+    # Episodes end at the wall, by eating everything or at the step limit
+    assert (results.wall_deaths | results.solved | (results.lengths == 50)).all()
+    assert not (results.wall_deaths & results.solved).any()
+    # The results of a deterministic policy do not depend on how many episodes run at once
+    policy = _policy(0)
+    a = evaluate(policy, n_episodes=60, seed=3, num_envs=32)
+    b = evaluate(policy, n_episodes=60, seed=3, num_envs=7)
+    assert all((x == y).all() for x, y in zip(a, b))
+
+
+def test_statistics():
+    x = numpy.random.default_rng(0).normal(1., 2., size=10000)
+    mean, low, high = confidence_interval(x)
+    assert low < 1. < high and numpy.isclose(high - low, 2 * 1.96 * 2. / 100, rtol=0.05)
+    policy = _policy(1)
+    baseline = evaluate(policy, n_episodes=50, seed=0)
+    summary = summarize(baseline)
+    assert numpy.isclose(summary['return'].mean, baseline.returns.mean())
+    difference = compare(baseline, evaluate(policy, n_episodes=50, seed=0))
+    assert all(estimate == (0., 0., 0.) for estimate in difference.values())
@@ -0,0 +1,33 @@
+import pytest
+tf = pytest.importorskip('tensorflow')
+keras = pytest.importorskip('keras')
+from ecosys.environment import EcosysVectorEnv  # noqa: E402
+from ecosys.models import ActorCritic  # noqa: E402
+from ecosys.training import ImpalaTrainer  # noqa: E402
+
+
+def test_impala_trainer():
+    trainer = ImpalaTrainer(
+        lambda: EcosysVectorEnv(num_envs=4), ActorCritic(4, 16), keras.optimizers.Adam(),
+        num_actors=2, unroll_length=10, batch_size=2, queue_size=2, publish_every=2, seed=0)
+    with trainer:
+        weights = trainer.model.get_weights()
+        for _ in range(4):
+            episode_rewards = trainer.train_step()
+            assert all(isinstance(reward, float) for reward in episode_rewards)
+        assert trainer.updates == 4 and trainer.steps == 4 * 2 * 4 * 10
+        assert trainer.policy_lag >= 0
+        # Weights were published every 2 updates, after the initial ones
+        assert trainer.publisher.latest()[0] == 2
+        assert any((w != v).any() for w, v in zip(weights, trainer.model.get_weights()))
+    assert not trainer.running
+
+
+def test_impala_actor_error():
+    def env_fn():
+        env = EcosysVectorEnv(num_envs=2)
+        env.step_wait = None
+        return env
+    trainer = ImpalaTrainer(env_fn, ActorCritic(4, 16), keras.optimizers.Adam(), num_actors=1)
+    with trainer, pytest.raises(RuntimeError, match='Actor 0 failed'):
+        trainer.train_step()
@@ -0,0 +1,21 @@
+import sys
+import json
+import subprocess
+from ecosys.benchmarks import bench_import
+
+# Seconds allowed to import ecosys.environment, gym and NumPy included
+IMPORT_BUDGET = 2.
+
+
+def _loaded_modules(module: str) -> set[str]:
+    '''Return the top-level modules loaded by importing module in a fresh interpreter.'''
+    code = f'import sys, json; import {module}; print(json.dumps(sorted(sys.modules)))'
+    output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True, check=True).stdout
+    return {name.split('.')[0] for name in json.loads(output.splitlines()[-1])}
+
+
+def test_environment_import_is_light():
+    for module in ['ecosys', 'ecosys.environment', 'ecosys.models', 'ecosys.training', 'ecosys.serving']:
+        loaded = _loaded_modules(module)
+        assert 'tensorflow' not in loaded and 'keras' not in loaded and 'pygame' not in loaded, module
+    assert bench_import('ecosys.environment', repeats=1)['import_ms'] < 1e3*IMPORT_BUDGET
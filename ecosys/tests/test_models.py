@@ -0,0 +1,17 @@
+import pytest
+from ecosys.environment import EcosysVectorEnv
+
+
+def test_conv_actor_critic_on_patches():
+    tf = pytest.importorskip('tensorflow')
+    keras = pytest.importorskip('keras')
+    from ecosys.models import ConvActorCritic
+    from ecosys.training import BatchedActorCriticTrainer
+    env = EcosysVectorEnv(num_envs=4, patch_size=5)
+    model = ConvActorCritic(4, 16, patch_size=5)
+    trainer = BatchedActorCriticTrainer(env, model, keras.optimizers.Adam())
+    state, _ = env.reset(seed=0)
+    logits, value = model(tf.reshape(tf.cast(state, tf.int8), [4, -1]))
+    assert logits.shape == (4, 4) and value.shape == (4, 1)
+    rewards = trainer.train_step(tf.cast(state, tf.int8), 0.99, 20)
+    assert rewards.shape == (4,)
@@ -0,0 +1,51 @@
+import numpy
+import gym
+import ecosys  # noqa: F401
+from ecosys.environment import EcosysEnv, EcosysMultiAgentEnv
+
+
+def test_single_herbivore_matches_single_env():
+    for seed in range(5):
+        env = EcosysEnv()
+        state, _ = env.reset(seed=seed)
+        multi_env = EcosysMultiAgentEnv(
+            grid_dim=10, n_herbivores=1, n_carnivores=0, n_resources=20, view_radius=10, regrowth_steps=None)
+        multi_env.reset(seed=seed)
+        # Copy the layout of the single environment
+        multi_env._pos[0] = env._herb.pos
+        resources = multi_env._food_grids[1]
+        resources[:] = 0
+        for res in env._res:
+            resources[res.y + 10, res.x + 10] = 1
+        multi_env._update_food_grids()
+        assert (multi_env._get_obs()[0] == state).all()
+        rng = numpy.random.default_rng(seed)
+        for _ in range(100):
+            action = int(rng.integers(0, 4))
+            state, reward, terminated, _, _ = env.step(action)
+            multi_state, multi_reward, multi_terminated, _, info = multi_env.step(numpy.array([action]))
+            if terminated:
+                break
+            assert (multi_state[0] == state).all()
+            assert multi_reward[0] == reward and not multi_terminated[0]
+            assert info['resources_remaining'] == env._n_remaining
+
+
+def test_multi_agent_interactions():
+    env = gym.make(
+        'EcosysMultiAgent-v0', grid_dim=30, n_herbivores=200, n_carnivores=100, n_resources=300,
+        view_radius=3, regrowth_steps=2, render_mode='rgb_array')
+    state, info = env.reset(seed=0)
+    assert state.shape == (300, 2, 4) and info['herbivores_alive'] == 200
+    rng = numpy.random.default_rng(0)
+    eaten = 0
+    for _ in range(20):
+        state, rewards, terminated, truncated, info = env.step(rng.integers(0, 4, size=300))
+        eaten += int((rewards[:200] == 10).sum())
+        # Dead agents observe zeros, alive agents one food direction
+        assert (state[terminated] == 0).all()
+        assert (state[~terminated, 0].sum(axis=1) == 1).all()
+    # Herbivores are eaten by carnivores or leave the grid, and eaten resources grow back
+    assert info['herbivores_alive'] < 200
+    assert eaten > 300 - info['resources_remaining']
+    assert env.render().shape == (30, 30, 3)
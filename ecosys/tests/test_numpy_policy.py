@@ -0,0 +1,45 @@
+import numpy
+import pytest
+from ecosys.models import ActorCriticPolicy, export_npz
+
+
+def test_policy_matches_model(tmp_path):
+    tf = pytest.importorskip('tensorflow')
+    from ecosys.models import ActorCritic
+    tf.random.set_seed(0)
+    model = ActorCritic(num_actions=4, num_hidden_units=64)
+    obs = numpy.random.default_rng(0).integers(0, 2, size=(256, 2, 4), dtype=numpy.int8)
+    logits, values = [x.numpy() for x in model(obs.reshape(len(obs), -1))]
+    export_npz(model, tmp_path / 'ActorCritic.npz')
+    policy = ActorCriticPolicy.load(tmp_path / 'ActorCritic.npz')
+    policy_logits, policy_values = policy.forward(obs)
+    assert numpy.allclose(policy_logits, logits, atol=1e-5)
+    assert numpy.allclose(policy_values, values, atol=1e-5)
+    assert (policy(obs) == numpy.argmax(logits, axis=1)).all()
+    assert (ActorCriticPolicy.from_model(model)(obs) == policy(obs)).all()
+
+
+def test_sampled_actions():
+    rng = numpy.random.default_rng(0)
+    weights = {
+        'common/kernel': rng.normal(size=(8, 16)), 'common/bias': numpy.zeros(16),
+        'actor/kernel': numpy.zeros((16, 4)), 'actor/bias': numpy.log([0.1, 0.2, 0.3, 0.4]),
+        'critic/kernel': rng.normal(size=(16, 1)), 'critic/bias': numpy.zeros(1),
+    }
+    policy = ActorCriticPolicy(weights, greedy=False, seed=0)
+    actions = policy(numpy.zeros((20000, 2, 4)))
+    assert numpy.allclose(numpy.bincount(actions, minlength=4)/len(actions), [0.1, 0.2, 0.3, 0.4], atol=0.01)
+
+
+def test_policy_from_checkpoint(tmp_path):
+    pytest.importorskip('tensorflow')
+    keras = pytest.importorskip('keras')
+    from ecosys.models import ActorCritic
+    from ecosys.training import CheckpointManager
+    model = ActorCritic(num_actions=4, num_hidden_units=16)
+    obs = numpy.random.default_rng(0).integers(0, 2, size=(64, 2, 4), dtype=numpy.int8)
+    logits, _ = model(obs.reshape(len(obs), -1))
+    with CheckpointManager(tmp_path) as checkpoints:
+        checkpoints.save(1, model, keras.optimizers.Adam())
+    policy = ActorCriticPolicy.load(checkpoints.latest())
+    assert numpy.allclose(policy.forward(obs)[0], logits.numpy(), atol=1e-5)
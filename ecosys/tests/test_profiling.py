@@ -0,0 +1,46 @@
+import csv
+import json
+import pytest
+from ecosys.environment import EcosysEnv
+from ecosys.profiling import Profiler, MemorySink, CSVSink, JSONLSink, format_breakdown
+
+
+def test_profiler_sinks(tmp_path):
+    memory = MemorySink()
+    profiler = Profiler([memory, CSVSink(tmp_path / 'profile.csv'), JSONLSink(tmp_path / 'profile.jsonl')])
+    env = EcosysEnv()
+    profiler.instrument(env, 'step', '_get_obs')
+    env.reset()
+    for _ in range(3):
+        with profiler.timer('loop'):
+            env.step(0)
+        profiler.count('steps')
+    metrics = profiler.flush(step=1)
+    # Counters start over after a flush
+    assert profiler.flush(step=2).keys() == {'wall/seconds'}
+    profiler.close()
+    assert metrics['step/calls'] == 3 and metrics['_get_obs/calls'] == 4 and metrics['steps'] == 3
+    assert metrics['loop/seconds'] >= metrics['step/seconds'] > 0
+    assert memory.records[0] == (1, metrics)
+    with open(tmp_path / 'profile.csv') as f:
+        assert len(list(csv.reader(f))) == len(metrics) + 2
+    with open(tmp_path / 'profile.jsonl') as f:
+        assert json.loads(f.readline()) == {'step': 1, **metrics}
+    assert 'step' in format_breakdown(metrics)
+
+
+def test_trainer_phases():
+    tf = pytest.importorskip('tensorflow')
+    keras = pytest.importorskip('keras')
+    from ecosys.models import ActorCritic
+    from ecosys.training import ActorCriticTrainer
+    profiler = Profiler()
+    env = EcosysEnv()
+    trainer = ActorCriticTrainer(env, ActorCritic(4, 16), keras.optimizers.Adam(), profiler=profiler)
+    for _ in range(2):
+        state, _ = env.reset(seed=0)
+        trainer.train_step(tf.constant(state, dtype=tf.int8), 0.99, 20)
+    metrics = profiler.flush(step=2)
+    for phase in ['run_episode', 'get_expected_return', 'compute_loss', 'gradient', 'apply_gradients']:
+        assert metrics[f'{phase}/calls'] == 2
+        assert metrics[f'{phase}/seconds'] >= 0
@@ -0,0 +1,65 @@
+import numpy
+import pytest
+from ecosys.environment import EcosysEnv, EcosysVectorEnv
+from ecosys.environment.video import GifWriter, RecordEpisodes
+
+
+def test_rgb_array_render():
+    env = EcosysEnv(render_mode='rgb_array')
+    env.reset(seed=0)
+    frame = env.render()
+    assert frame.shape == (600, 600, 3) and frame.dtype == numpy.uint8
+    scale = env.render_scale
+    # One colored cell per entity
+    cells = frame[::scale, ::scale]
+    assert (cells == env._herb.color).all(axis=2).sum() == 1
+    assert (cells == (255, 255, 255)).all(axis=2).sum() == env.n_resources
+    assert (cells[env._herb.y, env._herb.x] == env._herb.color).all()
+    # Batch rendering matches the single environment
+    vec_env = EcosysVectorEnv(num_envs=2, render_mode='rgb_array', render_scale=scale)
+    vec_env.reset(seed=0)
+    assert (vec_env.render()[0] == frame).all()
+
+
+def test_render_cells_fit_screen():
+    env = EcosysEnv()
+    env.reset(seed=0, options={'grid_dim': 1000, 'n_resources': 2000})
+    env.step(1)
+    # Grids wider than the screen are shrunk to it, keeping the herbivore on top
+    cells = env._render_cells(env.screen_width)
+    assert cells.shape == (600, 600)
+    herb_color = env._store.color[0]
+    assert cells[env._herb.y*600 // 1000, env._herb.x*600 // 1000] == herb_color and (cells == herb_color).sum() == 1
+    assert (cells > 0).sum() <= env.n_resources + 1
+
+
+def test_gif_export(tmp_path):
+    tf = pytest.importorskip('tensorflow')
+    rng = numpy.random.default_rng(0)
+    env = RecordEpisodes(EcosysEnv(), str(tmp_path / 'episode{episode}.gif'))
+    env.reset(seed=1)
+    frames = [env.unwrapped.render_indices()]
+    terminated = False
+    while not terminated:
+        _, _, terminated, _, _ = env.step(int(rng.integers(0, 4)))
+        frames.append(env.unwrapped.render_indices())
+    env.close()
+    with open(tmp_path / 'episode0.gif', 'rb') as f:
+        decoded = tf.io.decode_gif(f.read()).numpy()
+    # Repeated frames are merged into one
+    frames = [frame for i, frame in enumerate(frames) if i == 0 or (frame != frames[i-1]).any()]
+    assert (decoded == env.unwrapped.palette[numpy.stack(frames)]).all()
+
+
+def test_gif_writer_palettes(tmp_path):
+    tf = pytest.importorskip('tensorflow')
+    rng = numpy.random.default_rng(0)
+    for n_colors in [2, 5, 200]:
+        palette = rng.integers(0, 256, size=(n_colors, 3))
+        frames = rng.integers(0, n_colors, size=(3, 7, 11))
+        with GifWriter(tmp_path / 'frames.gif', palette) as writer:
+            for frame in frames:
+                writer.write(frame)
+        with open(tmp_path / 'frames.gif', 'rb') as f:
+            decoded = tf.io.decode_gif(f.read()).numpy()
+        assert (decoded == palette[frames]).all()
@@ -0,0 +1,69 @@
+import numpy
+import pytest
+tf = pytest.importorskip('tensorflow')
+from ecosys.training.returns import discounted_returns, generalized_advantage_estimates, vtrace  # noqa: E402
+
+
+def _loop_returns(rewards, gamma, dones):
+    returns = numpy.zeros_like(rewards)
+    for b in range(rewards.shape[0]):
+        discounted_sum = 0.
+        for t in reversed(range(rewards.shape[1])):
+            discounted_sum = rewards[b, t] + gamma * discounted_sum * (1. - dones[b, t])
+            returns[b, t] = discounted_sum
+    return returns
+
+
+def test_discounted_returns():
+    rng = numpy.random.default_rng(0)
+    rewards = rng.normal(size=(4, 50)).astype(numpy.float32)
+    dones = (rng.random((4, 50)) < 0.1).astype(numpy.float32)
+    expected = _loop_returns(rewards, 0.99, dones)
+    numpy.testing.assert_allclose(discounted_returns(rewards, 0.99, dones).numpy(), expected, rtol=1e-4, atol=1e-4)
+    expected = _loop_returns(rewards, 0.9, numpy.zeros_like(dones))
+    numpy.testing.assert_allclose(discounted_returns(rewards, 0.9).numpy(), expected, rtol=1e-4, atol=1e-4)
+
+
+def test_generalized_advantage_estimates():
+    rng = numpy.random.default_rng(1)
+    rewards = rng.normal(size=(3, 40)).astype(numpy.float32)
+    values = rng.normal(size=(3, 40)).astype(numpy.float32)
+    dones = (rng.random((3, 40)) < 0.1).astype(numpy.float32)
+    # With lambda = 1 the critic targets are the discounted returns
+    _, returns = generalized_advantage_estimates(rewards, values, 0.95, 1., dones)
+    numpy.testing.assert_allclose(returns.numpy(), _loop_returns(rewards, 0.95, dones), rtol=1e-4, atol=1e-4)
+    # With lambda = 0 the advantages are the one-step TD errors
+    advantages, _ = generalized_advantage_estimates(rewards, values, 0.95, 0., dones)
+    next_values = numpy.concatenate([values[:, 1:], numpy.zeros((3, 1))], axis=1) * (1. - dones)
+    numpy.testing.assert_allclose(advantages.numpy(), rewards + 0.95 * next_values - values, rtol=1e-4, atol=1e-4)
+
+
+def test_vtrace():
+    rng = numpy.random.default_rng(2)
+    rewards = rng.normal(size=(3, 30)).astype(numpy.float32)
+    values = rng.normal(size=(3, 30)).astype(numpy.float32)
+    bootstrap = rng.normal(size=3).astype(numpy.float32)
+    dones = (rng.random((3, 30)) < 0.1).astype(numpy.float32)
+    discounts = 0.9 * (1. - dones)
+    log_probs = numpy.log(rng.random((3, 30))).astype(numpy.float32)
+    # On-policy, the targets are the discounted returns bootstrapped with the value after the last step
+    vs, _ = vtrace(log_probs, log_probs, rewards, values, bootstrap, discounts)
+    rewards_with_bootstrap = rewards.copy()
+    rewards_with_bootstrap[:, -1] += discounts[:, -1] * bootstrap
+    expected = _loop_returns(rewards_with_bootstrap, 0.9, dones)
+    numpy.testing.assert_allclose(vs.numpy(), expected, rtol=1e-4, atol=1e-4)
+    # Off-policy, compare with the recursion of Espeholt et al.
+    target_log_probs = numpy.log(rng.random((3, 30))).astype(numpy.float32)
+    vs, advantages = vtrace(log_probs, target_log_probs, rewards, values, bootstrap, discounts, 1., 0.8)
+    rhos = numpy.exp(target_log_probs - log_probs)
+    next_values = numpy.concatenate([values[:, 1:], bootstrap[:, None]], axis=1)
+    expected = numpy.zeros_like(values)
+    acc = numpy.zeros(3)
+    for t in reversed(range(30)):
+        delta = numpy.minimum(1., rhos[:, t]) * (rewards[:, t] + discounts[:, t] * next_values[:, t] - values[:, t])
+        acc = delta + discounts[:, t] * numpy.minimum(0.8, rhos[:, t]) * acc
+        expected[:, t] = acc + values[:, t]
+    numpy.testing.assert_allclose(vs.numpy(), expected, rtol=1e-4, atol=1e-4)
+    next_vs = numpy.concatenate([expected[:, 1:], bootstrap[:, None]], axis=1)
+    numpy.testing.assert_allclose(
+        advantages.numpy(), numpy.minimum(1., rhos) * (rewards + discounts * next_vs - values), rtol=1e-4, atol=1e-4)
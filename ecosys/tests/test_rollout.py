@@ -0,0 +1,38 @@
+import numpy
+import pytest
+from ecosys.environment.observation import unpack_obs
+from ecosys.rollout import RolloutPool, RolloutWorkerError
+
+
+def test_rollout_pool_get_release():
+    with RolloutPool(num_workers=1, envs_per_worker=2, capacity=8, seed=0) as pool:
+        n_steps = 0
+        while n_steps < 20:
+            transitions = pool.get(0, timeout=30.)
+            assert transitions.obs.shape[1:] == (2, 2, 4)
+            assert transitions.rewards.shape == transitions.actions.shape
+            n_steps += len(transitions.rewards)
+            pool.release(0, len(transitions.rewards))
+    assert not pool.running
+
+
+def test_rollout_pool_packed_obs():
+    with RolloutPool(num_workers=1, envs_per_worker=2, capacity=8, seed=0, packed_obs=True) as pool:
+        transitions = pool.get(0, timeout=30.)
+        assert transitions.obs.shape[1:] == (2,) and transitions.obs.dtype == numpy.uint8
+        # Exactly one food direction per observation
+        assert (unpack_obs(transitions.obs)[:, :, 0].sum(axis=-1) == 1).all()
+        pool.release(0, len(transitions.rewards))
+
+
+def test_rollout_pool_crashed_worker():
+    with RolloutPool(num_workers=1, capacity=8, restart_crashed=True) as pool:
+        pool.get(0, timeout=30.)
+        pool._processes[0].kill()
+        pool._processes[0].join()
+        assert pool.get(0, timeout=30.) is not None
+    with RolloutPool(num_workers=1, capacity=8, restart_crashed=False) as pool:
+        pool._processes[0].kill()
+        pool._processes[0].join()
+        with pytest.raises(RolloutWorkerError):
+            pool.check_workers()
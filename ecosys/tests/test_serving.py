@@ -0,0 +1,46 @@
+import json
+import threading
+import http.client
+import numpy
+import pytest
+tf = pytest.importorskip('tensorflow')
+from ecosys.models import ActorCritic  # noqa: E402
+from ecosys.serving import InferenceServer, make_http_server  # noqa: E402
+
+
+@pytest.fixture
+def model():
+    tf.random.set_seed(0)
+    model = ActorCritic(num_actions=4, num_hidden_units=16)
+    model(tf.zeros([1, 8], dtype=tf.int8))
+    return model
+
+
+def test_batched_actions(model):
+    rng = numpy.random.default_rng(0)
+    states = rng.integers(0, 2, size=(64, 2, 4), dtype=numpy.int8)
+    expected = numpy.argmax(model(states.reshape(-1, 8))[0], axis=1)
+    with InferenceServer(model, max_batch_size=16, max_wait=0.01) as server:
+        futures = [server.submit(state) for state in states]
+        assert [future.result() for future in futures] == expected.tolist()
+        assert (server.predict(states) == expected).all()
+        sampled = server.predict(states, greedy=False)
+        assert ((sampled >= 0) & (sampled < 4)).all()
+        # Concurrent requests share model calls
+        assert server.n_batches < len(states)
+
+
+def test_http_front_end(model):
+    state = numpy.eye(2, 4, dtype=numpy.int8)
+    with InferenceServer(model) as server:
+        http_server = make_http_server(server, port=0)
+        threading.Thread(target=http_server.serve_forever, daemon=True).start()
+        connection = http.client.HTTPConnection(*http_server.server_address)
+        connection.request('POST', '/act', json.dumps({'state': state.tolist()}))
+        assert json.loads(connection.getresponse().read()) == {'action': server.predict(state)}
+        connection.request('POST', '/act', json.dumps({'states': [state.tolist()]*3}))
+        assert json.loads(connection.getresponse().read()) == {'actions': [server.predict(state)]*3}
+        connection.request('POST', '/act', json.dumps({}))
+        assert connection.getresponse().status == 400
+        http_server.shutdown()
+        http_server.server_close()
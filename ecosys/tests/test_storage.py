@@ -0,0 +1,66 @@
+import numpy
+import pytest
+from ecosys.environment import EcosysVectorEnv
+from ecosys.rollout import TrajectoryStore
+
+
+def _transitions(start: int, n: int) -> tuple:
+    steps = numpy.arange(start, start + n)
+    obs = (steps[:, None, None] + numpy.arange(8).reshape(2, 4)) % 256
+    return obs, steps % 4, steps.astype(numpy.float32), -steps.astype(numpy.float32), steps % 10 == 9
+
+
+def test_trajectory_store(tmp_path):
+    with TrajectoryStore(str(tmp_path), chunk_size=16, max_open_chunks=2) as store:
+        store.append(*_transitions(0, 10))
+        store.append(*_transitions(10, 30))
+        assert len(store) == 40
+        assert len(list(tmp_path.glob('obs-*.npy'))) == 3
+    # Reopen and append across a chunk boundary
+    store = TrajectoryStore(str(tmp_path))
+    assert len(store) == 40 and store.chunk_size == 16
+    store.append(*_transitions(40, 20))
+    expected = _transitions(0, 60)
+    # Random access gathers from several chunks
+    idx = numpy.array([59, 0, 17, 33, 16])
+    batch = store[idx]
+    for field, values in zip(batch, expected):
+        numpy.testing.assert_array_equal(field, numpy.asarray(values)[idx].astype(field.dtype))
+    assert store.sample(8, numpy.random.default_rng(0)).obs.shape == (8, 2, 4)
+    # Streaming visits every transition once
+    batches = list(store.iterate(7))
+    assert [len(b.rewards) for b in batches] == [7]*8 + [4]
+    numpy.testing.assert_array_equal(numpy.concatenate([b.rewards for b in batches]), expected[2])
+    shuffled = numpy.concatenate([b.rewards for b in store.iterate(7, shuffle=True, drop_remainder=True)])
+    assert len(shuffled) == 56 and len(numpy.unique(shuffled)) == 56
+    store.close()
+
+
+def test_trajectory_store_dataset(tmp_path):
+    pytest.importorskip('tensorflow')
+    with TrajectoryStore(str(tmp_path), chunk_size=16) as store:
+        store.append(*_transitions(0, 60))
+        dataset = store.as_dataset(25, seed=0)
+        numpy.testing.assert_array_equal(numpy.concatenate([b.values.numpy() for b in dataset]), _transitions(0, 60)[3])
+
+
+@pytest.mark.parametrize('packed_obs', [False, True])
+def test_trainer_stores_episodes(tmp_path, packed_obs):
+    tf = pytest.importorskip('tensorflow')
+    from ecosys.models import ActorCritic
+    from ecosys.training import BatchedActorCriticTrainer
+    env = EcosysVectorEnv(num_envs=3, packed_obs=packed_obs)
+    store = TrajectoryStore(str(tmp_path), chunk_size=64)
+    model = ActorCritic(num_actions=4, num_hidden_units=8)
+    trainer = BatchedActorCriticTrainer(env, model, tf.keras.optimizers.Adam(0.01), store=store)
+    initial_state, _ = env.reset(seed=0)
+    initial_state = tf.constant(initial_state) if packed_obs else tf.cast(initial_state, tf.int8)
+    episode_rewards = trainer.train_step(initial_state, 0.99, 20).numpy()
+    # Every episode is stored whole, ending with a done flag
+    dones = next(store.iterate(len(store))).dones
+    assert dones.sum() == 3 and dones[-1]
+    batch = store[numpy.arange(len(store))]
+    numpy.testing.assert_allclose(batch.rewards.sum(), episode_rewards.sum(), rtol=1e-5)
+    # Packed observations are stored expanded
+    assert batch.obs.max() <= 1 and (batch.obs[:, 0].sum(axis=1) == 1).all() and batch.actions.max() < 4
+    store.close()
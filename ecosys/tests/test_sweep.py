@@ -0,0 +1,66 @@
+import os
+import csv
+import time
+from ecosys.sweep import MedianStopping, SweepRunner, Uniform, grid_search, random_search
+
+# Thread limit seen when a sweep process imported this module, before running its trial
+STARTUP_THREADS = os.environ.get('OPENBLAS_NUM_THREADS')
+
+
+def _fake_trial(config, report):
+    '''Trial whose running reward grows by config['rate'] per episode, without TensorFlow.'''
+    if config['rate'] < 0:
+        raise ValueError('negative rate')
+    episode, running_reward = 0, 0.
+    while episode < 2000:
+        episode += 10
+        time.sleep(config.get('delay', 0.))
+        running_reward = config['rate'] * episode
+        if report(episode, running_reward):
+            break
+    return {'episodes': episode, 'running_reward': running_reward, 'solved': running_reward > 1000}
+
+
+def test_search_spaces():
+    configs = grid_search({'learning_rate': [0.01, 0.001], 'grid_dim': [10, 20, 40]})
+    assert len(configs) == 6 and configs[1] == {'learning_rate': 0.01, 'grid_dim': 20}
+    space = {'learning_rate': Uniform(1e-4, 1e-1, log=True), 'grid_dim': [10, 20], 'gamma': 0.99}
+    configs = random_search(space, 50, seed=0)
+    assert all(1e-4 <= c['learning_rate'] < 1e-1 and c['grid_dim'] in (10, 20) and c['gamma'] == 0.99 for c in configs)
+    assert configs == random_search(space, 50, seed=0)
+
+
+def test_median_stopping():
+    stopper = MedianStopping(grace_episodes=100, min_runs=2, margin=1.)
+    for run_id, reward in [(0, 10.), (1, 12.), (2, 11.)]:
+        assert not stopper.report(run_id, 50, reward)
+        assert not stopper.report(run_id, 100, reward)
+    assert stopper.report(3, 100, 5.)
+    assert not stopper.report(4, 100, 10.5)
+
+
+def test_sweep_runner(tmp_path):
+    # The lagging run is slower, so that the run it is compared with is ahead of it
+    configs = [{'rate': 1.}, {'rate': 0.01, 'delay': 0.05}, {'rate': 2.}, {'rate': -1.}]
+    runner = SweepRunner(
+        configs, max_workers=2, report_every=100, stopper=MedianStopping(grace_episodes=200, min_runs=1),
+        results_path=str(tmp_path / 'results.csv'), trial_fn=_fake_trial)
+    results = runner.run()
+    assert [row['status'] for row in results] == ['solved', 'stopped', 'solved', 'failed']
+    assert results[1]['episode'] < 2000
+    with open(tmp_path / 'results.csv') as f:
+        rows = list(csv.DictReader(f))
+    assert {row['run_id'] for row in rows} == {'0', '1', '2', '3'}
+    assert sum(row['status'] != 'running' for row in rows) == 4
+
+
+def _threads_trial(config, report):
+    return {'episodes': 0, 'running_reward': 0., 'solved': STARTUP_THREADS == str(config['threads'])}
+
+
+def test_sweep_thread_limits():
+    saved = os.environ.get('OPENBLAS_NUM_THREADS')
+    runner = SweepRunner([{'threads': 3}], threads_per_run=3, trial_fn=_threads_trial)
+    # The limit is already set when the numerical libraries are imported
+    assert runner.run()[0]['status'] == 'solved'
+    assert os.environ.get('OPENBLAS_NUM_THREADS') == saved
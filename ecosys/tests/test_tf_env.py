@@ -0,0 +1,41 @@
+import numpy
+import pytest
+tf = pytest.importorskip('tensorflow')
+from ecosys.environment import EcosysEnv  # noqa: E402
+from ecosys.environment.tf_ecosys_env import TFEcosysEnv  # noqa: E402
+
+
+def _layout(env: EcosysEnv) -> numpy.ndarray:
+    '''Return the entity positions of the environment, herbivore first.'''
+    return numpy.stack([env._store.x[:env._store.size], env._store.y[:env._store.size]], axis=1)
+
+
+@pytest.mark.parametrize('options', [{'grid_dim': 10, 'n_resources': 20}, {'grid_dim': 5, 'n_resources': 1}])
+def test_tf_env_matches_env(options):
+    rng = numpy.random.default_rng(0)
+    env = EcosysEnv()
+    tf_env = TFEcosysEnv()
+    step = tf.function(tf_env.step)
+    for _ in range(20):
+        state, _ = env.reset(options=options)
+        tf_env.grid_dim, tf_env.n_resources = env.grid_dim, env.n_resources
+        tf_state, _ = tf_env.set_layout(_layout(env))
+        assert (tf_state.numpy() == state).all()
+        terminated = False
+        while not terminated:
+            action = int(rng.integers(0, 4))
+            state, reward, terminated, _, _ = env.step(action)
+            tf_state, tf_reward, tf_terminated = step(tf.constant(action))
+            assert (tf_state.numpy() == state).all()
+            assert tf_reward.numpy() == numpy.float32(reward)
+            assert tf_terminated.numpy() == terminated
+
+
+def test_tf_env_seeded_reset():
+    env = EcosysEnv()
+    tf_env = TFEcosysEnv()
+    state, _ = env.reset(seed=5)
+    tf_state, _ = tf_env.reset(seed=5)
+    assert (tf_state.numpy() == state).all()
+    assert (tf_env._herb.numpy() == _layout(env)[0]).all()
+    assert (tf_env._res.numpy() == _layout(env)[1:]).all()
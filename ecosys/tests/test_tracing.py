@@ -0,0 +1,75 @@
+import numpy
+import pytest
+from ecosys.environment import EcosysEnv, RecordTrace, TraceReader, TraceReplayer
+from ecosys.environment.tracing import TraceWriter
+
+
+def _record(path, seeds, buffer_steps=4096):
+    '''Play random episodes reset with seeds, returning their observations.'''
+    rng = numpy.random.default_rng(0)
+    env = RecordTrace(EcosysEnv(), str(path), buffer_steps=buffer_steps)
+    episodes = []
+    for seed in seeds:
+        obs, _ = env.reset(seed=seed, options={'grid_dim': 8, 'n_resources': 12})
+        observations, done = [obs], False
+        while not done:
+            obs, _, terminated, truncated, _ = env.step(int(rng.integers(0, 4)))
+            observations.append(obs)
+            done = terminated or truncated
+        episodes.append(numpy.stack(observations))
+    env.close()
+    return episodes
+
+
+def test_trace_replay(tmp_path):
+    path = tmp_path / 'episodes.trace'
+    # Episodes reset with and without a seed, with steps records split across buffers
+    episodes = _record(path, [3, None, None, 7], buffer_steps=5)
+    with TraceReplayer(str(path)) as replayer:
+        assert len(replayer) == 4
+        trace = replayer.reader[0]
+        assert trace.seed == 3 and trace.grid_dim == 8 and len(trace.actions) == len(episodes[0]) - 1
+        assert trace.terminated[-1] and not trace.terminated[:-1].any()
+        assert (trace.env_seconds >= 0).all()
+        # Replays are deterministic and can be repeated in any order
+        for episode in [2, 0, 3, 1, 2]:
+            replayed = numpy.stack([step.obs for step in replayer.replay(episode)])
+            assert (replayed == episodes[episode]).all()
+        replayer.render(1, str(tmp_path / 'episode.gif'))
+    assert (tmp_path / 'episode.gif').stat().st_size > 0
+
+
+def test_trace_divergence(tmp_path):
+    path = tmp_path / 'episodes.trace'
+    with TraceWriter(str(path)) as writer:
+        writer.begin_episode(None, 10, 20, numpy.random.default_rng(0).bit_generator.state)
+        writer.step(0, 1000., False, False, 0, 0)
+    with TraceReplayer(str(path)) as replayer:
+        with pytest.raises(RuntimeError, match='diverged from the trace at step 1'):
+            for _ in replayer.replay(0):
+                pass
+
+
+def test_trace_large_grid(tmp_path):
+    path = tmp_path / 'episodes.trace'
+    with TraceWriter(str(path)) as writer:
+        writer.begin_episode(None, 1000, 100000, numpy.random.default_rng(0).bit_generator.state)
+    with TraceReader(str(path)) as reader:
+        assert reader[0].grid_dim == 1000 and reader[0].n_resources == 100000
+
+
+def test_trace_append_and_truncation(tmp_path):
+    path = tmp_path / 'episodes.trace'
+    _record(path, [1, 2])
+    _record(path, [3])
+    with TraceReader(str(path)) as reader:
+        assert [trace.seed for trace in reader] == [1, 2, 3]
+    # The steps record of the last episode is cut short by a crash, and dropped
+    with open(path, 'r+b') as f:
+        f.truncate(path.stat().st_size - 3)
+    with TraceReader(str(path)) as reader:
+        assert len(reader) == 3 and len(reader[2].actions) == 0
+    # Appending after the last complete record
+    _record(path, [4])
+    with TraceReader(str(path)) as reader:
+        assert [trace.seed for trace in reader] == [1, 2, 3, 4] and len(reader[3].actions) > 0
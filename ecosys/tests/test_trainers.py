@@ -0,0 +1,32 @@
+import pytest
+tf = pytest.importorskip('tensorflow')
+keras = pytest.importorskip('keras')
+from ecosys.environment import EcosysVectorEnv  # noqa: E402
+from ecosys.models import ActorCritic  # noqa: E402
+from ecosys.training import CompiledActorCriticTrainer  # noqa: E402
+
+
+def test_compiled_trainer():
+    env = EcosysVectorEnv(num_envs=4)
+    trainer = CompiledActorCriticTrainer(env, ActorCritic(4, 16), keras.optimizers.Adam(), jit_compile=False, seed=0)
+    initial_state, _ = env.reset(seed=0)
+    trainer.train_step(initial_state, 0.99, 30)
+    weights = trainer.model.get_weights()
+    for _ in range(3):
+        initial_state, _ = env.reset()
+        episode_rewards = trainer.train_step(initial_state, 0.99, 30)
+        assert episode_rewards.shape == (4,)
+    # Padded episodes of equal shapes are traced once
+    assert trainer.tracing_count == 1
+    assert any((w != v).any() for w, v in zip(weights, trainer.model.get_weights()))
+
+
+def test_compiled_trainer_buckets():
+    env = EcosysVectorEnv(num_envs=2)
+    trainer = CompiledActorCriticTrainer(env, ActorCritic(4, 16), keras.optimizers.Adam(), bucket_lengths=True)
+    assert [trainer.padded_length(n, 100) for n in (1, 2, 3, 17, 64, 65)] == [1, 2, 4, 32, 64, 100]
+    initial_state, _ = env.reset(seed=0)
+    obs, actions, rewards, masks = trainer.collect(initial_state, 100)
+    length = int(masks.sum(axis=1).max())
+    assert actions.shape == (2, trainer.padded_length(length, 100)) and obs.shape[:2] == actions.shape
+    assert rewards.sum() == pytest.approx(rewards[:, :length].sum())
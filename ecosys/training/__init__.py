@@ -1 +1,15 @@
-from ecosys.training.trainers import ActorCriticTrainer
+from ecosys._lazy import lazy_attributes
+
+
+# The trainers need TensorFlow, import the modules on first access
+__getattr__, __dir__ = lazy_attributes(__name__, {
+    'CheckpointManager': 'ecosys.training.checkpoints',
+    'Curriculum': 'ecosys.training.curriculum',
+    'Stage': 'ecosys.training.curriculum',
+    'ActorCriticTrainer': 'ecosys.training.trainers',
+    'BatchedActorCriticTrainer': 'ecosys.training.trainers',
+    'TFActorCriticTrainer': 'ecosys.training.trainers',
+    'CompiledActorCriticTrainer': 'ecosys.training.trainers',
+    'configure_performance': 'ecosys.training.performance',
+    'ImpalaTrainer': 'ecosys.training.impala',
+})
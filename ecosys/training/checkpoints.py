@@ -0,0 +1,138 @@
+import os
+import re
+import json
+import queue
+import threading
+import numpy as np
+from typing import Any, Optional
+
+
+class CheckpointManager:
+    '''
+    Periodic checkpoints of a model, its optimizer and the training loop state.
+
+    save takes a copy of the model weights, the optimizer variables and a JSON-serializable
+    state on the calling thread and writes them as one ckpt-<step>.npz file on a background
+    thread, so that the training loop only waits when the previous checkpoint is still being
+    written. Each file is written to a temporary path and renamed, so a checkpoint on disk is
+    always complete, and only the last keep checkpoints are kept.
+    '''
+    def __init__(
+        self,
+        directory: str,
+        keep: int = 5
+    ):
+        assert keep > 0, 'At least one checkpoint must be kept.'
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+        # At most one snapshot waits to be written
+        self._queue: queue.Queue = queue.Queue(maxsize=1)
+        self._thread: Optional[threading.Thread] = None
+        self._error: Optional[BaseException] = None
+
+    def __enter__(self) -> 'CheckpointManager':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def checkpoints(self) -> list[tuple[int, str]]:
+        '''Return the (step, path) of the checkpoints on disk, oldest first.'''
+        steps = []
+        for name in os.listdir(self.directory):
+            match = re.fullmatch(r'ckpt-(\d+)\.npz', name)
+            if match is not None:
+                steps.append((int(match.group(1)), os.path.join(self.directory, name)))
+        return sorted(steps)
+
+    def latest(self) -> Optional[str]:
+        '''Return the path of the latest checkpoint, None if there is none.'''
+        checkpoints = self.checkpoints()
+        return checkpoints[-1][1] if checkpoints else None
+
+    def save(
+        self,
+        step: int,
+        model,
+        optimizer,
+        state: Optional[dict[str, Any]] = None
+    ) -> None:
+        '''Snapshot the model, optimizer and state, and queue the checkpoint of this step for writing.'''
+        self._check_error()
+        arrays = {f'model/{i}': w for i, w in enumerate(model.get_weights())}
+        arrays.update({f'optimizer/{i}': v.numpy() for i, v in enumerate(optimizer.variables)})
+        arrays['state'] = np.frombuffer(json.dumps(state or {}).encode(), np.uint8)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._write_loop, name='checkpoint-writer', daemon=True)
+            self._thread.start()
+        self._queue.put((step, arrays))
+
+    def restore(
+        self,
+        model,
+        optimizer,
+        path: Optional[str] = None
+    ) -> Optional[tuple[int, dict[str, Any]]]:
+        '''
+        Load a checkpoint, the latest by default, into the built model and the optimizer.
+
+        Returns the step and state of the checkpoint, or None if there is no checkpoint.
+        '''
+        path = path if path is not None else self.latest()
+        if path is None:
+            return None
+        with np.load(path) as data:
+            n_weights = sum(key.startswith('model/') for key in data.files)
+            model.set_weights([data[f'model/{i}'] for i in range(n_weights)])
+            # Create the optimizer slots before assigning them
+            optimizer.build(model.trainable_variables)
+            for i, variable in enumerate(optimizer.variables):
+                variable.assign(data[f'optimizer/{i}'])
+            state = json.loads(data['state'].tobytes().decode())
+        step = int(re.fullmatch(r'ckpt-(\d+)\.npz', os.path.basename(path)).group(1))
+        return step, state
+
+    def wait(self) -> None:
+        '''Block until the queued checkpoints are written.'''
+        self._queue.join()
+        self._check_error()
+
+    def close(self) -> None:
+        '''Write the queued checkpoints and stop the writer thread.'''
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self._check_error()
+
+    def _write_loop(self) -> None:
+        while True:
+            item = self._queue.get()
+            try:
+                if item is None:
+                    return
+                if self._error is None:
+                    self._write(*item)
+            except BaseException as error:
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+    def _write(self, step: int, arrays: dict[str, np.ndarray]) -> None:
+        path = os.path.join(self.directory, f'ckpt-{step:08d}.npz')
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, **arrays)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        # Remove the oldest checkpoints
+        for _, old_path in self.checkpoints()[:-self.keep]:
+            os.remove(old_path)
+
+    def _check_error(self) -> None:
+        '''Raise the error of the last failed write, if any.'''
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise RuntimeError('Writing a checkpoint failed.') from error
@@ -0,0 +1,137 @@
+import collections
+import numpy as np
+from typing import Any, NamedTuple, Optional, Union
+
+
+class Stage(NamedTuple):
+    '''Environment parameters of a curriculum stage, and the running reward that completes it.'''
+    grid_dim: int
+    n_resources: int
+    reward_threshold: float
+
+
+def max_return(n_resources: int) -> float:
+    '''Return of an episode eating all n_resources resources: +10 for each but the last, +100 for the last.'''
+    return 10. * (n_resources - 1) + 100.
+
+
+class Curriculum:
+    '''
+    Environment parameters passed to reset(options=...), growing with the running reward.
+
+    Training starts on the first stage, and moves on to the next one once the mean reward of
+    the last window episodes played on the current stage exceeds its reward_threshold (and at
+    least min_episodes were played on it). With a vector environment every sub-environment
+    gets its own parameters: a fraction replay of them replays earlier stages, so that the
+    policy does not forget the smaller grids, and only the episodes of the current stage count
+    towards its running reward.
+    '''
+    def __init__(
+        self,
+        stages: list[Stage],
+        window: int = 100,
+        min_episodes: int = 100,
+        replay: float = 0.,
+        seed: Optional[int] = None
+    ):
+        assert len(stages) > 0, 'A curriculum needs at least one stage.'
+        self.stages = [Stage(*stage) for stage in stages]
+        self.window = window
+        self.min_episodes = min_episodes
+        self.replay = replay
+        self.rng = np.random.default_rng(seed)
+        # Current stage, and rewards and number of the episodes played on it
+        self.stage = 0
+        self._rewards: collections.deque = collections.deque(maxlen=window)
+        self._episodes = 0
+        # Stage of each sub-environment since the last call to options
+        self._env_stages: Optional[np.ndarray] = None
+
+    @classmethod
+    def linear(
+        cls,
+        start: tuple[int, int],
+        end: tuple[int, int],
+        num_stages: int,
+        solved_fraction: float = 0.9,
+        **kwargs
+    ) -> 'Curriculum':
+        '''
+        Curriculum interpolating (grid_dim, n_resources) linearly from start to end in num_stages stages.
+
+        Each stage is completed at solved_fraction of the return of eating all its resources.
+        '''
+        fractions = np.linspace(0., 1., num_stages) if num_stages > 1 else np.ones(1)
+        stages = []
+        for fraction in fractions:
+            grid_dim = int(round(start[0] + fraction * (end[0] - start[0])))
+            n_resources = int(round(start[1] + fraction * (end[1] - start[1])))
+            stages.append(Stage(grid_dim, n_resources, solved_fraction * max_return(n_resources)))
+        return cls(stages, **kwargs)
+
+    @property
+    def current(self) -> Stage:
+        return self.stages[self.stage]
+
+    @property
+    def finished(self) -> bool:
+        '''Whether the last stage was completed.'''
+        return self.stage == len(self.stages) - 1 and self._completed()
+
+    @property
+    def running_reward(self) -> float:
+        '''Mean reward of the last window episodes played on the current stage.'''
+        return float(np.mean(self._rewards)) if self._rewards else float('nan')
+
+    def options(self, num_envs: Optional[int] = None) -> dict[str, Union[int, np.ndarray]]:
+        '''Return the reset options of a single environment, or of the num_envs sub-environments of a vector one.'''
+        if num_envs is None:
+            self._env_stages = None
+            stage = self.current
+            return {'grid_dim': stage.grid_dim, 'n_resources': stage.n_resources}
+        stages = np.full(num_envs, self.stage)
+        if self.stage > 0 and self.replay > 0:
+            replayed = self.rng.random(num_envs) < self.replay
+            stages[replayed] = self.rng.integers(0, self.stage, size=replayed.sum())
+        self._env_stages = stages
+        return {
+            'grid_dim': np.array([self.stages[s].grid_dim for s in stages]),
+            'n_resources': np.array([self.stages[s].n_resources for s in stages]),
+        }
+
+    def update(self, episode_rewards: Any) -> bool:
+        '''
+        Record the rewards of the episodes started with the last options, returning whether the stage advanced.
+
+        With a vector environment episode_rewards holds one reward per sub-environment.
+        '''
+        rewards = np.asarray(episode_rewards, dtype=np.float64).reshape(-1)
+        if self._env_stages is not None:
+            rewards = rewards[self._env_stages == self.stage]
+        self._rewards.extend(rewards.tolist())
+        self._episodes += len(rewards)
+        if self.stage < len(self.stages) - 1 and self._completed():
+            self.stage += 1
+            self._rewards.clear()
+            self._episodes = 0
+            return True
+        return False
+
+    def _completed(self) -> bool:
+        return self._episodes >= self.min_episodes and self.running_reward > self.current.reward_threshold
+
+    def state_dict(self) -> dict[str, Any]:
+        '''Return the JSON-serializable progress of the curriculum, e.g. for CheckpointManager.'''
+        return {
+            'stage': self.stage,
+            'rewards': list(self._rewards),
+            'episodes': self._episodes,
+            'rng': self.rng.bit_generator.state,
+        }
+
+    def load_state_dict(self, state: dict[str, Any]) -> None:
+        '''Restore the progress saved by state_dict.'''
+        self.stage = state['stage']
+        self._rewards = collections.deque(state['rewards'], maxlen=self.window)
+        self._episodes = state['episodes']
+        self.rng.bit_generator.state = state['rng']
@@ -0,0 +1,266 @@
+import queue
+import threading
+import numpy as np
+import tensorflow as tf
+from typing import Callable, NamedTuple, Optional
+from ecosys.environment import EcosysVectorEnv
+from ecosys.models import ActorCriticPolicy
+from ecosys.training.returns import vtrace
+
+
+class Unroll(NamedTuple):
+    '''unroll_length consecutive steps of the num_envs sub-environments of an actor.'''
+    obs: np.ndarray               # [num_envs, T, obs_size] int8
+    actions: np.ndarray           # [num_envs, T] int32
+    behaviour_logits: np.ndarray  # [num_envs, T, num_actions] float32
+    rewards: np.ndarray           # [num_envs, T] float32
+    dones: np.ndarray             # [num_envs, T] bool
+    bootstrap_obs: np.ndarray     # [num_envs, obs_size] int8, observation after the last step
+    policy_version: int
+    episode_rewards: list[float]  # Rewards of the episodes finished during the unroll
+
+
+class PolicyPublisher:
+    '''Latest ActorCriticPolicy published by the learner, read by the actors.'''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = -1
+        self._policy = None
+
+    def publish(self, policy: ActorCriticPolicy) -> int:
+        '''Make policy the latest one, returning its version.'''
+        with self._lock:
+            self._version += 1
+            self._policy = policy
+            return self._version
+
+    def latest(self) -> tuple[int, ActorCriticPolicy]:
+        '''Return the version and the latest policy.'''
+        with self._lock:
+            return self._version, self._policy
+
+
+class Actor(threading.Thread):
+    '''
+    Thread stepping an EcosysVectorEnv with the latest published policy, putting unrolls in a queue.
+
+    The policy is refreshed at the start of every unroll, so that the steps of an unroll all
+    come from the same (possibly stale) policy version. Putting into the full queue blocks,
+    which keeps actors from running ahead of the learner.
+    '''
+    def __init__(
+        self,
+        env: EcosysVectorEnv,
+        publisher: PolicyPublisher,
+        unrolls: queue.Queue,
+        unroll_length: int,
+        stop_event: threading.Event,
+        seed: Optional[int] = None
+    ):
+        super().__init__(daemon=True)
+        self.env = env
+        self.publisher = publisher
+        self.unrolls = unrolls
+        self.unroll_length = unroll_length
+        self.stop_event = stop_event
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+        # Exception that stopped the actor, re-raised by the learner
+        self.error: Optional[BaseException] = None
+
+    def run(self) -> None:
+        try:
+            self._run()
+        except BaseException as e:
+            self.error = e
+
+    def _run(self) -> None:
+        num_envs, length = self.env.num_envs, self.unroll_length
+        obs, _ = self.env.reset(seed=self.seed)
+        obs = obs.reshape(num_envs, -1).astype(np.int8)
+        episode_rewards = np.zeros(num_envs, dtype=np.float32)
+        while not self.stop_event.is_set():
+            version, policy = self.publisher.latest()
+            unroll_obs = np.empty((num_envs, length, obs.shape[1]), dtype=np.int8)
+            actions = np.empty((num_envs, length), dtype=np.int32)
+            logits = np.empty((num_envs, length, policy.num_actions), dtype=np.float32)
+            rewards = np.empty((num_envs, length), dtype=np.float32)
+            dones = np.empty((num_envs, length), dtype=bool)
+            finished = []
+            for t in range(length):
+                unroll_obs[:, t] = obs
+                logits[:, t], _ = policy.forward(obs)
+                # Gumbel-max sampling from the policy
+                actions[:, t] = np.argmax(logits[:, t] + self.rng.gumbel(size=logits[:, t].shape), axis=1)
+                obs, rewards[:, t], terminated, truncated, _ = self.env.step(actions[:, t])
+                obs = obs.reshape(num_envs, -1).astype(np.int8)
+                dones[:, t] = terminated | truncated
+                # Finished sub-environments were reset by the environment
+                episode_rewards += rewards[:, t]
+                finished.extend(episode_rewards[dones[:, t]].tolist())
+                episode_rewards[dones[:, t]] = 0.
+            unroll = Unroll(unroll_obs, actions, logits, rewards, dones, obs.copy(), version, finished)
+            while not self.stop_event.is_set():
+                try:
+                    self.unrolls.put(unroll, timeout=0.1)
+                    break
+                except queue.Full:
+                    pass
+
+
+class ImpalaTrainer:
+    '''
+    Asynchronous actor-learner trainer of an ActorCritic model (IMPALA, Espeholt et al., 2018).
+
+    num_actors Actor threads each step the EcosysVectorEnv returned by env_fn with a NumPy copy
+    of the model (ActorCriticPolicy) and push unrolls of unroll_length steps into a queue of at
+    most queue_size unrolls. Each train_step takes batch_size unrolls from the queue, corrects
+    for the policy lag with V-trace and applies one gradient step, and every publish_every
+    steps the new weights are published to the actors. NumPy releases the GIL in the policy
+    matrix products and TensorFlow during the gradient step, so stepping and learning overlap.
+    '''
+    def __init__(
+        self,
+        env_fn: Callable[[], EcosysVectorEnv],
+        model: tf.keras.Model,
+        optimizer: tf.keras.optimizers.Optimizer,
+        num_actors: int = 2,
+        unroll_length: int = 20,
+        batch_size: int = 2,
+        queue_size: int = 8,
+        publish_every: int = 1,
+        gamma: float = 0.99,
+        baseline_cost: float = 0.5,
+        entropy_cost: float = 0.01,
+        clip_rho: float = 1.,
+        clip_c: float = 1.,
+        seed: Optional[int] = None
+    ):
+        '''Initialize Trainer.'''
+        self.env_fn = env_fn
+        self.model = model
+        self.optimizer = optimizer
+        self.num_actors = num_actors
+        self.unroll_length = unroll_length
+        self.batch_size = batch_size
+        self.queue_size = queue_size
+        self.publish_every = publish_every
+        self.gamma = gamma
+        self.baseline_cost = baseline_cost
+        self.entropy_cost = entropy_cost
+        self.clip_rho = clip_rho
+        self.clip_c = clip_c
+        self.seed = seed
+        self.publisher = PolicyPublisher()
+        self._unrolls: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._stop_event = None
+        self._actors = []
+        # Number of gradient steps and of environment steps learned from
+        self.updates = 0
+        self.steps = 0
+        # Mean number of policy versions the last batch lagged behind the learner
+        self.policy_lag = 0.
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.stop()
+
+    @property
+    def running(self) -> bool:
+        return self._stop_event is not None
+
+    def start(self) -> None:
+        '''Publish the current weights and start the actor threads.'''
+        assert not self.running, 'ImpalaTrainer already started.'
+        envs = [self.env_fn() for _ in range(self.num_actors)]
+        obs_size = int(np.prod(envs[0].single_observation_space.shape))
+        # Build the model so that its weights can be published
+        self.model(tf.zeros([1, obs_size]))
+        self.publisher.publish(ActorCriticPolicy.from_model(self.model))
+        self._stop_event = threading.Event()
+        self._actors = [
+            Actor(
+                env, self.publisher, self._unrolls, self.unroll_length, self._stop_event,
+                None if self.seed is None else self.seed + i*env.num_envs
+            )
+            for i, env in enumerate(envs)
+        ]
+        for actor in self._actors:
+            actor.start()
+
+    def stop(self, timeout: float = 5.) -> None:
+        '''Stop the actor threads, discarding the queued unrolls.'''
+        if not self.running:
+            return
+        self._stop_event.set()
+        for actor in self._actors:
+            actor.join(timeout)
+            actor.env.close()
+        while not self._unrolls.empty():
+            self._unrolls.get_nowait()
+        self._actors = []
+        self._stop_event = None
+
+    def train_step(self) -> list[float]:
+        '''Apply one gradient step on batch_size queued unrolls, returning the rewards of the episodes they finished.'''
+        assert self.running, 'Call start before using train_step method.'
+        unrolls = [self._get_unroll() for _ in range(self.batch_size)]
+        batch = [np.concatenate(x) for x in zip(*(u[:6] for u in unrolls))]
+        self._learn(*batch)
+        self.updates += 1
+        self.steps += batch[3].size
+        version = self.publisher.latest()[0]
+        self.policy_lag = float(np.mean([version - u.policy_version for u in unrolls]))
+        if self.updates % self.publish_every == 0:
+            self.publisher.publish(ActorCriticPolicy.from_model(self.model))
+        return [reward for u in unrolls for reward in u.episode_rewards]
+
+    def _get_unroll(self) -> Unroll:
+        '''Wait for the next unroll, raising the error of any actor that stopped.'''
+        while True:
+            try:
+                return self._unrolls.get(timeout=0.1)
+            except queue.Empty:
+                for i, actor in enumerate(self._actors):
+                    if actor.error is not None:
+                        raise RuntimeError(f'Actor {i} failed.') from actor.error
+
+    @tf.function
+    def _learn(
+        self,
+        obs: tf.Tensor,
+        actions: tf.Tensor,
+        behaviour_logits: tf.Tensor,
+        rewards: tf.Tensor,
+        dones: tf.Tensor,
+        bootstrap_obs: tf.Tensor
+    ) -> tf.Tensor:
+        '''Apply one V-trace actor-critic gradient step on [B, T] steps, returning the loss.'''
+        batch, length = tf.shape(actions)[0], tf.shape(actions)[1]
+        with tf.GradientTape() as tape:
+            # Computed in float32 whatever the mixed precision policy
+            logits, values = self.model(tf.reshape(obs, [batch * length, -1]))
+            logits = tf.reshape(tf.cast(logits, tf.float32), [batch, length, -1])
+            values = tf.reshape(tf.cast(values, tf.float32), [batch, length])
+            _, bootstrap_values = self.model(bootstrap_obs)
+            bootstrap_values = tf.stop_gradient(tf.cast(bootstrap_values[:, 0], tf.float32))
+            # Log-probabilities of the actions under the learner and the actor policies
+            log_probs = tf.nn.log_softmax(logits)
+            target_log_probs = tf.gather(log_probs, actions, batch_dims=2)
+            behaviour_log_probs = tf.gather(tf.nn.log_softmax(behaviour_logits), actions, batch_dims=2)
+            discounts = self.gamma * (1. - tf.cast(dones, tf.float32))
+            vs, advantages = vtrace(
+                behaviour_log_probs, tf.stop_gradient(target_log_probs), rewards, tf.stop_gradient(values),
+                bootstrap_values, discounts, self.clip_rho, self.clip_c)
+            # Combined actor, critic and entropy loss, averaged over unrolls
+            huber_loss = tf.keras.losses.Huber(reduction=tf.keras.losses.Reduction.SUM)
+            actor_loss = -tf.math.reduce_sum(target_log_probs * advantages)
+            critic_loss = huber_loss(values[..., None], vs[..., None])
+            entropy = -tf.math.reduce_sum(tf.nn.softmax(logits) * log_probs)
+            loss = (actor_loss + self.baseline_cost * critic_loss - self.entropy_cost * entropy) / tf.cast(batch, tf.float32)
+        grads = tape.gradient(loss, self.model.trainable_variables)
+        self.optimizer.apply_gradients(zip(grads, self.model.trainable_variables))
+        return loss
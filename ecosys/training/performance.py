@@ -0,0 +1,25 @@
+from typing import Optional
+import tensorflow as tf
+import keras
+
+
+def configure_performance(
+    intra_op_threads: Optional[int] = None,
+    inter_op_threads: Optional[int] = None,
+    mixed_precision: Optional[str] = None
+) -> None:
+    '''
+    Set the TensorFlow CPU thread pools and the Keras mixed precision policy.
+
+    intra_op_threads bounds the threads a single op (e.g. a matrix product) is split across,
+    and inter_op_threads the ops run concurrently; None keeps TensorFlow's choice of one per
+    core. The thread pools can only be set before TensorFlow runs its first op. mixed_precision
+    (e.g. 'mixed_bfloat16') is applied to the models created afterwards: they compute in
+    bfloat16 and keep float32 weights.
+    '''
+    if intra_op_threads is not None:
+        tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads)
+    if inter_op_threads is not None:
+        tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+    if mixed_precision is not None:
+        keras.mixed_precision.set_global_policy(mixed_precision)
@@ -0,0 +1,136 @@
+import numpy as np
+from typing import Optional
+import tensorflow as tf
+
+
+def discount_matrix(
+    discount: float,
+    length: tf.Tensor
+) -> tf.Tensor:
+    '''
+    Returns the [1, T, T] discount matrix W.
+
+    W[0, t, k] = discount^(k - t) if k >= t, else 0, so that sum_k W[0, t, k] * x[b, k] is the
+    discounted sum of x from step t to the end.
+    '''
+    steps = tf.range(length)
+    exponents = tf.cast(steps[None, :] - steps[:, None], tf.float32)
+    log_discount = tf.math.log(tf.cast(discount, tf.float32))
+    weights = tf.where(exponents > 0., tf.math.exp(tf.math.maximum(exponents, 1.) * log_discount), 0.)
+    return tf.linalg.set_diag(weights, tf.ones([length]))[None]
+
+
+def discounted_sums(
+    x: tf.Tensor,
+    discount: float,
+    dones: Optional[tf.Tensor] = None
+) -> tf.Tensor:
+    '''
+    Compute the discounted sums of [B, T] x from every step to the end of its episode.
+
+    Without dones this is a single product with the shared discount matrix. dones[b, t] = 1
+    marks the last step of an episode, nothing is carried across it; the sums are then
+    accumulated backwards in time, so that memory stays O(B*T) instead of O(B*T^2).
+    '''
+    if dones is None:
+        return tf.linalg.matvec(discount_matrix(discount, tf.shape(x)[1]), x)
+    # s_t = x_t + discount * (1 - done_t) * s_t+1
+    carries = tf.cast(discount, tf.float32) * (1. - tf.cast(dones, tf.float32))
+    sums = tf.scan(
+        lambda acc, step: step[0] + step[1] * acc,
+        (tf.transpose(x), tf.transpose(carries)),
+        initializer=tf.zeros_like(x[:, 0]),
+        reverse=True
+    )
+    return tf.transpose(sums)
+
+
+def discounted_returns(
+    rewards: tf.Tensor,
+    gamma: float,
+    dones: Optional[tf.Tensor] = None
+) -> tf.Tensor:
+    '''
+    Compute the discounted returns of [B, T] rewards.
+
+    dones[b, t] = 1 marks the last step of an episode, no reward is carried across it.
+    '''
+    return discounted_sums(tf.cast(rewards, tf.float32), gamma, dones)
+
+
+def generalized_advantage_estimates(
+    rewards: tf.Tensor,
+    values: tf.Tensor,
+    gamma: float,
+    lam: float,
+    dones: Optional[tf.Tensor] = None
+) -> tuple[tf.Tensor, tf.Tensor]:
+    '''
+    Compute Generalized Advantage Estimates of [B, T] rewards and critic values.
+
+    Steps flagged in dones, and the last step, are treated as terminal (the value after them
+    is zero). Returns the advantages and the critic targets (advantages + values).
+    '''
+    rewards = tf.cast(rewards, tf.float32)
+    values = tf.cast(values, tf.float32)
+    # Value of the next state, zero after terminal steps
+    next_values = tf.concat([values[:, 1:], tf.zeros_like(values[:, :1])], axis=1)
+    if dones is not None:
+        next_values = next_values * (1. - tf.cast(dones, tf.float32))
+    deltas = rewards + gamma * next_values - values
+    advantages = discounted_sums(deltas, gamma * lam, dones)
+    return advantages, advantages + values
+
+
+def masked_standardize(
+    x: tf.Tensor,
+    masks: Optional[tf.Tensor] = None
+) -> tf.Tensor:
+    '''Standardize x along its last axis, over the entries where masks is 1.'''
+    # Small epsilon value for stabilizing division operations
+    eps = np.finfo(np.float32).eps.item()
+    if masks is None:
+        return (x - tf.math.reduce_mean(x, axis=-1, keepdims=True)) / (tf.math.reduce_std(x, axis=-1, keepdims=True) + eps)
+    n_valid = tf.math.reduce_sum(masks, axis=-1, keepdims=True)
+    mean = tf.math.reduce_sum(x * masks, axis=-1, keepdims=True) / n_valid
+    std = tf.math.sqrt(tf.math.reduce_sum(((x - mean) * masks)**2, axis=-1, keepdims=True) / n_valid)
+    return (x - mean) / (std + eps) * masks
+
+
+def vtrace(
+    behaviour_log_probs: tf.Tensor,
+    target_log_probs: tf.Tensor,
+    rewards: tf.Tensor,
+    values: tf.Tensor,
+    bootstrap_values: tf.Tensor,
+    discounts: tf.Tensor,
+    clip_rho: float = 1.,
+    clip_c: float = 1.
+) -> tuple[tf.Tensor, tf.Tensor]:
+    '''
+    Compute the V-trace critic targets and policy gradient advantages of [B, T] off-policy steps.
+
+    The actions were sampled with behaviour_log_probs and are evaluated under target_log_probs.
+    discounts[b, t] is gamma, or 0 if step t ends an episode, and bootstrap_values[b] is the value
+    of the state after the last step. Importance weights are truncated at clip_rho and clip_c
+    (Espeholt et al., 2018). Returns the targets vs and the advantages rho * (r + discount * vs' - v).
+    '''
+    rewards = tf.cast(rewards, tf.float32)
+    values = tf.cast(values, tf.float32)
+    discounts = tf.cast(discounts, tf.float32)
+    rhos = tf.math.exp(target_log_probs - behaviour_log_probs)
+    clipped_rhos = tf.math.minimum(clip_rho, rhos)
+    cs = tf.math.minimum(clip_c, rhos)
+    next_values = tf.concat([values[:, 1:], bootstrap_values[:, None]], axis=1)
+    deltas = clipped_rhos * (rewards + discounts * next_values - values)
+    # vs_t - v_t = delta_t + discount_t * c_t * (vs_t+1 - v_t+1), accumulated backwards in time
+    vs_minus_values = tf.scan(
+        lambda acc, x: x[0] + x[1] * acc,
+        (tf.transpose(deltas), tf.transpose(discounts * cs)),
+        initializer=tf.zeros_like(bootstrap_values),
+        reverse=True
+    )
+    vs = tf.transpose(vs_minus_values) + values
+    next_vs = tf.concat([vs[:, 1:], bootstrap_values[:, None]], axis=1)
+    advantages = clipped_rhos * (rewards + discounts * next_vs - values)
+    return tf.stop_gradient(vs), tf.stop_gradient(advantages)
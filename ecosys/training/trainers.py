@@ -1,6 +1,14 @@
+import collections
+import functools
 import numpy as np
 import tensorflow as tf
-from ecosys.environment import EcosysEnv
+from typing import Optional
+from ecosys.environment import EcosysEnv, EcosysVectorEnv
+from ecosys.environment.tf_ecosys_env import TFEcosysEnv
+from ecosys.models import ActorCriticPolicy
+from ecosys.profiling import Profiler
+from ecosys.rollout import TrajectoryStore
+from ecosys.training.returns import discounted_returns, generalized_advantage_estimates, masked_standardize
 
 
 class ActorCriticTrainer:
@@ -8,7 +16,10 @@ class ActorCriticTrainer:
         self,
         env: EcosysEnv,
         model: tf.keras.Model,
-        optimizer: tf.keras.optimizers.Optimizer
+        optimizer: tf.keras.optimizers.Optimizer,
+        gae_lambda: Optional[float] = None,
+        profiler: Optional[Profiler] = None,
+        store: Optional[TrajectoryStore] = None
     ):
         '''Initialize Trainer.'''
         # Environment
@@ -17,6 +28,16 @@ class ActorCriticTrainer:
         self.model = model
         # Optimizer
         self.optimizer = optimizer
+        # Generalized Advantage Estimation lambda, None to use Monte Carlo returns
+        self.gae_lambda = gae_lambda
+        # Profiler recording the phases of the training step, which must be set before its first call
+        self.profiler = profiler
+        # Trajectory store the collected episodes are appended to, which must be set before the first training step
+        self.store = store
+        # Steps of the unfinished episode of each sub-environment, kept until the episode is stored
+        self._pending_episodes: collections.defaultdict = collections.defaultdict(list)
+        # Whether the environment returns packed uint8 observations, expanded in the graph
+        self.packed_obs = getattr(env.unwrapped, 'packed_obs', False)
 
     def run_episode(
         self,
@@ -29,8 +50,8 @@ class ActorCriticTrainer:
         values = tf.TensorArray(dtype=tf.float32, size=0, dynamic_size=True)
         rewards = tf.TensorArray(dtype=tf.float32, size=0, dynamic_size=True)
         # Start the episode loop
-        initial_state_shape = initial_state.shape
-        state = initial_state
+        state = self.expand_obs(initial_state)
+        initial_state_shape = state.shape
         for t in tf.range(max_steps):
             # Flatten environment state
             state = tf.reshape(state, [tf.size(state)])
@@ -47,13 +68,16 @@ class ActorCriticTrainer:
             # Store log probability of the action chosen
             action_probs = action_probs.write(t, action_probs_t[0, action])
             # Apply action to the environment to get next state and reward
+            obs = state
             state, reward, done = self.tf_env_step(action)
             state.set_shape(initial_state_shape)
             # Store reward
             rewards = rewards.write(t, reward)
+            self._store_steps(obs, action[None], value[:, 0], reward[None], done[None], tf.ones([1], tf.bool))
             # Break loop if done is true
             if tf.cast(done, tf.bool):
                 break
+        self._store_end_episodes()
         action_probs = action_probs.stack()
         values = values.stack()
         rewards = rewards.stack()
@@ -66,33 +90,37 @@ class ActorCriticTrainer:
         standardize: bool = True
     ) -> tf.Tensor:
         '''Compute expected returns per timestep.'''
-        n = tf.shape(rewards)[0]
-        returns = tf.TensorArray(dtype=tf.float32, size=n)
-        # Start from the end of `rewards` and accumulate reward sums into the `returns` array
-        rewards = tf.cast(rewards[::-1], dtype=tf.float32)
-        discounted_sum = tf.constant(0.0)
-        discounted_sum_shape = discounted_sum.shape
-        for i in tf.range(n):
-            reward = rewards[i]
-            discounted_sum = reward + gamma * discounted_sum
-            discounted_sum.set_shape(discounted_sum_shape)
-            returns = returns.write(i, discounted_sum)
-        returns = returns.stack()[::-1]
+        returns = discounted_returns(rewards[None], gamma)[0]
         if standardize:
-            # Small epsilon value for stabilizing division operations
-            eps = np.finfo(np.float32).eps.item()
-            returns = ((returns - tf.math.reduce_mean(returns)) / (tf.math.reduce_std(returns) + eps))
+            returns = masked_standardize(returns)
         return returns
 
+    def get_advantage(
+        self,
+        rewards: tf.Tensor,
+        values: tf.Tensor,
+        gamma: float,
+        standardize: bool = True
+    ) -> tuple[tf.Tensor, tf.Tensor]:
+        '''Compute Generalized Advantage Estimates and critic targets per timestep.'''
+        advantage, returns = generalized_advantage_estimates(
+            rewards[None], tf.stop_gradient(values)[None], gamma, self.gae_lambda)
+        advantage, returns = advantage[0], returns[0]
+        if standardize:
+            advantage = masked_standardize(advantage)
+        return advantage, returns
+
     def compute_loss(
         self,
         action_probs: tf.Tensor,
         values: tf.Tensor,
-        returns: tf.Tensor
+        returns: tf.Tensor,
+        advantage: Optional[tf.Tensor] = None
     ) -> tf.Tensor:
         '''Computes the combined Actor-Critic loss.'''
         huber_loss = tf.keras.losses.Huber(reduction=tf.keras.losses.Reduction.SUM)
-        advantage = returns - values
+        if advantage is None:
+            advantage = returns - tf.stop_gradient(values)
         action_log_probs = tf.math.log(action_probs)
         actor_loss = -tf.math.reduce_sum(action_log_probs * advantage)
         critic_loss = huber_loss(values, returns)
@@ -106,22 +134,106 @@ class ActorCriticTrainer:
         max_steps_per_episode: int
     ) -> tf.Tensor:
         '''Runs a model training step.'''
+        phases = self._start_phases()
         with tf.GradientTape() as tape:
             # Run the model for one episode to collect training data
-            action_probs, values, rewards = self.run_episode(initial_state, max_steps_per_episode)
+            action_probs, values, rewards = self._phase(
+                phases, 'run_episode', self.run_episode, initial_state, max_steps_per_episode)
             # Calculate the expected returns
-            returns = self.get_expected_return(rewards, gamma)
+            if self.gae_lambda is None:
+                returns = self._phase(phases, 'get_expected_return', self.get_expected_return, rewards, gamma)
+                # The values are only a baseline of the actor loss, the critic loss alone trains them
+                advantage = returns - tf.stop_gradient(values)
+            else:
+                advantage, returns = self._phase(phases, 'get_advantage', self.get_advantage, rewards, values, gamma)
             # Convert training data to appropriate TF tensor shapes
-            action_probs, values, returns = [tf.expand_dims(x, 1) for x in [action_probs, values, returns]]
+            action_probs, values, returns, advantage = [
+                tf.expand_dims(x, 1) for x in [action_probs, values, returns, advantage]]
             # Calculate the loss values to update our network
-            loss = self.compute_loss(action_probs, values, returns)
+            loss = self._phase(phases, 'compute_loss', self.compute_loss, action_probs, values, returns, advantage)
             # Compute the gradients from the loss
-            grads = tape.gradient(loss, self.model.trainable_variables)
+            grads = self._phase(phases, 'gradient', tape.gradient, loss, self.model.trainable_variables)
         # Apply the gradients to the model's parameters
-        self.optimizer.apply_gradients(zip(grads, self.model.trainable_variables))
+        self._phase(phases, 'apply_gradients', self.optimizer.apply_gradients, zip(grads, self.model.trainable_variables))
+        self._record_phases(phases)
         episode_reward = tf.math.reduce_sum(rewards)
         return episode_reward
 
+    def _start_phases(self) -> list[tuple[str, tf.Tensor]]:
+        '''Return the list of (phase, end time) of the training step, starting now if profiling.'''
+        return [] if self.profiler is None else [('start', tf.timestamp())]
+
+    def _phase(self, phases: list[tuple[str, tf.Tensor]], name: str, fn, *args):
+        '''Call fn(*args), appending its end time to phases as the phase name if profiling.'''
+        if self.profiler is None:
+            return fn(*args)
+        # The graph runs independent operations in any order: start once the previous phase is over,
+        # and read the time once the outputs are computed
+        with tf.control_dependencies([phases[-1][1]]):
+            outputs = fn(*args)
+        with tf.control_dependencies([x for x in tf.nest.flatten(outputs) if isinstance(x, tf.Tensor)]):
+            phases.append((name, tf.timestamp()))
+        return outputs
+
+    def _record_phases(self, phases: list[tuple[str, tf.Tensor]]) -> None:
+        '''Add the duration of each phase to the profiler when the training step runs.'''
+        if self.profiler is None:
+            return
+        names = [name for name, _ in phases[1:]]
+
+        def record(*timestamps: np.ndarray) -> np.ndarray:
+            for name, seconds in zip(names, np.diff(timestamps)):
+                self.profiler.add(name, float(seconds))
+            return np.array(0, np.int8)
+        tf.numpy_function(record, [timestamp for _, timestamp in phases], tf.int8)
+
+    def _store_steps(
+        self,
+        obs: tf.Tensor,
+        action: tf.Tensor,
+        value: tf.Tensor,
+        reward: tf.Tensor,
+        done: tf.Tensor,
+        active: tf.Tensor
+    ) -> None:
+        '''Add one step of the [num_envs] active episodes to their pending steps if storing episodes.'''
+        if self.store is None:
+            return
+        tf.numpy_function(self._add_steps, [obs, action, value, reward, done, active], tf.int8)
+
+    def _store_end_episodes(self) -> None:
+        '''Append the episodes cut at the maximum number of steps to the store if storing episodes.'''
+        if self.store is None:
+            return
+        tf.numpy_function(self._end_episodes, [], tf.int8)
+
+    def _add_steps(self, obs, action, value, reward, done, active) -> np.ndarray:
+        # Episodes are stored whole once done, so that the steps of different sub-environments do not interleave
+        for i in np.flatnonzero(active):
+            self._pending_episodes[i].append((obs[i], action[i], value[i], reward[i]))
+            if done[i]:
+                self._append_episode(self._pending_episodes.pop(i))
+        return np.array(0, np.int8)
+
+    def _end_episodes(self) -> np.ndarray:
+        for i in sorted(self._pending_episodes):
+            self._append_episode(self._pending_episodes.pop(i))
+        return np.array(0, np.int8)
+
+    def _append_episode(self, steps: list[tuple]) -> None:
+        obs, action, value, reward = (np.stack(x) for x in zip(*steps))
+        dones = np.zeros(len(steps), bool)
+        dones[-1] = True
+        self.store.append(obs.astype(np.uint8), action, reward, value, dones)
+
+    def expand_obs(self, state: tf.Tensor) -> tf.Tensor:
+        '''Expand packed uint8 observations [...] into the int8 [..., 2, 4] model input, if packed.'''
+        if not self.packed_obs:
+            return state
+        # Bit i is Food i and bit 4+i is Wall i
+        shifts = tf.constant(np.arange(8, dtype=np.uint8).reshape(2, 4))
+        return tf.cast(tf.bitwise.right_shift(state[..., None, None], shifts) & 1, tf.int8)
+
     # Wrap Gym's `env.step` call as an operation in a TensorFlow function.
     # This allows it to be included in a callable TensorFlow graph.
     def env_step(
@@ -130,10 +242,358 @@ class ActorCriticTrainer:
     ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
         '''Returns state, reward and terminated flag given an action.'''
         state, reward, terminated, _, _ = self.env.step(action)
-        return (state.astype(np.int8), np.array(reward, np.float32), np.array(terminated, np.int8))
+        # Packed observations are copied out of the buffer the environment reuses
+        state = state.copy() if self.packed_obs else state.astype(np.int8)
+        return (state, np.array(reward, np.float32), np.array(terminated, np.int8))
 
     def tf_env_step(
         self,
         action: tf.Tensor
     ) -> list[tf.Tensor]:
-        return tf.numpy_function(self.env_step, [action], [tf.int8, tf.float32, tf.int8])
+        if isinstance(self.env, TFEcosysEnv):
+            # The environment is made of TensorFlow operations, no need to leave the graph
+            state, reward, terminated = self.env.step(action)
+            return [tf.cast(state, tf.int8), reward, tf.cast(terminated, tf.int8)]
+        state, reward, terminated = tf.numpy_function(
+            self.env_step, [action], [tf.uint8 if self.packed_obs else tf.int8, tf.float32, tf.int8])
+        return [self.expand_obs(state), reward, terminated]
+
+
+class BatchedActorCriticTrainer(ActorCriticTrainer):
+    '''Trainer running one episode in every sub-environment of an EcosysVectorEnv per training step.'''
+    def __init__(
+        self,
+        env: EcosysVectorEnv,
+        model: tf.keras.Model,
+        optimizer: tf.keras.optimizers.Optimizer,
+        gae_lambda: Optional[float] = None,
+        profiler: Optional[Profiler] = None,
+        store: Optional[TrajectoryStore] = None
+    ):
+        '''Initialize Trainer.'''
+        super().__init__(env, model, optimizer, gae_lambda, profiler, store)
+        # Number of episodes collected per training step
+        self.num_envs = env.num_envs
+
+    def run_episode(
+        self,
+        initial_state: tf.Tensor,
+        max_steps: int
+    ) -> tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+        '''Run one episode per sub-environment, returning [num_envs, T] tensors and the mask of valid steps'''
+        # Initialize tensors containing the action probabilities, the critic values, the rewards and the mask
+        action_probs = tf.TensorArray(dtype=tf.float32, size=0, dynamic_size=True)
+        values = tf.TensorArray(dtype=tf.float32, size=0, dynamic_size=True)
+        rewards = tf.TensorArray(dtype=tf.float32, size=0, dynamic_size=True)
+        masks = tf.TensorArray(dtype=tf.float32, size=0, dynamic_size=True)
+        # Start the episode loop
+        state = self.expand_obs(initial_state)
+        initial_state_shape = state.shape
+        active = tf.ones([self.num_envs], dtype=tf.bool)
+        for t in tf.range(max_steps):
+            # Flatten environment states, keeping the batch dimension
+            state = tf.reshape(state, [self.num_envs, -1])
+            # Run the model and to get action probabilities and critic values
+            action_logits_t, value = self.model(state)
+            # Sample next actions from the action probability distributions
+            action = tf.random.categorical(action_logits_t, 1)[:, 0]
+            # Calculate action probabilities
+            action_probs_t = tf.nn.softmax(action_logits_t)
+            # Steps taken after the end of an episode are masked out
+            mask = tf.cast(active, tf.float32)
+            masks = masks.write(t, mask)
+            # Store critic values
+            values = values.write(t, tf.squeeze(value, 1))
+            # Store probability of the actions chosen
+            action_probs = action_probs.write(t, tf.gather(action_probs_t, action, batch_dims=1))
+            # Apply actions to the environments to get next states and rewards
+            obs = state
+            state, reward, done = self.tf_env_step(action)
+            state.set_shape(initial_state_shape)
+            reward.set_shape([self.num_envs])
+            done.set_shape([self.num_envs])
+            # Store rewards
+            rewards = rewards.write(t, reward*mask)
+            self._store_steps(obs, action, value[:, 0], reward, done, active)
+            # Break loop once every episode is done
+            active = tf.logical_and(active, tf.logical_not(tf.cast(done, tf.bool)))
+            if not tf.reduce_any(active):
+                break
+        self._store_end_episodes()
+        action_probs, values, rewards, masks = [tf.transpose(x.stack()) for x in [action_probs, values, rewards, masks]]
+        return action_probs, values, rewards, masks
+
+    def get_expected_return(
+        self,
+        rewards: tf.Tensor,
+        gamma: float,
+        masks: tf.Tensor,
+        standardize: bool = True
+    ) -> tf.Tensor:
+        '''Compute expected returns per timestep of [num_envs, T] rewards.'''
+        # Rewards after the end of each episode are zero, so they add nothing to the returns
+        returns = discounted_returns(rewards, gamma)
+        if standardize:
+            # Standardize each episode over its valid steps
+            returns = masked_standardize(returns, masks)
+        return returns
+
+    def get_advantage(
+        self,
+        rewards: tf.Tensor,
+        values: tf.Tensor,
+        gamma: float,
+        masks: tf.Tensor,
+        standardize: bool = True
+    ) -> tuple[tf.Tensor, tf.Tensor]:
+        '''Compute Generalized Advantage Estimates and critic targets per timestep of [num_envs, T] rewards.'''
+        # The last valid step of each episode is terminal
+        dones = masks * (1. - tf.concat([masks[:, 1:], tf.zeros_like(masks[:, :1])], axis=1))
+        advantage, returns = generalized_advantage_estimates(
+            rewards, tf.stop_gradient(values), gamma, self.gae_lambda, dones)
+        if standardize:
+            advantage = masked_standardize(advantage, masks)
+        return advantage, returns
+
+    def compute_loss(
+        self,
+        action_probs: tf.Tensor,
+        values: tf.Tensor,
+        returns: tf.Tensor,
+        masks: tf.Tensor,
+        advantage: Optional[tf.Tensor] = None
+    ) -> tf.Tensor:
+        '''Computes the combined Actor-Critic loss, averaged over episodes.'''
+        huber_loss = tf.keras.losses.Huber(reduction=tf.keras.losses.Reduction.SUM)
+        if advantage is None:
+            advantage = returns - tf.stop_gradient(values)
+        action_log_probs = tf.math.log(action_probs)
+        actor_loss = -tf.math.reduce_sum(action_log_probs * advantage * masks)
+        critic_loss = huber_loss(values[..., None], returns[..., None], sample_weight=masks)
+        return (actor_loss + critic_loss) / self.num_envs
+
+    @tf.function
+    def train_step(
+        self,
+        initial_state: tf.Tensor,
+        gamma: float,
+        max_steps_per_episode: int
+    ) -> tf.Tensor:
+        '''Runs a model training step, returning the reward of each episode.'''
+        phases = self._start_phases()
+        with tf.GradientTape() as tape:
+            # Run the model for one episode per sub-environment to collect training data
+            action_probs, values, rewards, masks = self._phase(
+                phases, 'run_episode', self.run_episode, initial_state, max_steps_per_episode)
+            # Calculate the expected returns
+            if self.gae_lambda is None:
+                returns = self._phase(phases, 'get_expected_return', self.get_expected_return, rewards, gamma, masks)
+                advantage = returns - tf.stop_gradient(values)
+            else:
+                advantage, returns = self._phase(
+                    phases, 'get_advantage', self.get_advantage, rewards, values, gamma, masks)
+            # Calculate the loss values to update our network
+            loss = self._phase(
+                phases, 'compute_loss', self.compute_loss, action_probs, values, returns, masks, advantage)
+            # Compute the gradients from the loss
+            grads = self._phase(phases, 'gradient', tape.gradient, loss, self.model.trainable_variables)
+        # Apply the gradients to the model's parameters
+        self._phase(phases, 'apply_gradients', self.optimizer.apply_gradients, zip(grads, self.model.trainable_variables))
+        self._record_phases(phases)
+        episode_rewards = tf.math.reduce_sum(rewards, axis=1)
+        return episode_rewards
+
+    def env_step(
+        self,
+        action: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        '''Returns states, rewards and done flags given a batch of actions.'''
+        state, reward, terminated, truncated, _ = self.env.step(action)
+        state = state.copy() if self.packed_obs else state.astype(np.int8)
+        return (state, reward.astype(np.float32), (terminated | truncated).astype(np.int8))
+
+
+class TFActorCriticTrainer(BatchedActorCriticTrainer):
+    '''
+    Trainer compiling the episode rollout and the model update of a TFEcosysEnv into one graph.
+
+    Episodes are padded to max_steps with a mask of valid steps, so that every tensor in the
+    graph has a fixed shape and the training step can be XLA compiled with jit_compile.
+    '''
+    def __init__(
+        self,
+        env: TFEcosysEnv,
+        model: tf.keras.Model,
+        optimizer: tf.keras.optimizers.Optimizer,
+        gae_lambda: Optional[float] = None,
+        jit_compile: bool = False,
+        profiler: Optional[Profiler] = None,
+        store: Optional[TrajectoryStore] = None
+    ):
+        '''Initialize Trainer.'''
+        assert profiler is None or not jit_compile, 'XLA compiled training steps cannot be profiled.'
+        assert store is None or not jit_compile, 'XLA compiled training steps cannot store episodes.'
+        ActorCriticTrainer.__init__(self, env, model, optimizer, gae_lambda, profiler, store)
+        # One episode per training step
+        self.num_envs = 1
+        # Compile the training step, optionally with XLA
+        self.jit_compile = jit_compile
+        self.train_step = tf.function(
+            functools.partial(BatchedActorCriticTrainer.train_step.python_function, self),
+            jit_compile=jit_compile
+        )
+
+    def run_episode(
+        self,
+        initial_state: tf.Tensor,
+        max_steps: int
+    ) -> tuple[tf.Tensor, tf.Tensor, tf.Tensor, tf.Tensor]:
+        '''Run a single episode padded to max_steps, returning [1, max_steps] tensors and the mask of valid steps'''
+        # Initialize tensors containing the action probabilities, the critic values and the rewards
+        action_probs = tf.TensorArray(dtype=tf.float32, size=max_steps, element_shape=[])
+        values = tf.TensorArray(dtype=tf.float32, size=max_steps, element_shape=[])
+        rewards = tf.TensorArray(dtype=tf.float32, size=max_steps, element_shape=[])
+        # Start the episode loop
+        state = self.expand_obs(initial_state)
+        initial_state_shape = state.shape
+        length = tf.constant(0)
+        for t in tf.range(max_steps):
+            # Flatten environment state and add the batch dimension
+            state = tf.reshape(state, [1, -1])
+            # Run the model and to get action probabilities and critic value
+            action_logits_t, value = self.model(state)
+            # Sample next action from the action probability distribution
+            action = tf.random.categorical(action_logits_t, 1)[0, 0]
+            # Calculate action probabilities
+            action_probs_t = tf.nn.softmax(action_logits_t)
+            # Store critic values
+            values = values.write(t, value[0, 0])
+            # Store probability of the action chosen
+            action_probs = action_probs.write(t, action_probs_t[0, action])
+            # Apply action to the environment to get next state and reward
+            obs = state
+            state, reward, done = self.tf_env_step(action)
+            state.set_shape(initial_state_shape)
+            # Store reward
+            rewards = rewards.write(t, reward)
+            self._store_steps(obs, action[None], value[:, 0], reward[None], done[None], tf.ones([1], tf.bool))
+            length = t + 1
+            # Break loop if done is true
+            if tf.cast(done, tf.bool):
+                break
+        self._store_end_episodes()
+        masks = tf.sequence_mask(length, max_steps, dtype=tf.float32)[None]
+        # Steps after the end of the episode are zeros, give them probability 1 so that their log is 0
+        action_probs = tf.where(masks > 0., action_probs.stack()[None], 1.)
+        return action_probs, values.stack()[None], rewards.stack()[None], masks
+
+
+class CompiledActorCriticTrainer(BatchedActorCriticTrainer):
+    '''
+    Trainer collecting episodes outside of the graph and learning from them in an XLA compiled step.
+
+    Every training step runs one episode per sub-environment of an EcosysVectorEnv with a NumPy
+    copy of the model (ActorCriticPolicy), then pads the observations, actions, rewards and masks
+    of the episodes to max_steps, so that the learning step, which runs the model again on the
+    padded episodes, always sees the same shapes and is traced and compiled once. With
+    bucket_lengths the episodes are instead padded to the next power of two, compiling at most
+    log2(max_steps) + 1 variants of the learning step but skipping most of the padding.
+    '''
+    def __init__(
+        self,
+        env: EcosysVectorEnv,
+        model: tf.keras.Model,
+        optimizer: tf.keras.optimizers.Optimizer,
+        gae_lambda: Optional[float] = None,
+        jit_compile: bool = True,
+        bucket_lengths: bool = False,
+        seed: Optional[int] = None
+    ):
+        '''Initialize Trainer.'''
+        super().__init__(env, model, optimizer, gae_lambda)
+        assert not self.packed_obs, 'Packed observations are not supported, use the unpacked ones.'
+        self.jit_compile = jit_compile
+        self.bucket_lengths = bucket_lengths
+        self.rng = np.random.default_rng(seed)
+        self.update = tf.function(self._update, jit_compile=jit_compile)
+
+    @property
+    def tracing_count(self) -> int:
+        '''Number of times the learning step was traced.'''
+        return self.update.experimental_get_tracing_count()
+
+    def padded_length(self, length: int, max_steps: int) -> int:
+        '''Number of steps the episodes of a training step are padded to.'''
+        if not self.bucket_lengths:
+            return max_steps
+        return min(max_steps, 1 << max(length - 1, 0).bit_length())
+
+    def collect(
+        self,
+        initial_state: np.ndarray,
+        max_steps: int
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        '''Run one episode per sub-environment, returning its observations, actions, rewards and masks padded in time.'''
+        if not self.model.built:
+            # Create the model and optimizer variables outside of the learning step, which would otherwise be traced twice
+            self.model(tf.zeros([1, int(np.prod(np.shape(initial_state)[1:]))]))
+            self.optimizer.build(self.model.trainable_variables)
+        policy = ActorCriticPolicy.from_model(self.model, greedy=False, seed=int(self.rng.integers(2**32)))
+        num_envs = self.num_envs
+        state = np.asarray(initial_state, dtype=np.int8).reshape(num_envs, -1)
+        obs = np.zeros((num_envs, max_steps, state.shape[1]), dtype=np.int8)
+        actions = np.zeros((num_envs, max_steps), dtype=np.int32)
+        rewards = np.zeros((num_envs, max_steps), dtype=np.float32)
+        masks = np.zeros((num_envs, max_steps), dtype=np.float32)
+        active = np.ones(num_envs, dtype=bool)
+        length = 0
+        while length < max_steps and active.any():
+            obs[:, length] = state
+            actions[:, length] = policy(state)
+            masks[:, length] = active
+            state, reward, terminated, truncated, _ = self.env.step(actions[:, length])
+            state = np.asarray(state, dtype=np.int8).reshape(num_envs, -1)
+            rewards[:, length] = reward * active
+            active &= ~(terminated | truncated)
+            length += 1
+        padded = self.padded_length(length, max_steps)
+        return obs[:, :padded], actions[:, :padded], rewards[:, :padded], masks[:, :padded]
+
+    def train_step(
+        self,
+        initial_state: tf.Tensor,
+        gamma: float,
+        max_steps_per_episode: int
+    ) -> tf.Tensor:
+        '''Runs a model training step, returning the reward of each episode.'''
+        obs, actions, rewards, masks = self.collect(np.asarray(initial_state), max_steps_per_episode)
+        self.update(obs, actions, rewards, masks, tf.constant(gamma, tf.float32))
+        return tf.constant(rewards.sum(axis=1))
+
+    def _update(
+        self,
+        obs: tf.Tensor,
+        actions: tf.Tensor,
+        rewards: tf.Tensor,
+        masks: tf.Tensor,
+        gamma: tf.Tensor
+    ) -> tf.Tensor:
+        '''Apply one gradient step on [num_envs, T] padded episodes, returning the loss.'''
+        num_envs, length = tf.shape(actions)[0], tf.shape(actions)[1]
+        with tf.GradientTape() as tape:
+            # Run the model on every step, computing in float32 whatever the mixed precision policy
+            logits, values = self.model(tf.reshape(obs, [num_envs * length, -1]))
+            logits = tf.reshape(tf.cast(logits, tf.float32), [num_envs, length, -1])
+            values = tf.reshape(tf.cast(values, tf.float32), [num_envs, length])
+            # Steps after the end of the episodes get probability 1, so that their log is 0
+            action_probs = tf.gather(tf.nn.softmax(logits), actions, batch_dims=2)
+            action_probs = tf.where(masks > 0., action_probs, 1.)
+            if self.gae_lambda is None:
+                returns = self.get_expected_return(rewards, gamma, masks)
+                advantage = returns - tf.stop_gradient(values)
+            else:
+                advantage, returns = self.get_advantage(rewards, values, gamma, masks)
+            loss = self.compute_loss(action_probs, values, returns, masks, advantage)
+        grads = tape.gradient(loss, self.model.trainable_variables)
+        self.optimizer.apply_gradients(zip(grads, self.model.trainable_variables))
+        return loss